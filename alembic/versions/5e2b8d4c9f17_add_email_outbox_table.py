@@ -0,0 +1,40 @@
+"""add email outbox table
+
+Revision ID: 5e2b8d4c9f17
+Revises: 9a4b7e2f1c38
+Create Date: 2026-10-18 18:42:51.613208
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5e2b8d4c9f17'
+down_revision: Union[str, None] = '9a4b7e2f1c38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # The delivery worker claims due rows in next_attempt_at order; parked rows have NULL there
+    op.create_table('email_outbox',
+        sa.Column('id', sa.UUID(), nullable=False),
+        sa.Column('email_type', sa.String(length=50), nullable=False),
+        sa.Column('recipient', sa.String(length=255), nullable=False),
+        sa.Column('context', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+        sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+        sa.Column('next_attempt_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_outbox_next_attempt_at'), 'email_outbox', ['next_attempt_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_email_outbox_next_attempt_at'), table_name='email_outbox')
+    op.drop_table('email_outbox')
@@ -0,0 +1,37 @@
+"""add user token revocations table
+
+Revision ID: b6d3f1a8e24c
+Revises: 5e2b8d4c9f17
+Create Date: 2026-10-18 20:17:36.482913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b6d3f1a8e24c'
+down_revision: Union[str, None] = '5e2b8d4c9f17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('user_token_revocations',
+        sa.Column('user_id', sa.UUID(), nullable=False),
+        sa.Column('revoked_before', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('expires_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('revoked_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=False),
+        sa.PrimaryKeyConstraint('user_id')
+    )
+    # As for revoked_tokens: expires_at drives the purge, revoked_at drives incremental sync
+    op.create_index(op.f('ix_user_token_revocations_expires_at'), 'user_token_revocations', ['expires_at'], unique=False)
+    op.create_index(op.f('ix_user_token_revocations_revoked_at'), 'user_token_revocations', ['revoked_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_user_token_revocations_revoked_at'), table_name='user_token_revocations')
+    op.drop_index(op.f('ix_user_token_revocations_expires_at'), table_name='user_token_revocations')
+    op.drop_table('user_token_revocations')
@@ -1,29 +1,183 @@
+import itertools
+import time
+from typing import Sequence
+from sqlalchemy import exc, Select
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.orm import declarative_base, sessionmaker, Session
+from sqlalchemy.pool import AsyncAdaptedQueuePool
 from fastapi import Depends
 
 Base = declarative_base()
 
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Async queue pool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.total_wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            self.checkout_timeouts += 1
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            self.checkouts += 1
+            self.total_wait_seconds += waited
+            self.max_wait_seconds = max(self.max_wait_seconds, waited)
+
+    def stats(self) -> dict:
+        """Snapshot of connection usage and checkout wait times."""
+        return {
+            "pool_size": self.size(),
+            "max_overflow": self._max_overflow,
+            "checked_out": self.checkedout(),
+            "idle": self.checkedin(),
+            "overflow": max(self.overflow(), 0),
+            "checkouts": self.checkouts,
+            "checkout_timeouts": self.checkout_timeouts,
+            "avg_wait_ms": (self.total_wait_seconds / self.checkouts * 1000) if self.checkouts else 0.0,
+            "max_wait_ms": self.max_wait_seconds * 1000,
+        }
+
+# Session.info flag set once a session has written; its later reads stay on the primary.
+PRIMARY_STICKY = "primary_sticky"
+# Session.info flag for sessions whose transactions are opened READ ONLY and never committed.
+READ_ONLY = "read_only"
+# Session.info key holding the engine a session's replica reads go to, picked on its first read.
+REPLICA = "replica"
+# Session.info key holding coroutine functions to await once the session's transaction has committed.
+AFTER_COMMIT = "after_commit"
+# Execution option sending one SELECT to the primary without pinning the rest of the session there.
+READ_PRIMARY = "read_primary"
+
+class RoutingSession(Session):
+    """
+    Routes plain SELECTs to a read replica and everything else to the primary.
+    One replica serves all of a session's reads, so they see a single replica's snapshot. After the first
+    write (INSERT/UPDATE/DELETE or a flush) the session sticks to the primary so a request reads its own writes.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        return Database.bind_for(self._route(clause), read_only=self.info.get(READ_ONLY, False))
+
+    def _route(self, clause):
+        primary = Database._engine
+        if self.info.get(PRIMARY_STICKY):
+            return primary
+        if self._flushing or (clause is not None and clause.is_dml):
+            self.info[PRIMARY_STICKY] = True
+            return primary
+        # Textual SQL may write, so it runs on the primary, but does not pin the reads that follow it there
+        if not isinstance(clause, Select) or clause._for_update_arg is not None or clause.get_execution_options().get(READ_PRIMARY):
+            return primary
+        replica = self.info.get(REPLICA)
+        if replica is None:
+            replica = self.info[REPLICA] = Database.get_replica_engine() or primary
+        return replica
+
 class Database:
     """Handles database connections and sessions."""
     _engine = None
+    _replica_engines = []
+    _replica_cycle = None
+    _replica_policy = "round_robin"
+    _read_only_binds = {}
     _session_factory = None
+    _read_only_session_factory = None
+
+    REPLICA_POLICIES = ("round_robin", "least_busy")
 
     @classmethod
-    def initialize(cls, database_url: str, echo: bool = False):
-        """Initialize the async engine and sessionmaker."""
+    def initialize(cls, database_url: str, echo: bool = False, pool_size: int = 5, max_overflow: int = 10,
+                   pool_timeout: float = 30.0, pool_pre_ping: bool = False, pool_recycle: int = -1,
+                   replica_urls: Sequence[str] = (), replica_policy: str = "round_robin"):
+        """Initialize the primary and replica async engines and the sessionmaker."""
         if cls._engine is None:  # Ensure engine is created once
-            cls._engine = create_async_engine(database_url, echo=echo, future=True)
+            if replica_policy not in cls.REPLICA_POLICIES:
+                raise ValueError(f"Unknown replica policy '{replica_policy}'. Use one of {cls.REPLICA_POLICIES}.")
+            engine_options = dict(
+                echo=echo,
+                future=True,
+                poolclass=TimedQueuePool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+                pool_timeout=pool_timeout,
+                pool_pre_ping=pool_pre_ping,
+                pool_recycle=pool_recycle,
+            )
+            cls._engine = create_async_engine(database_url, **engine_options)
+            cls._replica_engines = [create_async_engine(url, **engine_options) for url in replica_urls]
+            cls._replica_cycle = itertools.cycle(cls._replica_engines)
+            cls._replica_policy = replica_policy
+            cls._read_only_binds = {
+                engine: engine.sync_engine.execution_options(postgresql_readonly=True)
+                for engine in [cls._engine, *cls._replica_engines]
+            }
             cls._session_factory = sessionmaker(
-                bind=cls._engine, class_=AsyncSession, expire_on_commit=False, future=True
+                class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False, future=True
             )
+            cls._read_only_session_factory = sessionmaker(
+                class_=AsyncSession, sync_session_class=RoutingSession, expire_on_commit=False, future=True,
+                info={READ_ONLY: True},
+            )
+
+    @classmethod
+    def bind_for(cls, engine, read_only: bool = False):
+        """Returns the sync bind for an engine, using its READ ONLY variant for read-only sessions."""
+        return cls._read_only_binds[engine] if read_only else engine.sync_engine
 
     @classmethod
-    def get_session_factory(cls):
+    def get_replica_engine(cls):
+        """Picks a replica engine by the configured policy, or None when no replicas are configured."""
+        if not cls._replica_engines:
+            return None
+        if cls._replica_policy == "least_busy":
+            return min(cls._replica_engines, key=lambda engine: engine.pool.checkedout())
+        return next(cls._replica_cycle)
+
+    @staticmethod
+    def use_primary(session: AsyncSession):
+        """Pins the rest of this session's statements, including reads, to the primary."""
+        session.info[PRIMARY_STICKY] = True
+
+    @staticmethod
+    def after_commit(session: AsyncSession, callback):
+        """
+        Queues a coroutine function to await once the session's work is committed. Used for side effects that
+        must not be seen before the write is, such as invalidating caches other requests could refill meanwhile.
+        """
+        session.info.setdefault(AFTER_COMMIT, []).append(callback)
+
+    @staticmethod
+    async def commit(session: AsyncSession):
+        """Commits the session, then runs the callbacks queued with `after_commit`."""
+        await session.commit()
+        for callback in session.info.pop(AFTER_COMMIT, []):
+            await callback()
+
+    @classmethod
+    def get_session_factory(cls, read_only: bool = False):
         """Returns the session factory, ensuring it's initialized."""
         if cls._session_factory is None:
             raise ValueError("Database not initialized. Call `initialize()` first.")
-        return cls._session_factory
+        return cls._read_only_session_factory if read_only else cls._session_factory
+
+    @classmethod
+    def pool_stats(cls) -> dict:
+        """Returns live connection pool metrics for the primary and each replica engine."""
+        if cls._engine is None:
+            raise ValueError("Database not initialized. Call `initialize()` first.")
+        return {
+            "primary": cls._engine.pool.stats(),
+            "replicas": [engine.pool.stats() for engine in cls._replica_engines],
+        }
 
 async def get_db() -> AsyncSession:
     """
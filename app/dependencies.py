@@ -1,12 +1,18 @@
-from builtins import Exception, dict, str
+from builtins import Exception, ValueError, bool, dict, str
+from contextlib import asynccontextmanager
+from uuid import UUID
 from fastapi import Depends, HTTPException
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.database import Database
+from app.database import AFTER_COMMIT, Database, PRIMARY_STICKY, READ_PRIMARY
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
+from app.schemas.token_schema import TokenPrincipal
 from app.services.jwt_service import decode_token
-from settings.config import Settings
+from app.services.principal_cache import principal_cache, principal_key
+from app.services.token_revocation import is_revoked
+from settings.config import Settings, settings
 from fastapi import Depends
 from app.models.user_model import User  # Import the User model
 
@@ -18,22 +24,57 @@ def get_email_service() -> EmailService:
     template_manager = TemplateManager()
     return EmailService(template_manager=template_manager)
 
+@asynccontextmanager
+async def unit_of_work(session: AsyncSession):
+    """
+    Commits what a request wrote, once, when it completes. Services only flush, so a request's writes land together.
+    A deliberate HTTP error still commits, so outcomes such as a failed login attempt are recorded; any other
+    exception leaves the work uncommitted and becomes a 500.
+    """
+    try:
+        yield
+        await _commit_pending(session)
+    except HTTPException:
+        await _commit_pending(session)
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+async def _commit_pending(session: AsyncSession):
+    pending = session.info.get(PRIMARY_STICKY) or session.info.get(AFTER_COMMIT) or session.new or session.dirty or session.deleted
+    if session.in_transaction() and pending:
+        await Database.commit(session)
+
 async def get_db() -> AsyncSession:
-    """Dependency that provides a database session for each request."""
+    """Dependency that provides a database session for each request, committed as one unit of work."""
     async_session_factory = Database.get_session_factory()
+    async with async_session_factory() as session:
+        async with unit_of_work(session):
+            yield session
+
+async def get_read_only_db() -> AsyncSession:
+    """
+    Dependency that provides a read-only database session for each request.
+    All reads share one READ ONLY transaction that is never committed; it is released when the request ends.
+    """
+    async_session_factory = Database.get_session_factory(read_only=True)
     async with async_session_factory() as session:
         try:
             yield session
+        except HTTPException:
+            raise
         except Exception as e:
             raise HTTPException(status_code=500, detail=str(e))
 
 # OAuth2 password bearer for token extraction
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)):
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_db)) -> TokenPrincipal:
     """
-    Get the current user from the JWT token.
-    Validates the token and fetches the user from the database.
+    Resolve the JWT to the caller's principal.
+    In stateful mode the role and lock state are read from the primary once per token and then served from the
+    principal cache; in stateless mode the token's signed claims are used without any database access.
+    Write routes share their request session with this lookup.
     """
     credentials_exception = HTTPException(
         status_code=401,
@@ -52,24 +93,45 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Dep
     
     if user_id is None or user_role is None:
         raise credentials_exception
-    
-    # Fetch the user from the database using user_id
-    user = db.query(User).filter(User.id == user_id).first()
-    if user is None:
+
+    try:
+        user_uuid = UUID(user_id)
+    except ValueError:
         raise credentials_exception
 
-    # Optionally, check that the role matches
-    if user_role != user.role:
+    if settings.auth_mode == "stateless":
+        # Signed claims are trusted as-is; short token lifetimes and revocation bound how stale they can be
+        if is_revoked(payload):
+            raise credentials_exception
+        return TokenPrincipal(user_id=user_uuid, role=user_role)
+
+    key = principal_key(payload)
+    principal = principal_cache.get(key) if key is not None else None
+    if principal is None:
+        # A lagging replica could still show a demoted or locked user as they were
+        query = select(User.role, User.is_locked).where(User.id == user_uuid).execution_options(**{READ_PRIMARY: True})
+        result = await db.execute(query)
+        row = result.first()
+        if row is None:
+            raise credentials_exception
+        principal = TokenPrincipal(user_id=user_uuid, role=row.role.name, is_locked=bool(row.is_locked))
+        if key is not None:
+            principal_cache.set(key, principal)
+
+    # A token minted before a role change no longer speaks for the user
+    if user_role != principal.role:
         raise credentials_exception
+    if principal.is_locked:
+        raise HTTPException(status_code=403, detail="Account is locked")
 
-    return user  # Return the full User object
+    return principal
 
 def require_role(roles: list):
     """
     Dependency that checks if the user has the required role(s).
     This allows flexible role-based access control.
     """
-    def role_checker(current_user: User = Depends(get_current_user)):
+    def role_checker(current_user: TokenPrincipal = Depends(get_current_user)):
         if current_user.role not in roles:
             raise HTTPException(status_code=403, detail="Operation not permitted")
         return current_user
@@ -1,12 +1,21 @@
 from builtins import Exception
+import asyncio
 from fastapi import FastAPI, Depends, HTTPException
 from starlette.responses import JSONResponse
 from starlette.middleware.cors import CORSMiddleware
 from app.database import Database
 from app.dependencies import get_settings, get_current_user
-from app.routers import user_routes
-from app.services.jwt_service import decode_token
+from app.routers import jwks_routes, metrics_routes, user_routes
+from app.services.jwt_service import decode_token, get_key_ring, run_key_maintenance
+from app.services.key_ring import ASYMMETRIC_ALGORITHMS
+from app.services.email_outbox import run_outbox_worker
+from app.services.email_service import EmailService, close_smtp_client
+from app.services.token_revocation import revocation_list, run_revocation_sync
+from app.services.user_service import UserService
 from app.utils.api_description import getDescription
+from app.utils.rate_limit import RateLimitMiddleware, rate_limiter
+from app.utils.template_manager import TemplateManager
+from app.utils.security import calibrate_password_policy, shutdown_hash_executor
 from app.models.user_model import User
 
 app = FastAPI(
@@ -21,6 +30,8 @@ app = FastAPI(
     license_info={"name": "MIT", "url": "https://opensource.org/licenses/MIT"},
 )
 
+# Added before CORS so CORS wraps it: 429 responses then carry the CORS headers browsers need to read them
+app.add_middleware(RateLimitMiddleware, limiter=rate_limiter)
 # CORS middleware configuration
 app.add_middleware(
     CORSMiddleware,
@@ -33,7 +44,49 @@ app.add_middleware(
 @app.on_event("startup")
 async def startup_event():
     settings = get_settings()
-    Database.initialize(settings.database_url, settings.debug)
+    Database.initialize(
+        settings.database_url,
+        settings.debug,
+        pool_size=settings.db_pool_size,
+        max_overflow=settings.db_max_overflow,
+        pool_timeout=settings.db_pool_timeout,
+        pool_pre_ping=settings.db_pool_pre_ping,
+        pool_recycle=settings.db_pool_recycle,
+        replica_urls=settings.database_replica_urls,
+        replica_policy=settings.database_replica_policy,
+    )
+
+    if settings.password_hash_target_ms > 0:
+        calibrate_password_policy(settings.password_hash_target_ms)
+    if settings.jwt_algorithm in ASYMMETRIC_ALGORITHMS:
+        await asyncio.to_thread(get_key_ring)
+        app.state.key_maintenance = asyncio.create_task(run_key_maintenance(settings.jwt_key_maintenance_interval_seconds))
+    # Load revocations before serving, then keep them in step with the table
+    session_factory = Database.get_session_factory()
+    async with session_factory() as session:
+        await revocation_list.sync(session)
+    app.state.revocation_sync = asyncio.create_task(
+        run_revocation_sync(session_factory, settings.revocation_sync_interval_seconds)
+    )
+    if settings.email_outbox_enabled:
+        app.state.email_outbox_worker = asyncio.create_task(run_outbox_worker(
+            session_factory,
+            EmailService(template_manager=TemplateManager()),
+            settings.email_outbox_poll_interval_seconds,
+            settings.email_outbox_batch_size,
+        ))
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    app.state.revocation_sync.cancel()
+    if get_settings().jwt_algorithm in ASYMMETRIC_ALGORITHMS:
+        app.state.key_maintenance.cancel()
+    if get_settings().email_outbox_enabled:
+        app.state.email_outbox_worker.cancel()
+    await UserService.close_cache()
+    shutdown_hash_executor()
+    await rate_limiter.close()
+    await close_smtp_client()
 
 @app.exception_handler(Exception)
 async def exception_handler(request, exc):
@@ -66,3 +119,5 @@ async def upgrade_user_profile(user: User = Depends(get_current_user_from_token)
     return {"message": "Profile upgraded to professional status."}
 
 app.include_router(user_routes.router)
+app.include_router(metrics_routes.router)
+app.include_router(jwks_routes.router)
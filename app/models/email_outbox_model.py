@@ -0,0 +1,28 @@
+from builtins import dict, int, str
+from datetime import datetime
+import uuid
+from typing import Optional
+from sqlalchemy import Column, DateTime, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB, UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class EmailOutbox(Base):
+    """
+    An email waiting to be sent, written in the same transaction as the change that causes it, so the email
+    is sent if and only if that change commits. Rows are deleted once delivered; a row that exhausted its
+    attempts keeps its last error and a NULL `next_attempt_at`, which parks it out of the delivery queue.
+    """
+    __tablename__ = "email_outbox"
+
+    id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    email_type: Mapped[str] = Column(String(50), nullable=False)
+    recipient: Mapped[str] = Column(String(255), nullable=False)
+    context: Mapped[dict] = Column(JSONB, nullable=False)
+    attempts: Mapped[int] = Column(Integer, nullable=False, default=0, server_default="0")
+    next_attempt_at: Mapped[Optional[datetime]] = Column(DateTime(timezone=True), server_default=func.now(), nullable=True, index=True)
+    last_error: Mapped[Optional[str]] = Column(Text, nullable=True)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<EmailOutbox {self.email_type} to {self.recipient}, attempt {self.attempts}>"
@@ -0,0 +1,53 @@
+from builtins import str
+from datetime import datetime
+import uuid
+from sqlalchemy import Column, DateTime, ForeignKey, String, func
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.orm import Mapped, mapped_column
+from app.database import Base
+
+class RevokedToken(Base):
+    """
+    An access token revoked before its expiry, identified by its `jti` claim.
+    Rows are only needed until the token would have expired anyway, after which they are purged.
+    """
+    __tablename__ = "revoked_tokens"
+
+    jti: Mapped[str] = Column(String(64), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), nullable=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<RevokedToken {self.jti}, expires {self.expires_at}>"
+
+class UserTokenRevocation(Base):
+    """
+    Revokes every access token issued to a user before `revoked_before`, such as on a role change or lock.
+    Kept until the longest-lived of those tokens would have expired (`expires_at`), then purged. There is no
+    foreign key: deleting the user must not drop the revocation of tokens still in circulation.
+    """
+    __tablename__ = "user_token_revocations"
+
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True)
+    revoked_before: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False, index=True)
+    revoked_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False, index=True)
+
+    def __repr__(self) -> str:
+        return f"<UserTokenRevocation for {self.user_id}, before {self.revoked_before}>"
+
+class RefreshToken(Base):
+    """
+    A single-use refresh token. Only the SHA-256 of the token is stored; the row is deleted when the token is
+    exchanged, so presenting it a second time finds nothing.
+    """
+    __tablename__ = "refresh_tokens"
+
+    token_hash: Mapped[str] = Column(String(64), primary_key=True)
+    user_id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+    expires_at: Mapped[datetime] = Column(DateTime(timezone=True), nullable=False)
+    created_at: Mapped[datetime] = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    def __repr__(self) -> str:
+        return f"<RefreshToken for {self.user_id}, expires {self.expires_at}>"
@@ -0,0 +1,23 @@
+"""
+Public key discovery. Other services fetch our signing keys from here and verify tokens locally.
+"""
+
+import hashlib
+import json
+from fastapi import APIRouter, Request, Response
+from app.services.jwt_service import public_jwks
+from settings.config import settings
+
+router = APIRouter()
+
+@router.get("/.well-known/jwks.json", name="jwks", tags=["Login and Registration"])
+async def jwks(request: Request):
+    """
+    JSON Web Key Set of the public keys that verify our access tokens, with HTTP caching headers.
+    """
+    body = json.dumps(public_jwks(), separators=(",", ":")).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"Cache-Control": f"public, max-age={settings.jwks_max_age_seconds}", "ETag": etag}
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
@@ -0,0 +1,74 @@
+"""
+Operational metrics endpoints. These expose internal runtime counters (connection pool usage, caches, queues)
+so capacity settings can be tuned from observed data. All endpoints require the ADMIN role.
+"""
+
+from builtins import dict
+from fastapi import APIRouter, Depends
+from app.database import Database
+from app.dependencies import require_role
+from app.services.email_outbox import outbox_stats
+from app.services.jwt_service import decode_cache_stats
+from app.services.token_revocation import revocation_list
+from app.services.user_service import UserService
+from app.utils.admission import login_admission
+from app.utils.rate_limit import rate_limiter
+from app.utils.security import hashing_stats
+
+router = APIRouter()
+
+@router.get("/metrics/db-pool", name="db_pool_metrics", tags=["Metrics Requires (Admin Role)"])
+async def db_pool_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Live connection pool statistics: checked-out, idle and overflow connections plus checkout wait times.
+    """
+    return Database.pool_stats()
+
+@router.get("/metrics/user-cache", name="user_cache_metrics", tags=["Metrics Requires (Admin Role)"])
+async def user_cache_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    User lookup cache statistics: size, hits, misses, evictions and hit rate.
+    """
+    return UserService.cache_stats()
+
+@router.get("/metrics/jwt-cache", name="jwt_cache_metrics", tags=["Metrics Requires (Admin Role)"])
+async def jwt_cache_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Verified-token cache statistics: hit rate, signature verifications performed and the time hits saved.
+    """
+    return decode_cache_stats()
+
+@router.get("/metrics/token-revocations", name="token_revocation_metrics", tags=["Metrics Requires (Admin Role)"])
+async def token_revocation_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Revocation list statistics: revoked tokens held, checks, Bloom filter rejections and false positives.
+    """
+    return revocation_list.stats()
+
+@router.get("/metrics/password-hashing", name="password_hashing_metrics", tags=["Metrics Requires (Admin Role)"])
+async def password_hashing_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Password hashing pool statistics: workers, hashes in flight, and average and worst queue wait and hash time.
+    """
+    return hashing_stats()
+
+@router.get("/metrics/login-admission", name="login_admission_metrics", tags=["Metrics Requires (Admin Role)"])
+async def login_admission_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Login admission statistics: logins running and queued, peak queue depth, rejections and average queue wait.
+    """
+    return login_admission.stats()
+
+@router.get("/metrics/rate-limits", name="rate_limit_metrics", tags=["Metrics Requires (Admin Role)"])
+async def rate_limit_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Rate limiter statistics: requests allowed and rejected, plus counter store size or errors.
+    """
+    return rate_limiter.stats()
+
+@router.get("/metrics/email-outbox", name="email_outbox_metrics", tags=["Metrics Requires (Admin Role)"])
+async def email_outbox_metrics(current_user: dict = Depends(require_role(["ADMIN"]))):
+    """
+    Email outbox worker statistics: emails delivered, failed attempts awaiting retry and emails parked.
+    """
+    return outbox_stats()
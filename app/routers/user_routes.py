@@ -18,19 +18,25 @@ Key Highlights:
 - Utilizes OAuth2PasswordBearer for securing API endpoints, requiring valid access tokens for operations.
 """
 
-from builtins import dict, int, len, str
-from datetime import timedelta
+from builtins import ValueError, dict, int, len, str
+from datetime import datetime, timezone
+from typing import Optional
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Response, status, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status, Request
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.dependencies import get_current_user, get_db, get_email_service, require_role
+from app.dependencies import get_current_user, get_db, get_email_service, get_read_only_db, require_role
 from app.schemas.pagination_schema import EnhancedPagination
-from app.schemas.token_schema import TokenResponse
+from app.schemas.token_schema import RefreshTokenRequest, TokenResponse
 from app.schemas.user_schemas import LoginRequest, UserBase, UserCreate, UserListResponse, UserResponse, UserUpdate
-from app.services.user_service import UserService
-from app.services.jwt_service import create_access_token
-from app.utils.link_generation import create_user_links, generate_pagination_links
+from app.services.user_service import COUNT_EXACT, DuplicateUserError, UserService
+from app.services.jwt_service import access_token_lifetime, create_access_token, decode_token
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.token_revocation import revocation_list
+from app.utils.admission import AdmissionRejected, login_admission
+from app.utils.cursor import NEXT, PREV, decode_cursor, encode_cursor
+from app.utils.rate_limit import account_login_limit, rate_limiter
+from app.utils.link_generation import create_user_links, generate_cursor_pagination_links, generate_pagination_links
 from app.dependencies import get_settings
 from app.services.email_service import EmailService
 
@@ -39,7 +45,7 @@ oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 settings = get_settings()
 
 @router.get("/users/{user_id}", response_model=UserResponse, name="get_user", tags=["User Management Requires (Admin or Manager Roles)"])
-async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
+async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(get_read_only_db), token: str = Depends(oauth2_scheme), current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))):
     """
     Endpoint to fetch a user by their unique identifier (UUID).
 
@@ -49,7 +55,7 @@ async def get_user(user_id: UUID, request: Request, db: AsyncSession = Depends(g
     Args:
         user_id: UUID of the user to fetch.
         request: The request object, used to generate full URLs in the response.
-        db: Dependency that provides an AsyncSession for database access.
+        db: Dependency that provides a read-only AsyncSession for database access.
         token: The OAuth2 access token obtained through OAuth2PasswordBearer dependency.
     """
     user = await UserService.get_by_id(db, user_id)
@@ -120,8 +126,8 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     """
     Create a new user.
 
-    This endpoint creates a new user with the provided information. If the email
-    already exists, it returns a 400 error. On successful creation, it returns the
+    This endpoint creates a new user with the provided information. If the email or nickname
+    is already taken, it returns a 400 error. On successful creation, it returns the
     newly created user's information along with links to related actions.
 
     Parameters:
@@ -132,13 +138,12 @@ async def create_user(user: UserCreate, request: Request, db: AsyncSession = Dep
     Returns:
     - UserResponse: The newly created user's information along with navigation links.
     """
-    existing_user = await UserService.get_by_email(db, user.email)
-    if existing_user:
-        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
-    
-    created_user = await UserService.create(db, user.model_dump(), email_service)
+    try:
+        created_user = await UserService.create(db, user.model_dump(), email_service)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     if not created_user:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to create user")
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user data")
     
     return UserResponse.model_construct(
         id=created_user.id,
@@ -160,11 +165,22 @@ async def list_users(
     request: Request,
     skip: int = 0,
     limit: int = 10,
-    db: AsyncSession = Depends(get_db),
+    paging: str = Query("offset", pattern="^(offset|cursor)$", description="Pagination mode: offset (skip/limit) or cursor (keyset)."),
+    cursor: Optional[str] = Query(None, description="Opaque cursor from a previous page's next/prev link; implies cursor paging."),
+    db: AsyncSession = Depends(get_read_only_db),
     current_user: dict = Depends(require_role(["ADMIN", "MANAGER"]))
 ):
-    total_users = await UserService.count(db)
-    users = await UserService.list_users(db, skip, limit)
+    if paging == "cursor" or cursor:
+        total_users, total_mode = await UserService.count_with_strategy(db)
+        return await _list_users_by_cursor(request, limit, cursor, total_users, total_mode, db)
+
+    if settings.user_count_strategy == COUNT_EXACT:
+        # Page and exact total in one round trip
+        users, total_users = await UserService.list_users_with_total(db, skip, limit)
+        total_mode = COUNT_EXACT
+    else:
+        total_users, total_mode = await UserService.count_with_strategy(db)
+        users = await UserService.list_users(db, skip, limit)
 
     user_responses = [
         UserResponse.model_validate(user) for user in users
@@ -175,35 +191,126 @@ async def list_users(
     return UserListResponse(
         items=user_responses,
         total=total_users,
+        total_mode=total_mode,
         page=skip // limit + 1,
         size=len(user_responses),
         links=pagination_links
     )
 
+async def _list_users_by_cursor(request: Request, limit: int, cursor: Optional[str], total_users: int, total_mode: str,
+                                db: AsyncSession) -> UserListResponse:
+    """
+    Keyset pagination over (created_at, id). Pages cost the same at any depth, unlike OFFSET.
+    """
+    after, direction = None, NEXT
+    if cursor:
+        try:
+            created_at, user_id, direction = decode_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid pagination cursor")
+        after = (created_at, user_id)
+
+    users, has_more = await UserService.list_users_by_cursor(db, limit, after, direction)
+
+    next_cursor = prev_cursor = None
+    if users:
+        first, last = users[0], users[-1]
+        # Arriving from a cursor proves rows exist behind the page; has_more covers rows ahead of it
+        if (direction == NEXT and has_more) or (direction == PREV and after is not None):
+            next_cursor = encode_cursor(last.created_at, last.id, NEXT)
+        if (direction == PREV and has_more) or (direction == NEXT and after is not None):
+            prev_cursor = encode_cursor(first.created_at, first.id, PREV)
+
+    user_responses = [
+        UserResponse.model_validate(user) for user in users
+    ]
+
+    return UserListResponse(
+        items=user_responses,
+        total=total_users,
+        total_mode=total_mode,
+        size=len(user_responses),
+        links=generate_cursor_pagination_links(request, limit, cursor, next_cursor, prev_cursor)
+    )
+
 @router.post("/register/", response_model=UserResponse, tags=["Login and Registration"])
 async def register(user_data: UserCreate, session: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
-    user = await UserService.register_user(session, user_data.model_dump(), email_service)
+    try:
+        user = await UserService.register_user(session, user_data.model_dump(), email_service)
+    except DuplicateUserError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     if user:
         return user
-    raise HTTPException(status_code=400, detail="Email already exists")
+    raise HTTPException(status_code=400, detail="Invalid user data")
 
 @router.post("/login/", response_model=TokenResponse, tags=["Login and Registration"])
 async def login(form_data: OAuth2PasswordRequestForm = Depends(), session: AsyncSession = Depends(get_db)):
-    if await UserService.is_account_locked(session, form_data.username):
+    # Per-address limits are applied by the middleware; this one stops guessing spread across many addresses
+    retry_after = await rate_limiter.check(f"account:{form_data.username.lower()}", account_login_limit)
+    if retry_after is not None:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts for this account, please retry later.",
+            headers={"Retry-After": str(retry_after)},
+        )
+    # Password checks are CPU-bound; past the admission limits, answer 503 at once rather than queueing unboundedly
+    try:
+        async with login_admission.admit():
+            user, locked = await UserService.authenticate(session, form_data.username, form_data.password)
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many login attempts in progress, please retry shortly.",
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    if locked:
         raise HTTPException(status_code=400, detail="Account locked due to too many failed login attempts.")
 
-    user = await UserService.login_user(session, form_data.username, form_data.password)
     if user:
-        access_token_expires = timedelta(minutes=settings.access_token_expire_minutes)
-
         access_token = create_access_token(
-            data={"sub": user.email, "role": str(user.role.name)},
-            expires_delta=access_token_expires
+            data={"sub": str(user.id), "role": str(user.role.name)},
+            expires_delta=access_token_lifetime()
         )
+        await RefreshTokenService.purge_expired(session, user.id)
+        refresh_token = await RefreshTokenService.issue(session, user.id)
 
-        return {"access_token": access_token, "token_type": "bearer"}
+        return {"access_token": access_token, "token_type": "bearer", "refresh_token": refresh_token}
     raise HTTPException(status_code=401, detail="Incorrect email or password.")
 
+@router.post("/token/refresh", response_model=TokenResponse, name="refresh_token", tags=["Login and Registration"])
+async def refresh_token(body: RefreshTokenRequest, session: AsyncSession = Depends(get_db)):
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    Each refresh token works once; renewing a session this way needs no password check.
+    """
+    rotated = await RefreshTokenService.rotate(session, body.refresh_token)
+    if rotated is None:
+        raise HTTPException(status_code=401, detail="Invalid or expired refresh token.")
+    user_id, role, new_refresh_token = rotated
+    access_token = create_access_token(data={"sub": str(user_id), "role": role.name}, expires_delta=access_token_lifetime())
+    return {"access_token": access_token, "token_type": "bearer", "refresh_token": new_refresh_token}
+
+@router.post("/logout/", status_code=status.HTTP_204_NO_CONTENT, name="logout", tags=["Login and Registration"])
+async def logout(token: str = Depends(oauth2_scheme), session: AsyncSession = Depends(get_db)):
+    """
+    Revoke the bearer token used for this request. It is rejected everywhere from now until it would have expired,
+    and the user's refresh tokens stop working.
+    """
+    claims = decode_token(token)
+    if claims is None or "jti" not in claims:
+        raise HTTPException(status_code=401, detail="Could not validate credentials", headers={"WWW-Authenticate": "Bearer"})
+    expires_at = datetime.fromtimestamp(claims["exp"], timezone.utc)
+    user_id = claims.get("sub")
+    try:
+        user_id = UUID(user_id) if user_id else None
+    except ValueError:
+        user_id = None
+    await revocation_list.revoke(session, claims["jti"], expires_at, user_id=user_id)
+    if user_id is not None:
+        await RefreshTokenService.revoke_all(session, user_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
 @router.get("/verify-email/{user_id}/{token}", status_code=status.HTTP_200_OK, name="verify_email", tags=["Login and Registration"])
 async def verify_email(user_id: UUID, token: str, db: AsyncSession = Depends(get_db), email_service: EmailService = Depends(get_email_service)):
     if await UserService.verify_email_with_token(db, user_id, token):
@@ -4,6 +4,7 @@ from datetime import datetime
 import uuid
 import re
 from app.models.user_model import UserRole  # Assuming UserRole is imported from your models
+from app.schemas.pagination_schema import PaginationLink
 from app.utils.nickname_gen import generate_nickname  # Assuming nickname generation logic is imported
 
 # Helper function to validate URLs
@@ -79,5 +80,7 @@ class UserListResponse(BaseModel):
         "github_profile_url": "https://github.com/johndoe"
     }])
     total: int = Field(..., example=100)
-    page: int = Field(..., example=1)
+    total_mode: str = Field("exact", example="exact", description="How total was computed: exact, cached or estimate.")
+    page: Optional[int] = Field(None, example=1, description="Page number; not set for cursor pagination.")
     size: int = Field(..., example=10)
+    links: List[PaginationLink] = Field(default=[], description="HATEOAS pagination links.")
@@ -0,0 +1,104 @@
+from builtins import Exception, dict, float, int, isinstance, len, min, str, zip
+import asyncio
+from datetime import timedelta
+import logging
+from typing import List, Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.email_outbox_model import EmailOutbox
+from app.services.email_service import EmailService
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Set by the running worker; notify_outbox() wakes it so new emails go out without waiting for the next poll
+_wakeup: Optional[asyncio.Event] = None
+_stats = {"delivered": 0, "failed_attempts": 0, "parked": 0}
+
+def enqueue_email(session: AsyncSession, email_type: str, recipient: str, context: dict):
+    """Adds an email to the outbox in the session's transaction; it is only sent if that transaction commits."""
+    session.add(EmailOutbox(email_type=email_type, recipient=recipient, context=context))
+
+def notify_outbox():
+    if _wakeup is not None:
+        _wakeup.set()
+
+def retry_delay(attempts: int) -> float:
+    """Exponential backoff: the base delay after the first failure, doubling per attempt up to the maximum."""
+    return min(settings.email_outbox_retry_base_seconds * 2 ** (attempts - 1), settings.email_outbox_retry_max_seconds)
+
+async def claim_batch(session: AsyncSession, batch_size: int, lease_seconds: float) -> List:
+    """
+    Claims up to `batch_size` due emails and commits at once, so no transaction stays open while sending.
+
+    Rows other workers are claiming are skipped rather than waited on (FOR UPDATE SKIP LOCKED). A claim pushes
+    `next_attempt_at` out by the lease and counts the attempt, so if this worker dies mid-send the row becomes
+    due again once the lease lapses, and an email that keeps crashing its sender still runs out of attempts.
+    """
+    due = (
+        select(EmailOutbox.id)
+        .where(EmailOutbox.next_attempt_at <= func.now())
+        .order_by(EmailOutbox.next_attempt_at)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    )
+    query = (
+        update(EmailOutbox)
+        .where(EmailOutbox.id.in_(due.scalar_subquery()))
+        .values(next_attempt_at=func.now() + timedelta(seconds=lease_seconds), attempts=EmailOutbox.attempts + 1)
+        .returning(EmailOutbox.id, EmailOutbox.email_type, EmailOutbox.recipient, EmailOutbox.context, EmailOutbox.attempts)
+        .execution_options(synchronize_session=False)
+    )
+    rows = (await session.execute(query)).all()
+    await session.commit()
+    return rows
+
+async def deliver_batch(session_factory, email_service: EmailService, batch_size: int) -> int:
+    """Claims and sends one batch, deleting delivered rows and rescheduling failed ones. Returns the batch size."""
+    async with session_factory() as session:
+        rows = await claim_batch(session, batch_size, settings.email_outbox_lease_seconds)
+        if not rows:
+            return 0
+        # Sends overlap; the SMTP client's connection pool bounds how many run at once
+        results = await asyncio.gather(
+            *(email_service.send_user_email(row.context, row.email_type) for row in rows), return_exceptions=True
+        )
+        delivered = [row.id for row, result in zip(rows, results) if not isinstance(result, Exception)]
+        if delivered:
+            await session.execute(delete(EmailOutbox).where(EmailOutbox.id.in_(delivered)))
+        for row, result in zip(rows, results):
+            if not isinstance(result, Exception):
+                continue
+            parked = row.attempts >= settings.email_outbox_max_attempts
+            next_attempt_at = None if parked else func.now() + timedelta(seconds=retry_delay(row.attempts))
+            await session.execute(
+                update(EmailOutbox).where(EmailOutbox.id == row.id)
+                .values(next_attempt_at=next_attempt_at, last_error=str(result)[:1000])
+                .execution_options(synchronize_session=False)
+            )
+            _stats["parked" if parked else "failed_attempts"] += 1
+            if parked:
+                logger.error(f"Giving up on {row.email_type} email to {row.recipient} after {row.attempts} attempts: {result}")
+        await session.commit()
+        _stats["delivered"] += len(delivered)
+        return len(rows)
+
+async def run_outbox_worker(session_factory, email_service: EmailService, interval: float, batch_size: int):
+    """Delivers outbox emails until cancelled: batches back to back while busy, then waits for a notification or the poll interval."""
+    global _wakeup
+    _wakeup = asyncio.Event()
+    while True:
+        _wakeup.clear()
+        try:
+            claimed = await deliver_batch(session_factory, email_service, batch_size)
+        except Exception as e:
+            logger.error(f"Email outbox delivery failed: {e}")
+            claimed = 0
+        if claimed < batch_size:
+            try:
+                await asyncio.wait_for(_wakeup.wait(), interval)
+            except asyncio.TimeoutError:
+                pass
+
+def outbox_stats() -> dict:
+    return dict(_stats)
@@ -1,22 +1,49 @@
 # email_service.py
 from builtins import ValueError, dict, str
+from typing import Optional
 from settings.config import settings
 from app.utils.smtp_connection import SMTPClient
 from app.utils.template_manager import TemplateManager
 from app.models.user_model import User
 
-class EmailService:
-    def __init__(self, template_manager: TemplateManager):
+# One client per process, so its pooled SMTP sessions outlive the per-request EmailService instances
+_smtp_client: Optional[SMTPClient] = None
+
+def get_smtp_client() -> Optional[SMTPClient]:
+    global _smtp_client
+    if _smtp_client is None:
         if not settings.smtp_server or not settings.smtp_port or not settings.smtp_username or not settings.smtp_password:
             print("SMTP settings not configured. Email service will not work.")
-            self.smtp_client = None
-        else:
-            self.smtp_client = SMTPClient(
-                server=settings.smtp_server,
-                port=settings.smtp_port,
-                username=settings.smtp_username,
-                password=settings.smtp_password
-            )
+            return None
+        _smtp_client = SMTPClient(
+            server=settings.smtp_server,
+            port=settings.smtp_port,
+            username=settings.smtp_username,
+            password=settings.smtp_password,
+            pool_size=settings.smtp_pool_size,
+            timeout=settings.smtp_timeout_seconds,
+            idle_timeout=settings.smtp_idle_timeout_seconds,
+            starttls=settings.smtp_starttls,
+        )
+    return _smtp_client
+
+async def close_smtp_client():
+    global _smtp_client
+    if _smtp_client is not None:
+        await _smtp_client.close()
+        _smtp_client = None
+
+def verification_email_context(user: User) -> dict:
+    """Template values for a user's verification email."""
+    return {
+        "name": user.first_name,
+        "verification_url": f"{settings.server_base_url}verify-email/{user.id}/{user.verification_token}",
+        "email": user.email
+    }
+
+class EmailService:
+    def __init__(self, template_manager: TemplateManager):
+        self.smtp_client = get_smtp_client()
         self.template_manager = template_manager
 
     async def send_user_email(self, user_data: dict, email_type: str):
@@ -33,17 +60,12 @@ class EmailService:
             raise ValueError("Invalid email type")
 
         html_content = self.template_manager.render_template(email_type, **user_data)
-        self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
+        await self.smtp_client.send_email(subject_map[email_type], html_content, user_data['email'])
 
     async def send_verification_email(self, user: User):
         if not self.smtp_client:
             return
-        verification_url = f"{settings.server_base_url}verify-email/{user.id}/{user.verification_token}"
-        await self.send_user_email({
-            "name": user.first_name,
-            "verification_url": verification_url,
-            "email": user.email
-        }, 'email_verification')
+        await self.send_user_email(verification_email_context(user), 'email_verification')
 
     async def send_profile_upgrade_email(self, user: User):
         """
@@ -1,9 +1,66 @@
 # app/services/jwt_service.py
-from builtins import dict, str
+from builtins import Exception, bool, dict, float, max, min, str
+import asyncio
+import logging
+import time
 import jwt
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+from uuid import uuid4
+from app.services.key_ring import ASYMMETRIC_ALGORITHMS, KeyRing
+from app.services.token_revocation import revocation_list
+from app.utils.cache import TTLCache
 from settings.config import settings
 
+logger = logging.getLogger(__name__)
+
+# Verified token -> claims. Entries never outlive the token's `exp`, and are capped at a configured TTL.
+_decode_cache = TTLCache(max_size=settings.jwt_decode_cache_max_size, ttl=settings.jwt_decode_cache_max_ttl_seconds)
+# Number of signature verifications performed and the time they took, to estimate what cache hits save
+_verifications = {"count": 0, "seconds": 0.0}
+
+# Asymmetric signing keys, loaded on first use when jwt_algorithm is EdDSA or RS256
+_key_ring: Optional[KeyRing] = None
+
+def get_key_ring() -> KeyRing:
+    """Loads the signing key ring and brings it up to date; run_key_maintenance keeps it so afterwards."""
+    global _key_ring
+    if _key_ring is None:
+        longest_lifetime = max(settings.access_token_expire_minutes, settings.stateless_access_token_expire_minutes) * 60
+        key_ring = KeyRing(settings.jwt_keys_dir, settings.jwt_algorithm, publish_ahead=settings.jwks_max_age_seconds, retain=longest_lifetime)
+        key_ring.load()
+        key_ring.maintain(settings.jwt_key_rotation_days * 86400)
+        _key_ring = key_ring
+    return _key_ring
+
+async def run_key_maintenance(interval: float):
+    """Rotates in new signing keys and retires expired ones for as long as the process runs."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            # File locking, disk I/O and key generation block, so they run off the event loop
+            await asyncio.to_thread(get_key_ring().maintain, settings.jwt_key_rotation_days * 86400)
+        except Exception as e:
+            logger.error(f"Signing key maintenance failed: {e}")
+
+def public_jwks() -> dict:
+    """Public keys other services can verify our tokens with; empty when tokens are signed with a shared secret."""
+    if settings.jwt_algorithm not in ASYMMETRIC_ALGORITHMS:
+        return {"keys": []}
+    return get_key_ring().jwks()
+
+def _verification_key(token: str):
+    if settings.jwt_algorithm not in ASYMMETRIC_ALGORITHMS:
+        return settings.jwt_secret_key
+    kid = jwt.get_unverified_header(token).get("kid")
+    return get_key_ring().public_key(kid) if kid else None
+
+def access_token_lifetime() -> timedelta:
+    """Lifetime of new access tokens. Stateless mode issues shorter-lived tokens, since they are never re-checked against the database."""
+    if settings.auth_mode == "stateless":
+        return timedelta(minutes=settings.stateless_access_token_expire_minutes)
+    return timedelta(minutes=settings.access_token_expire_minutes)
+
 def create_access_token(*, data: dict, expires_delta: timedelta = None):
     """
     Create an access token with user data, including profile information like role and status.
@@ -22,27 +79,71 @@ def create_access_token(*, data: dict, expires_delta: timedelta = None):
     if 'status' in to_encode:
         to_encode['status'] = to_encode['status'].upper()
 
-    # Set token expiration time
-    expire = datetime.utcnow() + (expires_delta if expires_delta else timedelta(minutes=settings.access_token_expire_minutes))
-    to_encode.update({"exp": expire})
+    # Set issue and expiration times; jti identifies this token to the principal cache.
+    # iat keeps sub-second precision so revocations can tell tokens issued within the same second apart.
+    issued_at = datetime.now(timezone.utc)
+    expire = issued_at + (expires_delta if expires_delta else access_token_lifetime())
+    to_encode.update({"exp": expire, "iat": issued_at.timestamp()})
+    to_encode.setdefault("jti", uuid4().hex)
     
-    # Encode JWT token
+    # Encode JWT token; asymmetric tokens name their key in the `kid` header
+    if settings.jwt_algorithm in ASYMMETRIC_ALGORITHMS:
+        key = get_key_ring().signing_key()
+        return jwt.encode(to_encode, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid})
     encoded_jwt = jwt.encode(to_encode, settings.jwt_secret_key, algorithm=settings.jwt_algorithm)
     return encoded_jwt
 
 def decode_token(token: str):
     """
     Decode the JWT token and extract user data.
+
+    Tokens that verify are remembered, so a token reused across requests is only verified once.
+    Tokens whose `jti` is on the revocation list are rejected.
     
     :param token: JWT token to decode.
     :return: Decoded data (if valid), None otherwise.
     """
+    if settings.jwt_decode_cache_enabled:
+        cached = _decode_cache.get(token)
+        # The entry's TTL is measured on the monotonic clock; re-check `exp` against wall time as well
+        if cached is not None and cached.get("exp", float("inf")) > time.time():
+            return None if _is_revoked(cached) else dict(cached)
+    start = time.perf_counter()
     try:
         # Decode the JWT and check for expiration
-        decoded = jwt.decode(token, settings.jwt_secret_key, algorithms=[settings.jwt_algorithm])
-        return decoded
+        key = _verification_key(token)
+        if key is None:
+            return None
+        decoded = jwt.decode(token, key, algorithms=[settings.jwt_algorithm])
     except jwt.PyJWTError:
         return None
+    finally:
+        _verifications["count"] += 1
+        _verifications["seconds"] += time.perf_counter() - start
+    if settings.jwt_decode_cache_enabled:
+        ttl = settings.jwt_decode_cache_max_ttl_seconds
+        if "exp" in decoded:
+            ttl = min(ttl, decoded["exp"] - time.time())
+        if ttl > 0:
+            _decode_cache.set(token, dict(decoded), ttl)
+    return None if _is_revoked(decoded) else decoded
+
+def _is_revoked(claims: dict) -> bool:
+    return "jti" in claims and revocation_list.is_revoked(claims["jti"])
+
+def decode_cache_stats() -> dict:
+    """Verified-token cache counters, with the average verification cost and the time hits have saved."""
+    stats = _decode_cache.stats()
+    avg_verify_ms = _verifications["seconds"] / _verifications["count"] * 1000 if _verifications["count"] else 0.0
+    return {
+        **stats,
+        "verifications": _verifications["count"],
+        "avg_verify_ms": avg_verify_ms,
+        "estimated_saved_ms": stats["hits"] * avg_verify_ms,
+    }
+
+def clear_decode_cache():
+    _decode_cache.clear()
 
 def is_user_admin(decoded_token: dict) -> bool:
     """
@@ -0,0 +1,203 @@
+from builtins import BlockingIOError, FileNotFoundError, bool, dict, float, len, max, open, sorted, str, zip
+import base64
+from contextlib import contextmanager
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, Optional
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import OKPAlgorithm, RSAAlgorithm
+
+logger = logging.getLogger(__name__)
+
+ASYMMETRIC_ALGORITHMS = ("EdDSA", "RS256")
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+class SigningKey:
+    """A private key with its parsed public half, `kid` and public JWK."""
+
+    def __init__(self, private_key, algorithm: str, created_at: float):
+        self.private_key = private_key
+        self.public_key = private_key.public_key()
+        self.algorithm = algorithm
+        self.created_at = created_at
+        converter = OKPAlgorithm if algorithm == "EdDSA" else RSAAlgorithm
+        jwk = converter.to_jwk(self.public_key, as_dict=True)
+        # RFC 7638 thumbprint: hash of the required members, serialized canonically
+        required = {name: jwk[name] for name in ("crv", "e", "kty", "n", "x") if name in jwk}
+        self.kid = _b64url(hashlib.sha256(json.dumps(required, sort_keys=True, separators=(",", ":")).encode()).digest())
+        self.jwk = {**jwk, "kid": self.kid, "alg": algorithm, "use": "sig"}
+
+    @classmethod
+    def generate(cls, algorithm: str) -> "SigningKey":
+        if algorithm == "EdDSA":
+            private_key = ed25519.Ed25519PrivateKey.generate()
+        else:
+            private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        return cls(private_key, algorithm, time.time())
+
+    def private_pem(self) -> bytes:
+        return self.private_key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        )
+
+class KeyRing:
+    """
+    The asymmetric keys tokens are signed and verified with, stored as `<kid>.pem` files in one directory.
+
+    A new key is published (in the JWKS) for `publish_ahead` seconds before it starts signing, so verifiers
+    holding a cached JWKS already know it; older keys keep verifying until every token they signed has expired.
+    Workers sharing the directory re-read it at most every `reload_interval` seconds before signing or serving
+    the JWKS, and at once when they meet a `kid` they do not know. Rotation and pruning take a lock file in the
+    directory, so only one worker at a time changes it. `maintain` may run on another thread than the one signing,
+    so the key map is replaced rather than changed in place.
+    """
+
+    def __init__(self, directory: str, algorithm: str, publish_ahead: float = 0.0, retain: float = 0.0,
+                 reload_interval: float = 1.0):
+        self.directory = directory
+        self.algorithm = algorithm
+        self.publish_ahead = publish_ahead
+        self.retain = retain
+        self.reload_interval = reload_interval
+        self._keys: Dict[str, SigningKey] = {}
+        self._jwks: Optional[dict] = None
+        self._last_reload = 0.0
+
+    def load(self):
+        """Reads the keys in the directory, creating the directory and a first key if there are none."""
+        os.makedirs(self.directory, exist_ok=True)
+        self._scan()
+        if not self._keys:
+            with self._lock():
+                # Workers starting together must not each create a first key
+                self._scan()
+                if not self._keys:
+                    self.rotate()
+
+    def _scan(self):
+        # Only files not seen before are parsed; keys whose files are gone are dropped
+        keys = {}
+        for name in sorted(os.listdir(self.directory)):
+            if not name.endswith(".pem"):
+                continue
+            key = self._keys.get(name[:-len(".pem")])
+            if key is None:
+                path = os.path.join(self.directory, name)
+                try:
+                    with open(path, "rb") as pem:
+                        private_key = serialization.load_pem_private_key(pem.read(), password=None)
+                    key = SigningKey(private_key, self.algorithm, os.path.getmtime(path))
+                except FileNotFoundError:
+                    continue  # retired by another worker meanwhile
+            keys[key.kid] = key
+        if keys.keys() != self._keys.keys():
+            self._jwks = None
+        self._keys = keys
+        self._last_reload = time.time()
+
+    def refresh(self):
+        """Re-reads the directory if it was last read more than `reload_interval` seconds ago."""
+        if time.time() - self._last_reload > self.reload_interval:
+            self.load()
+
+    @contextmanager
+    def _lock(self, blocking: bool = True):
+        """Holds the directory's lock file; yields False instead of waiting if not blocking and it is taken."""
+        descriptor = os.open(os.path.join(self.directory, ".lock"), os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(descriptor, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                yield False
+                return
+            yield True
+        finally:
+            os.close(descriptor)  # releases the lock
+
+    def _store(self, key: SigningKey):
+        path = os.path.join(self.directory, f"{key.kid}.pem")
+        # Written under a temporary name and renamed into place, so other workers never read a partial key
+        temporary = f"{path}.tmp"
+        # Exclusive create with owner-only permissions; the key is never overwritten
+        descriptor = os.open(temporary, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "wb") as pem:
+            pem.write(key.private_pem())
+        os.utime(temporary, (key.created_at, key.created_at))
+        os.rename(temporary, path)
+
+    def rotate(self) -> SigningKey:
+        """Adds a new key. It signs once it has been published for `publish_ahead` seconds, or at once if it is the only key."""
+        key = SigningKey.generate(self.algorithm)
+        self._store(key)
+        self._keys = {**self._keys, key.kid: key}
+        self._jwks = None
+        logger.info(f"Generated signing key {key.kid}")
+        return key
+
+    def maintain(self, rotate_after: float) -> bool:
+        """
+        Rotates in a new key once the newest is older than `rotate_after` seconds, then retires expired ones.
+
+        Runs under the directory's lock, after re-reading it, so a key another worker just added counts as the
+        newest and every worker together rotates once per period. While another worker holds the lock this
+        returns False at once; its changes are picked up on the next reload.
+        """
+        with self._lock(blocking=False) as locked:
+            if not locked:
+                return False
+            self._scan()
+            if not self._keys or self.newest_age() > rotate_after:
+                self.rotate()
+            self.prune()
+        return True
+
+    def signing_key(self) -> SigningKey:
+        """The newest key that has been published long enough, or the oldest key while none has."""
+        self.refresh()
+        now = time.time()
+        keys = sorted(self._keys.values(), key=lambda key: key.created_at)
+        ready = [key for key in keys if key.created_at + self.publish_ahead <= now]
+        return ready[-1] if ready else keys[0]
+
+    def public_key(self, kid: str):
+        """Parsed public key for a `kid`, re-reading the directory (at most every `reload_interval`) for unknown ones."""
+        key = self._keys.get(kid)
+        if key is None:
+            self.refresh()
+            key = self._keys.get(kid)
+        return key.public_key if key is not None else None
+
+    def prune(self):
+        """Deletes keys that stopped signing longer ago than any token they signed can live."""
+        active = self.signing_key()
+        now = time.time()
+        keys = sorted(self._keys.values(), key=lambda key: key.created_at)
+        for older, newer in zip(keys, keys[1:]):
+            if older is not active and newer.created_at <= active.created_at and newer.created_at + self.publish_ahead + self.retain < now:
+                self._keys = {kid: key for kid, key in self._keys.items() if kid != older.kid}
+                try:
+                    os.remove(os.path.join(self.directory, f"{older.kid}.pem"))
+                except FileNotFoundError:
+                    pass
+                self._jwks = None
+                logger.info(f"Retired signing key {older.kid}")
+
+    def jwks(self) -> dict:
+        """The public keys as a JWK Set; built once per change to the ring."""
+        self.refresh()
+        if self._jwks is None:
+            self._jwks = {"keys": [key.jwk for key in sorted(self._keys.values(), key=lambda key: key.created_at)]}
+        return self._jwks
+
+    def newest_age(self) -> float:
+        return time.time() - max(key.created_at for key in self._keys.values())
+
+    def __len__(self) -> int:
+        return len(self._keys)
@@ -0,0 +1,62 @@
+from builtins import dict, len, list, set, str
+from typing import Dict, Hashable, Optional, Set
+from app.schemas.token_schema import TokenPrincipal
+from app.utils.cache import TTLCache
+from settings.config import settings
+
+def principal_key(claims: dict) -> Optional[Hashable]:
+    """Cache key for a token: its `jti`, or subject plus issued-at for tokens minted without one."""
+    if claims.get("jti"):
+        return ("jti", claims["jti"])
+    if claims.get("sub") and claims.get("iat"):
+        return ("sub", claims["sub"], claims["iat"])
+    return None
+
+class PrincipalCache:
+    """
+    Short-lived cache of the principal each bearer token resolves to.
+
+    Entries are indexed by user so a role change or lock can drop every cached token of that user at once.
+    The cache is per process: other workers pick up a change when their entries expire, which bounds
+    staleness by the TTL.
+    """
+
+    def __init__(self, max_size: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._principals = TTLCache(max_size=max_size, ttl=ttl)
+        self._keys_by_user: Dict[str, Set[Hashable]] = {}
+
+    def get(self, key: Hashable) -> Optional[TokenPrincipal]:
+        return self._principals.get(key) if self.enabled else None
+
+    def set(self, key: Hashable, principal: TokenPrincipal):
+        if not self.enabled:
+            return
+        self._principals.set(key, principal)
+        self._keys_by_user.setdefault(str(principal.user_id), set()).add(key)
+        # Expired and evicted entries leave their keys behind in the index; sweep once it outgrows the cache
+        if len(self._keys_by_user) > 2 * self._principals.max_size:
+            self._prune()
+
+    def invalidate_user(self, user_id):
+        for key in self._keys_by_user.pop(str(user_id), ()):
+            self._principals.pop(key)
+
+    def _prune(self):
+        for user_id, keys in list(self._keys_by_user.items()):
+            keys.intersection_update([key for key in keys if key in self._principals])
+            if not keys:
+                del self._keys_by_user[user_id]
+
+    def clear(self):
+        self._principals.clear()
+        self._keys_by_user.clear()
+
+    def stats(self) -> dict:
+        return {**self._principals.stats(), "users": len(self._keys_by_user)}
+
+principal_cache = PrincipalCache(
+    max_size=settings.principal_cache_max_size,
+    ttl=settings.principal_cache_ttl_seconds,
+    enabled=settings.principal_cache_enabled,
+)
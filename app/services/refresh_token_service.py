@@ -0,0 +1,61 @@
+from builtins import classmethod, str
+from datetime import datetime, timedelta, timezone
+import hashlib
+import secrets
+from typing import Optional, Tuple
+from uuid import UUID
+from sqlalchemy import delete, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.token_model import RefreshToken
+from app.models.user_model import User, UserRole
+from settings.config import settings
+
+class RefreshTokenService:
+    """Issues and rotates single-use refresh tokens, so sessions can be renewed without re-checking passwords."""
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        # Tokens are 256 random bits, so an unsalted digest is enough to make a leaked table useless
+        return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+    @classmethod
+    async def issue(cls, session: AsyncSession, user_id: UUID) -> str:
+        """Stores a new refresh token for the user and returns it. Committing is left to the caller."""
+        token = secrets.token_urlsafe(32)
+        expires_at = datetime.now(timezone.utc) + timedelta(minutes=settings.refresh_token_expire_minutes)
+        session.add(RefreshToken(token_hash=cls._hash(token), user_id=user_id, expires_at=expires_at))
+        await session.flush()
+        return token
+
+    @classmethod
+    async def purge_expired(cls, session: AsyncSession, user_id: UUID):
+        """Deletes a user's refresh tokens that expired without being used."""
+        await session.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id, RefreshToken.expires_at <= func.now()))
+
+    @classmethod
+    async def revoke_all(cls, session: AsyncSession, user_id: UUID):
+        """Deletes every refresh token the user holds, so no session of theirs can be renewed. Committing is left to the caller."""
+        await session.execute(delete(RefreshToken).where(RefreshToken.user_id == user_id))
+
+    @classmethod
+    async def rotate(cls, session: AsyncSession, token: str) -> Optional[Tuple[UUID, UserRole, str]]:
+        """
+        Exchanges a refresh token for a new one.
+
+        The presented token is consumed by one DELETE ... USING users ... RETURNING on its indexed hash, which also
+        reads the owner's current role and lock state, so a token can never be exchanged twice and renewal needs
+        no password check. Returns (user_id, role, new refresh token), or None for an unknown, used or expired
+        token or a locked account.
+        """
+        tokens, users = RefreshToken.__table__, User.__table__
+        # A Core DELETE: the ORM form cannot RETURN columns of the joined users table
+        query = (
+            delete(tokens)
+            .where(tokens.c.token_hash == cls._hash(token), tokens.c.user_id == users.c.id)
+            .returning(tokens.c.user_id, tokens.c.expires_at, users.c.role, users.c.is_locked)
+        )
+        row = (await session.execute(query)).first()
+        if row is None or row.expires_at <= datetime.now(timezone.utc) or row.is_locked:
+            return None
+        new_token = await cls.issue(session, row.user_id)
+        return row.user_id, row.role, new_token
@@ -0,0 +1,193 @@
+from builtins import Exception, bool, dict, float, len, max, str
+import asyncio
+from datetime import datetime, timedelta, timezone
+import heapq
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database import Database
+from app.models.token_model import RevokedToken, UserTokenRevocation
+from app.utils.bloom import BloomFilter
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+def _longest_token_lifetime_seconds() -> float:
+    return max(settings.access_token_expire_minutes, settings.stateless_access_token_expire_minutes) * 60
+
+def is_revoked(claims: dict) -> bool:
+    """Whether the token was issued before its subject's tokens were last revoked."""
+    return revocation_list.is_user_revoked(str(claims.get("sub")), claims.get("iat", 0))
+
+def clear_revocations():
+    revocation_list.clear()
+
+# Rows are re-read this far behind the newest one seen, so a revocation committed slightly out of order is not skipped
+SYNC_OVERLAP = timedelta(seconds=10)
+
+class RevocationList:
+    """
+    In-memory copy of the revoked_tokens table, keyed by `jti`, and of the user_token_revocations table.
+
+    A Bloom filter answers the common "not revoked" case without touching the exact set; only filter hits
+    (real revocations and rare false positives) consult the set of jti -> expiry. Entries leave the set once
+    the token would have expired anyway, and the filter is rebuilt when too many purged ids linger in it.
+    Per-user revocations map user_id -> (revoked_before, expiry) and are likewise kept until their expiry,
+    never evicted earlier, so a revoked token cannot come back into use.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001, clock: Callable[[], float] = time.time):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self._clock = clock
+        self._expires: Dict[str, float] = {}
+        self._expiry_heap: List[Tuple[float, str]] = []
+        self._revoked_before: Dict[str, Tuple[float, float]] = {}
+        self._bloom = BloomFilter(capacity, error_rate)
+        self._synced_until: Optional[datetime] = None
+        self.checks = 0
+        self.filter_rejections = 0
+        self.false_positives = 0
+
+    def add(self, jti: str, expires_at: float):
+        if expires_at <= self._clock():
+            return
+        if jti in self._expires:
+            return
+        self._expires[jti] = expires_at
+        heapq.heappush(self._expiry_heap, (expires_at, jti))
+        self._bloom.add(jti)
+        if self._bloom.count > self._bloom.capacity:
+            self._rebuild()
+
+    def add_user(self, user_id: str, revoked_before: float, expires_at: float):
+        if expires_at <= self._clock():
+            return
+        current = self._revoked_before.get(user_id)
+        if current is None or current[0] < revoked_before:
+            self._revoked_before[user_id] = (revoked_before, expires_at)
+
+    def is_user_revoked(self, user_id: str, issued_at: float) -> bool:
+        entry = self._revoked_before.get(user_id)
+        return entry is not None and issued_at < entry[0] and entry[1] > self._clock()
+
+    def is_revoked(self, jti: str) -> bool:
+        self.checks += 1
+        if jti not in self._bloom:
+            self.filter_rejections += 1
+            return False
+        expires_at = self._expires.get(jti)
+        if expires_at is None:
+            self.false_positives += 1
+            return False
+        return expires_at > self._clock()
+
+    def purge(self):
+        """Drops entries whose tokens have expired."""
+        now = self._clock()
+        while self._expiry_heap and self._expiry_heap[0][0] <= now:
+            _, jti = heapq.heappop(self._expiry_heap)
+            self._expires.pop(jti, None)
+        expired_users = [user_id for user_id, (_, expires_at) in self._revoked_before.items() if expires_at <= now]
+        for user_id in expired_users:
+            del self._revoked_before[user_id]
+        # Purged ids still set bits; rebuild once they outnumber the live ones to keep false positives rare
+        if self._bloom.count > 2 * len(self._expires) and self._bloom.count > self.capacity // 2:
+            self._rebuild()
+
+    def _rebuild(self):
+        self._bloom = BloomFilter(max(self.capacity, 2 * len(self._expires)), self.error_rate)
+        for jti in self._expires:
+            self._bloom.add(jti)
+
+    def clear(self):
+        self._expires.clear()
+        self._expiry_heap.clear()
+        self._revoked_before.clear()
+        self._bloom = BloomFilter(self.capacity, self.error_rate)
+        self._synced_until = None
+
+    async def revoke(self, session: AsyncSession, jti: str, expires_at: datetime, user_id=None):
+        """
+        Records a revocation in the table, so every worker picks it up once the caller commits, and applies it
+        locally at once.
+        """
+        query = pg_insert(RevokedToken).values(jti=jti, user_id=user_id, expires_at=expires_at).on_conflict_do_nothing()
+        await session.execute(query)
+        self.add(jti, expires_at.timestamp())
+
+    async def revoke_user(self, session: AsyncSession, user_id):
+        """
+        Revokes every token issued to the user up to now; tokens issued afterwards are unaffected. Recorded in
+        the table like `revoke`, so every worker and restart picks it up once the caller commits.
+        """
+        revoked_before = self._clock()
+        expires_at = revoked_before + _longest_token_lifetime_seconds()
+        values = dict(
+            user_id=user_id,
+            revoked_before=datetime.fromtimestamp(revoked_before, timezone.utc),
+            expires_at=datetime.fromtimestamp(expires_at, timezone.utc),
+        )
+        query = pg_insert(UserTokenRevocation).values(**values)
+        # A later revocation supersedes the row; bumping revoked_at makes the next sync pick it up again
+        query = query.on_conflict_do_update(
+            index_elements=[UserTokenRevocation.user_id],
+            set_=dict(revoked_before=query.excluded.revoked_before, expires_at=query.excluded.expires_at, revoked_at=func.now()),
+        )
+        await session.execute(query)
+        self.add_user(str(user_id), revoked_before, expires_at)
+
+    async def sync(self, session: AsyncSession):
+        """Loads revocations recorded since the last sync, then purges expired entries and table rows."""
+        # Read from the primary: a replica lagging by more than SYNC_OVERLAP would let revocations slip past the window
+        Database.use_primary(session)
+        since = self._synced_until - SYNC_OVERLAP if self._synced_until is not None else None
+        query = select(RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at).where(RevokedToken.expires_at > func.now())
+        if since is not None:
+            query = query.where(RevokedToken.revoked_at > since)
+        for row in (await session.execute(query)).all():
+            self.add(row.jti, row.expires_at.timestamp())
+            self._advance(row.revoked_at)
+        query = (
+            select(UserTokenRevocation.user_id, UserTokenRevocation.revoked_before, UserTokenRevocation.expires_at,
+                   UserTokenRevocation.revoked_at)
+            .where(UserTokenRevocation.expires_at > func.now())
+        )
+        if since is not None:
+            query = query.where(UserTokenRevocation.revoked_at > since)
+        for row in (await session.execute(query)).all():
+            self.add_user(str(row.user_id), row.revoked_before.timestamp(), row.expires_at.timestamp())
+            self._advance(row.revoked_at)
+        await session.execute(delete(RevokedToken).where(RevokedToken.expires_at <= func.now()))
+        await session.execute(delete(UserTokenRevocation).where(UserTokenRevocation.expires_at <= func.now()))
+        await session.commit()
+        self.purge()
+
+    def _advance(self, revoked_at: datetime):
+        if self._synced_until is None or revoked_at > self._synced_until:
+            self._synced_until = revoked_at
+
+    def stats(self) -> dict:
+        return {
+            "revoked": len(self._expires),
+            "revoked_users": len(self._revoked_before),
+            "checks": self.checks,
+            "filter_rejections": self.filter_rejections,
+            "false_positives": self.false_positives,
+            "filter_bits": self._bloom.size_bits,
+        }
+
+revocation_list = RevocationList(capacity=settings.revocation_filter_capacity, error_rate=settings.revocation_filter_error_rate)
+
+async def run_revocation_sync(session_factory, interval: float):
+    """Keeps the in-memory revocation list in step with the revoked_tokens table."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            async with session_factory() as session:
+                await revocation_list.sync(session)
+        except Exception as e:
+            logger.error(f"Revocation sync failed: {e}")
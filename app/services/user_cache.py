@@ -0,0 +1,166 @@
+from builtins import TypeError, bool, bytes, dict, int, isinstance, len, range, str, type
+from datetime import datetime, timedelta, timezone
+from enum import Enum
+import struct
+from typing import Any, Dict, Optional, Tuple
+from uuid import UUID
+from sqlalchemy import inspect
+from app.models.user_model import User
+from app.utils.cache import CacheBackend
+
+# Bump whenever the encoding or CACHED_COLUMNS change; it is part of every key, so old entries are never read
+ROW_FORMAT_VERSION = 1
+# Columns a plain user lookup loads; deferred credential columns are never cached
+CACHED_COLUMNS = tuple(attr.key for attr in User.__mapper__.column_attrs if not attr.deferred)
+
+_HEADER = struct.Struct(">BQH")  # format version, generation, column count
+_INT = struct.Struct(">q")
+_LENGTH = struct.Struct(">H")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_NONE, _TRUE, _FALSE, _INTEGER, _STRING, _DATETIME, _UUID, _ENUM = range(8)
+
+def _encode_value(value: Any) -> bytes:
+    if value is None:
+        return bytes((_NONE,))
+    if isinstance(value, bool):
+        return bytes((_TRUE if value else _FALSE,))
+    if isinstance(value, int):
+        return bytes((_INTEGER,)) + _INT.pack(value)
+    if isinstance(value, Enum):
+        value = value.name.encode("utf-8")
+        return bytes((_ENUM,)) + _LENGTH.pack(len(value)) + value
+    if isinstance(value, str):
+        value = value.encode("utf-8")
+        return bytes((_STRING,)) + _LENGTH.pack(len(value)) + value
+    if isinstance(value, datetime):
+        if value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return bytes((_DATETIME,)) + _INT.pack((value - _EPOCH) // timedelta(microseconds=1))
+    if isinstance(value, UUID):
+        return bytes((_UUID,)) + value.bytes
+    raise TypeError(f"Cannot encode {type(value).__name__} in a cached user row")
+
+def encode_user_row(values: Dict[str, Any], generation: int) -> bytes:
+    """
+    Packs a user's column values into a compact tagged binary record.
+
+    Each value is a one-byte type tag followed by a fixed-width or length-prefixed payload, in CACHED_COLUMNS
+    order, so column names are never stored. Datetimes are kept as UTC microseconds since the epoch.
+    """
+    parts = [_HEADER.pack(ROW_FORMAT_VERSION, generation, len(CACHED_COLUMNS))]
+    parts.extend(_encode_value(values[key]) for key in CACHED_COLUMNS)
+    return b"".join(parts)
+
+def decode_user_row(data: bytes) -> Optional[Tuple[Dict[str, Any], int]]:
+    """Unpacks a record from encode_user_row into (values, generation); None if it was written in another format."""
+    version, generation, count = _HEADER.unpack_from(data)
+    if version != ROW_FORMAT_VERSION or count != len(CACHED_COLUMNS):
+        return None
+    offset = _HEADER.size
+    values = {}
+    for key in CACHED_COLUMNS:
+        tag = data[offset]
+        offset += 1
+        if tag == _NONE:
+            value = None
+        elif tag in (_TRUE, _FALSE):
+            value = tag == _TRUE
+        elif tag == _INTEGER:
+            value = _INT.unpack_from(data, offset)[0]
+            offset += _INT.size
+        elif tag == _DATETIME:
+            value = _EPOCH + timedelta(microseconds=_INT.unpack_from(data, offset)[0])
+            offset += _INT.size
+        elif tag == _UUID:
+            value = UUID(bytes=data[offset:offset + 16])
+            offset += 16
+        else:
+            length = _LENGTH.unpack_from(data, offset)[0]
+            offset += _LENGTH.size
+            value = data[offset:offset + length].decode("utf-8")
+            offset += length
+            if tag == _ENUM:
+                value = User.__table__.c[key].type.enum_class[value]
+        values[key] = value
+    return values, generation
+
+class UserCache:
+    """
+    Cache of user rows keyed by id, with email -> id pointers, over any CacheBackend.
+
+    Invalidation is versioned: every user has a generation counter that writes increment. A row is stored
+    together with the generation that was current *before* it was read from the database, and a cached row is
+    only served while its generation still matches. A reader that raced with a write therefore cannot leave a
+    stale row behind, even when the cache is shared between worker processes. The generation and the row are
+    fetched in a single pipelined multi-get.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float, enabled: bool = True):
+        self.backend = backend
+        self.ttl = ttl
+        self.enabled = enabled
+        self.prefix = f"user:v{ROW_FORMAT_VERSION}"
+        self.hits = 0
+        self.misses = 0
+
+    def _row_key(self, user_id) -> str:
+        return f"{self.prefix}:row:{user_id}"
+
+    def _generation_key(self, user_id) -> str:
+        return f"{self.prefix}:gen:{user_id}"
+
+    def _email_key(self, email: str) -> str:
+        return f"{self.prefix}:email:{email}"
+
+    async def get(self, user_id) -> Tuple[Optional[Dict[str, Any]], int]:
+        """
+        Returns the cached column values of a user (None on a miss) and the user's current generation.
+        Pass the generation to `store` after loading the row from the database.
+        """
+        generation, row = await self.backend.get_many([self._generation_key(user_id), self._row_key(user_id)])
+        generation = int(generation) if generation is not None else 0
+        decoded = decode_user_row(row) if row is not None else None
+        if decoded is not None and decoded[1] == generation:
+            self.hits += 1
+            return decoded[0], generation
+        self.misses += 1
+        return None, generation
+
+    async def get_user_id(self, email: str) -> Optional[str]:
+        user_id = (await self.backend.get_many([self._email_key(email)]))[0]
+        return user_id.decode("ascii") if user_id is not None else None
+
+    async def store(self, user: User, generation: Optional[int]):
+        """
+        Caches a freshly loaded user under the generation read before loading it. Without a known generation
+        only the email pointer is stored; the row is cached by the next lookup by id.
+        """
+        if inspect(user).unloaded.intersection(CACHED_COLUMNS):
+            return
+        items = {self._email_key(user.email): str(user.id).encode("ascii")}
+        if generation is not None:
+            values = {key: getattr(user, key) for key in CACHED_COLUMNS}
+            items[self._row_key(user.id)] = encode_user_row(values, generation)
+        await self.backend.set_many(items, self.ttl)
+
+    async def invalidate(self, user_id):
+        """Moves the user to a new generation and drops the stored row."""
+        # The counter outlives any row stored under an older generation, so an expired counter cannot revive one
+        await self.backend.incr(self._generation_key(user_id), self.ttl * 2)
+        await self.backend.delete([self._row_key(user_id)])
+
+    async def clear(self):
+        await self.backend.clear(f"{self.prefix}:")
+
+    async def close(self):
+        await self.backend.close()
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            **self.backend.stats(),
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
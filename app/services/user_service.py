@@ -1,30 +1,80 @@
-from builtins import Exception, bool, classmethod, int, str
+from builtins import Exception, bool, classmethod, int, str, zip
 from datetime import datetime, timezone
+from functools import lru_cache
 import secrets
-from typing import Optional, Dict, List
-from pydantic import ValidationError
-from sqlalchemy import func, update, select
-from sqlalchemy.exc import SQLAlchemyError
+import time
+from typing import Optional, Dict, List, Tuple, Type
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import delete, func, or_, update, select, text, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, make_transient_to_detached, undefer
+from sqlalchemy.orm.attributes import set_committed_value
+from app.database import Database
 from app.dependencies import get_email_service, get_settings
 from app.models.user_model import User
-from app.schemas.user_schemas import UserCreate, UserUpdate
+from app.schemas.user_schemas import UserCreate, UserResponse, UserUpdate
+from app.services.principal_cache import principal_cache
+from app.services.refresh_token_service import RefreshTokenService
+from app.services.token_revocation import clear_revocations, revocation_list
+from app.services.user_cache import UserCache
 from app.utils.nickname_gen import generate_nickname
-from app.utils.security import generate_verification_token, hash_password, verify_password
+from app.utils.cache import create_cache_backend
+from app.utils.cursor import NEXT, PREV
+from app.utils.security import generate_verification_token, hash_password_async, password_needs_rehash, verify_password_async
 from uuid import UUID
-from app.services.email_service import EmailService
+from app.services.email_outbox import enqueue_email, notify_outbox
+from app.services.email_service import EmailService, verification_email_context
 from app.models.user_model import UserRole
 import logging
 
 settings = get_settings()
 logger = logging.getLogger(__name__)
 
+# Strategies for computing list totals, also reported back to clients as the mode that produced the total
+COUNT_EXACT = "exact"
+COUNT_CACHED = "cached"
+COUNT_ESTIMATE = "estimate"
+
+class DuplicateUserError(Exception):
+    """Raised when a new user's email or nickname is already taken; `field` names which."""
+
+    def __init__(self, field: str):
+        super().__init__(f"{field.capitalize()} already exists")
+        self.field = field
+
+@lru_cache(maxsize=None)
+def projection_for(schema: Type[BaseModel]):
+    """
+    Loader option that restricts a User query to the columns a response schema reads.
+
+    created_at is always included because it is the keyset pagination sort key.
+    """
+    columns = [getattr(User, name) for name in schema.model_fields if name in User.__mapper__.column_attrs]
+    return load_only(*columns, User.created_at)
+
 class UserService:
+    # (total, monotonic expiry) for the cached count strategy
+    _count_cache: Optional[Tuple[int, float]] = None
+    _user_cache = UserCache(
+        create_cache_backend(
+            settings.user_cache_backend,
+            max_size=settings.user_cache_max_size,
+            ttl=settings.user_cache_ttl_seconds,
+            redis_url=settings.cache_redis_url,
+            pool_size=settings.cache_redis_pool_size,
+            timeout=settings.cache_redis_timeout_seconds,
+        ),
+        ttl=settings.user_cache_ttl_seconds,
+        enabled=settings.user_cache_enabled,
+    )
+
     @classmethod
     async def _execute_query(cls, session: AsyncSession, query):
+        """Executes a statement inside the session's transaction. Committing is left to the caller."""
         try:
             result = await session.execute(query)
-            await session.commit()
             return result
         except SQLAlchemyError as e:
             logger.error(f"Database error: {e}")
@@ -32,33 +82,124 @@ class UserService:
             return None
 
     @classmethod
-    async def _fetch_user(cls, session: AsyncSession, **filters) -> Optional[User]:
-        query = select(User).filter_by(**filters)
+    async def _fetch_user(cls, session: AsyncSession, *options, **filters) -> Optional[User]:
+        query = select(User).options(*options).filter_by(**filters)
         result = await cls._execute_query(session, query)
         return result.scalars().first() if result else None
 
     @classmethod
     async def get_by_id(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
-        return await cls._fetch_user(session, id=user_id)
+        if not cls._user_cache.enabled:
+            return await cls._fetch_user(session, id=user_id)
+        values, generation = await cls._user_cache.get(user_id)
+        if values is not None:
+            return cls._attach_cached(session, values)
+        return await cls._cache_user(await cls._fetch_user(session, id=user_id), generation)
 
     @classmethod
     async def get_by_email(cls, session: AsyncSession, email: str) -> Optional[User]:
-        return await cls._fetch_user(session, email=email)
+        if not cls._user_cache.enabled:
+            return await cls._fetch_user(session, email=email)
+        user_id = await cls._user_cache.get_user_id(email)
+        generation = None
+        if user_id is not None:
+            values, generation = await cls._user_cache.get(user_id)
+            # The email entry only points at a row; it is trusted while that row still carries the email
+            if values is not None and values["email"] == email:
+                return cls._attach_cached(session, values)
+        user = await cls._fetch_user(session, email=email)
+        # The generation read above belongs to the pointed-at user, which may no longer own this email
+        return await cls._cache_user(user, generation if user is not None and str(user.id) == user_id else None)
+
+    @classmethod
+    async def _cache_user(cls, user: Optional[User], generation: Optional[int]) -> Optional[User]:
+        if user is not None:
+            await cls._user_cache.store(user, generation)
+        return user
+
+    @classmethod
+    def _attach_cached(cls, session: AsyncSession, values: Dict) -> User:
+        """Attaches a cached row to the session as a persistent User without touching the database."""
+        existing = session.identity_map.get(User.__mapper__.identity_key_from_primary_key([values["id"]]))
+        if existing is not None:
+            return existing
+        user = User(**values)
+        make_transient_to_detached(user)
+        session.add(user)
+        return user
+
+    @classmethod
+    async def invalidate_cached_user(cls, user_id: UUID, principals: bool = True):
+        """
+        Retires a user's cached row in every process sharing the cache backend.
+        Pass principals=False for writes that change neither role nor lock state, so the user's tokens stay cached.
+        """
+        if principals:
+            principal_cache.invalidate_user(user_id)
+        if cls._user_cache.enabled:
+            await cls._user_cache.invalidate(user_id)
+
+    @classmethod
+    async def _invalidate_user(cls, session: AsyncSession, user_id: UUID, principals: bool = True):
+        """
+        Retires what is cached about a user once the session's write commits. With principals, the user's tokens
+        are also revoked, in the same transaction, so stateless-mode workers stop accepting them too, and their
+        refresh tokens are deleted so the revoked sessions cannot be renewed.
+        """
+        if principals:
+            await revocation_list.revoke_user(session, user_id)
+            await RefreshTokenService.revoke_all(session, user_id)
+        # Invalidating before the write is visible would let a concurrent reader cache the old row again
+        Database.after_commit(session, lambda: cls.invalidate_cached_user(user_id, principals=principals))
+
+    @classmethod
+    def cache_stats(cls) -> Dict:
+        return {**cls._user_cache.stats(), "principals": principal_cache.stats()}
+
+    @classmethod
+    async def clear_cache(cls):
+        await cls._user_cache.clear()
+        principal_cache.clear()
+        clear_revocations()
+        cls._count_cache = None
+
+    @classmethod
+    async def close_cache(cls):
+        await cls._user_cache.close()
 
     @classmethod
     async def create(cls, session: AsyncSession, user_data: Dict[str, str], email_service: EmailService) -> Optional[User]:
+        """Inserts a new user; returns None for invalid data and raises DuplicateUserError for a taken email or nickname."""
         try:
             validated_data = UserCreate(**user_data).model_dump()
-            existing_user = await cls.get_by_email(session, validated_data['email'])
-            if existing_user:
+            validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+            validated_data['verification_token'] = generate_verification_token()
+            # A taken email yields no row instead of a pre-check SELECT. Postgres arbitrates ON CONFLICT on one
+            # unique index only, so a taken nickname still raises; any other database error propagates as is.
+            query = pg_insert(User).values(**validated_data).on_conflict_do_nothing(index_elements=[User.email]).returning(User)
+            try:
+                new_user = (await session.execute(query)).scalars().first()
+            except IntegrityError:
+                await session.rollback()
+                logger.error("User with given nickname already exists.")
+                raise DuplicateUserError("nickname") from None
+            if new_user is None:
                 logger.error("User with given email already exists.")
-                return None
-            validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            new_user = User(**validated_data)
-            new_user.verification_token = generate_verification_token()
-            session.add(new_user)
-            await session.commit()
-            await email_service.send_verification_email(new_user)
+                raise DuplicateUserError("email")
+            # Deferred columns are not part of the RETURNING entity
+            set_committed_value(new_user, 'verification_token', validated_data['verification_token'])
+            if settings.email_outbox_enabled:
+                # Committed with the user, so registration never waits on SMTP and the email cannot be lost
+                enqueue_email(session, 'email_verification', new_user.email, verification_email_context(new_user))
+            cls._count_cache = None
+
+            async def send_verification():
+                if settings.email_outbox_enabled:
+                    notify_outbox()
+                else:
+                    await email_service.send_verification_email(new_user)
+            # Only a user that was actually committed gets an email
+            Database.after_commit(session, send_verification)
             return new_user
         except ValidationError as e:
             logger.error(f"Validation error during user creation: {e}")
@@ -70,16 +211,20 @@ class UserService:
             validated_data = UserUpdate(**update_data).dict(exclude_unset=True)
 
             if 'password' in validated_data:
-                validated_data['hashed_password'] = hash_password(validated_data.pop('password'))
-            query = update(User).where(User.id == user_id).values(**validated_data).execution_options(synchronize_session="fetch")
-            await cls._execute_query(session, query)
-            updated_user = await cls.get_by_id(session, user_id)
-            if updated_user:
-                session.refresh(updated_user)
+                validated_data['hashed_password'] = await hash_password_async(validated_data.pop('password'))
+            # One round trip: RETURNING hands back the updated row instead of re-selecting it
+            query = update(User).where(User.id == user_id).values(**validated_data).returning(User, User.updated_at)
+            result = await cls._execute_query(session, query)
+            row = result.first() if result else None
+            if row:
+                updated_user, updated_at = row
+                # A copy already in the session gets the SET values synchronized, but not the server-side onupdate
+                set_committed_value(updated_user, "updated_at", updated_at)
+                await cls._invalidate_user(session, user_id, principals='role' in validated_data)
                 logger.info(f"User {user_id} updated successfully.")
                 return updated_user
             else:
-                logger.error(f"User {user_id} not found after update attempt.")
+                logger.error(f"User {user_id} not found for update.")
             return None
         except Exception as e:
             logger.error(f"Error during user update: {e}")
@@ -87,45 +232,132 @@ class UserService:
 
     @classmethod
     async def delete(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
-        if not user:
+        # One statement: the RETURNING row tells us whether the user existed
+        query = delete(User).where(User.id == user_id).returning(User.id)
+        result = await cls._execute_query(session, query)
+        if not result or result.scalar_one_or_none() is None:
             logger.info(f"User with ID {user_id} not found.")
             return False
-        await session.delete(user)
-        await session.commit()
+        cls._count_cache = None
+        await cls._invalidate_user(session, user_id)
         return True
 
     @classmethod
     async def list_users(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> List[User]:
-        query = select(User).offset(skip).limit(limit)
+        query = select(User).options(projection_for(UserResponse)).order_by(User.created_at, User.id).offset(skip).limit(limit)
         result = await cls._execute_query(session, query)
         return result.scalars().all() if result else []
 
+    @classmethod
+    async def list_users_with_total(cls, session: AsyncSession, skip: int = 0, limit: int = 10) -> Tuple[List[User], int]:
+        """
+        Returns a page of users and the exact total from a single statement.
+
+        The total is an uncorrelated count(*) subquery that Postgres evaluates once (as an InitPlan), so the page
+        and the total are read from the same snapshot in one round trip. A `count(*) OVER ()` window gives the
+        same answer but forces every row through the sort before LIMIT applies, which benchmarks several times slower.
+        """
+        query = (
+            select(User, select(func.count()).select_from(User).scalar_subquery().label("total"))
+            .options(projection_for(UserResponse))
+            .order_by(User.created_at, User.id)
+            .offset(skip)
+            .limit(limit)
+        )
+        result = await cls._execute_query(session, query)
+        rows = result.all() if result else []
+        if rows:
+            return [row[0] for row in rows], rows[0][1]
+        if skip == 0:
+            return [], 0
+        # A page past the end has no rows to carry the total
+        return [], await cls.count(session)
+
+    @classmethod
+    async def list_users_by_cursor(cls, session: AsyncSession, limit: int = 10, after: Optional[Tuple[datetime, UUID]] = None,
+                                   direction: str = NEXT) -> Tuple[List[User], bool]:
+        """
+        Keyset pagination over (created_at, id).
+
+        Returns the page in ascending order and whether more rows exist past the page in the paging direction.
+        `after` is the sort key of the boundary row; without it the first page is returned.
+        """
+        sort_key = tuple_(User.created_at, User.id)
+        query = select(User).options(projection_for(UserResponse))
+        if direction == PREV:
+            if after is not None:
+                query = query.where(sort_key < tuple_(*after))
+            query = query.order_by(User.created_at.desc(), User.id.desc())
+        else:
+            if after is not None:
+                query = query.where(sort_key > tuple_(*after))
+            query = query.order_by(User.created_at, User.id)
+        # Fetch one extra row to learn whether another page follows
+        result = await cls._execute_query(session, query.limit(limit + 1))
+        users = list(result.scalars().all()) if result else []
+        has_more = len(users) > limit
+        users = users[:limit]
+        if direction == PREV:
+            users.reverse()
+        return users, has_more
+
     @classmethod
     async def register_user(cls, session: AsyncSession, user_data: Dict[str, str], get_email_service) -> Optional[User]:
         return await cls.create(session, user_data, get_email_service)
 
     @classmethod
     async def login_user(cls, session: AsyncSession, email: str, password: str) -> Optional[User]:
-        user = await cls.get_by_email(session, email)
-        if user:
-            if user.email_verified is False:
-                return None
-            if user.is_locked:
-                return None
-            if verify_password(password, user.hashed_password):
-                user.failed_login_attempts = 0
-                user.last_login_at = datetime.now(timezone.utc)
-                session.add(user)
-                await session.commit()
-                return user
-            else:
-                user.failed_login_attempts += 1
-                if user.failed_login_attempts >= settings.max_login_attempts:
-                    user.is_locked = True
-                session.add(user)
-                await session.commit()
-        return None
+        user, _ = await cls.authenticate(session, email, password)
+        return user
+
+    @classmethod
+    async def authenticate(cls, session: AsyncSession, email: str, password: str) -> Tuple[Optional[User], bool]:
+        """
+        Checks credentials and records the attempt.
+
+        One SELECT fetches the user together with its lock state; the outcome is written with a single atomic
+        UPDATE, so concurrent failed attempts cannot lose increments. A success only counts if the account is
+        still unlocked when it is written, since attempts running alongside may lock it during the password check.
+        Returns the logged-in user (or None) and whether the account was locked when the attempt was made.
+        """
+        user = await cls._fetch_user(session, undefer(User.hashed_password), email=email)
+        if user is None:
+            return None, False
+        if user.is_locked:
+            return None, True
+        if user.email_verified is False:
+            return None, False
+        if await verify_password_async(password, user.hashed_password):
+            values = {"failed_login_attempts": 0, "last_login_at": datetime.now(timezone.utc)}
+            # The plaintext is only at hand now, so hashes from an older policy are upgraded in the same UPDATE
+            if password_needs_rehash(user.hashed_password):
+                values["hashed_password"] = await hash_password_async(password)
+            query = (
+                update(User).where(User.id == user.id, func.coalesce(User.is_locked, False).is_(False)).values(**values)
+                .returning(*(getattr(User, name) for name in values))
+                .execution_options(synchronize_session=False)
+            )
+            row = (await session.execute(query)).one_or_none()
+            if row is None:
+                return None, True
+            # The UPDATE bypasses the identity map, so the returned user gets the stored values explicitly
+            for name, value in zip(values, row):
+                set_committed_value(user, name, value)
+            await cls._invalidate_user(session, user.id, principals=False)
+            return user, False
+
+        attempts = func.coalesce(User.failed_login_attempts, 0) + 1
+        query = (
+            update(User).where(User.id == user.id)
+            .values(failed_login_attempts=attempts, is_locked=or_(func.coalesce(User.is_locked, False), attempts >= settings.max_login_attempts))
+            .returning(User.failed_login_attempts, User.is_locked)
+            .execution_options(synchronize_session=False)
+        )
+        row = (await session.execute(query)).one()
+        set_committed_value(user, "failed_login_attempts", row.failed_login_attempts)
+        set_committed_value(user, "is_locked", row.is_locked)
+        await cls._invalidate_user(session, user.id, principals=row.is_locked)
+        return None, False
 
     @classmethod
     async def is_account_locked(cls, session: AsyncSession, email: str) -> bool:
@@ -134,26 +366,26 @@ class UserService:
 
     @classmethod
     async def reset_password(cls, session: AsyncSession, user_id: UUID, new_password: str) -> bool:
-        hashed_password = hash_password(new_password)
-        user = await cls.get_by_id(session, user_id)
+        hashed_password = await hash_password_async(new_password)
+        user = await cls._fetch_user(session, id=user_id)
         if user:
             user.hashed_password = hashed_password
             user.failed_login_attempts = 0
             user.is_locked = False
-            session.add(user)
-            await session.commit()
+            await session.flush()
+            await cls._invalidate_user(session, user_id)
             return True
         return False
 
     @classmethod
     async def verify_email_with_token(cls, session: AsyncSession, user_id: UUID, token: str) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, undefer(User.verification_token), id=user_id)
         if user and user.verification_token == token:
             user.email_verified = True
             user.verification_token = None
             user.role = UserRole.AUTHENTICATED
-            session.add(user)
-            await session.commit()
+            await session.flush()
+            await cls._invalidate_user(session, user_id)
             return True
         return False
 
@@ -163,26 +395,59 @@ class UserService:
         result = await session.execute(query)
         count = result.scalar()
         return count
+
+    @classmethod
+    async def count_with_strategy(cls, session: AsyncSession, strategy: Optional[str] = None) -> Tuple[int, str]:
+        """
+        Returns the user total and the mode that produced it.
+
+        `exact` runs count(*); `cached` reuses an exact count for `user_count_cache_ttl_seconds`;
+        `estimate` reads the planner's row estimate from pg_class. Estimates fall back to an exact count
+        when unavailable (non-Postgres databases, or a table that has never been analyzed).
+        """
+        strategy = strategy or settings.user_count_strategy
+        if strategy == COUNT_ESTIMATE:
+            estimate = await cls._estimate_count(session)
+            if estimate is not None:
+                return estimate, COUNT_ESTIMATE
+        elif strategy == COUNT_CACHED:
+            cached = cls._count_cache
+            if cached is not None and cached[1] > time.monotonic():
+                return cached[0], COUNT_CACHED
+            total = await cls.count(session)
+            cls._count_cache = (total, time.monotonic() + settings.user_count_cache_ttl_seconds)
+            return total, COUNT_EXACT
+        return await cls.count(session), COUNT_EXACT
+
+    @classmethod
+    async def _estimate_count(cls, session: AsyncSession) -> Optional[int]:
+        if session.get_bind().dialect.name != "postgresql":
+            return None
+        query = text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)")
+        result = await cls._execute_query(session, query.bindparams(table=User.__tablename__))
+        estimate = result.scalar() if result else None
+        # reltuples is -1 until the table is first vacuumed or analyzed
+        return estimate if estimate is not None and estimate >= 0 else None
     
     @classmethod
     async def unlock_user_account(cls, session: AsyncSession, user_id: UUID) -> bool:
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if user and user.is_locked:
             user.is_locked = False
             user.failed_login_attempts = 0
-            session.add(user)
-            await session.commit()
+            await session.flush()
+            await cls._invalidate_user(session, user_id)
             return True
         return False
 
     @classmethod
     async def upgrade_to_professional(cls, session: AsyncSession, user_id: UUID) -> Optional[User]:
         """Upgrades a user to professional status."""
-        user = await cls.get_by_id(session, user_id)
+        user = await cls._fetch_user(session, id=user_id)
         if user:
             user.role = UserRole.PROFESSIONAL  # Assuming this is the enum value for professional users
-            session.add(user)
-            await session.commit()
+            await session.flush()
+            await cls._invalidate_user(session, user_id)
             logger.info(f"User {user_id} upgraded to PROFESSIONAL.")
             return user
         logger.error(f"User {user_id} not found for upgrade.")
@@ -0,0 +1,112 @@
+from builtins import Exception, dict, float, int, len, max, min, str
+import asyncio
+from collections import deque
+from contextlib import asynccontextmanager
+import math
+import time
+from settings.config import settings
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be admitted; `retry_after` is a suggested wait in whole seconds."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+class AdmissionController:
+    """
+    Bounds how much of one kind of work runs at once.
+
+    Up to `max_concurrent` holders run; up to `max_queue` more wait in FIFO order for at most `queue_timeout`
+    seconds. Anything beyond that is rejected at once, so a burst is answered quickly instead of every request
+    timing out behind it. Freed slots are handed straight to the oldest waiter.
+    """
+
+    def __init__(self, max_concurrent: int, max_queue: int, queue_timeout: float):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self._waiters: deque = deque()
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_timeout = 0
+        self.max_queue_depth = 0
+        self._wait_seconds = 0.0
+        # Moving average of how long a holder keeps its slot, for Retry-After estimates
+        self._service_seconds = 0.0
+
+    async def _acquire(self):
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.rejected_queue_full += 1
+            raise AdmissionRejected("queue full", self.retry_after())
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.max_queue_depth = max(self.max_queue_depth, len(self._waiters))
+        try:
+            await asyncio.wait_for(asyncio.shield(waiter), self.queue_timeout)
+        except asyncio.TimeoutError:
+            # The slot may have been handed over just as the deadline passed; then it is ours
+            if not waiter.done():
+                self._waiters.remove(waiter)
+                waiter.cancel()
+                self.rejected_timeout += 1
+                raise AdmissionRejected("queue timeout", self.retry_after())
+        except asyncio.CancelledError:
+            if waiter.done():
+                self._release()
+            else:
+                self._waiters.remove(waiter)
+                waiter.cancel()
+            raise
+
+    def _release(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)  # the slot passes to the waiter; `active` is unchanged
+                return
+        self.active -= 1
+
+    @asynccontextmanager
+    async def admit(self):
+        """Holds a slot for the duration of the block; raises AdmissionRejected if none can be had in time."""
+        queued = time.perf_counter()
+        await self._acquire()
+        started = time.perf_counter()
+        self.admitted += 1
+        self._wait_seconds += started - queued
+        try:
+            yield
+        finally:
+            self._service_seconds += 0.2 * ((time.perf_counter() - started) - self._service_seconds)
+            self._release()
+
+    def retry_after(self) -> int:
+        """Seconds until the work already queued should have drained."""
+        backlog = (len(self._waiters) + 1) * self._service_seconds / max(self.max_concurrent, 1)
+        return max(1, min(math.ceil(backlog), 60))
+
+    def stats(self) -> dict:
+        return {
+            "active": self.active,
+            "max_concurrent": self.max_concurrent,
+            "queue_depth": len(self._waiters),
+            "max_queue": self.max_queue,
+            "max_queue_depth": self.max_queue_depth,
+            "admitted": self.admitted,
+            "rejected_queue_full": self.rejected_queue_full,
+            "rejected_timeout": self.rejected_timeout,
+            "avg_wait_ms": self._wait_seconds / self.admitted * 1000 if self.admitted else 0.0,
+            "avg_service_ms": self._service_seconds * 1000,
+        }
+
+login_admission = AdmissionController(
+    max_concurrent=settings.login_max_concurrent,
+    max_queue=settings.login_max_queue,
+    queue_timeout=settings.login_queue_timeout_seconds,
+)
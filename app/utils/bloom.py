@@ -0,0 +1,35 @@
+from builtins import all, bool, bytearray, float, int, max, range, round, str
+import hashlib
+import math
+
+class BloomFilter:
+    """
+    Fixed-size probabilistic set: `in` never misses an added item, and wrongly reports an absent item as present
+    with roughly `error_rate` probability once `capacity` items have been added. Items cannot be removed; rebuild
+    the filter from the live items instead.
+    """
+
+    def __init__(self, capacity: int, error_rate: float = 0.001):
+        capacity = max(capacity, 1)
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.size_bits = max(int(-capacity * math.log(error_rate) / (math.log(2) ** 2)), 8)
+        self.hash_count = max(int(round(self.size_bits / capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size_bits + 7) // 8)
+
+    def _positions(self, item: str):
+        # Double hashing: two 64-bit halves of one digest generate all k bit positions
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (first + i * second) % self.size_bits
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
@@ -0,0 +1,234 @@
+from builtins import Exception, bool, dict, float, int, isinstance, len, list, object, str
+from abc import ABC, abstractmethod
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+from app.utils.resp_client import RespClient, RespError
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+class TTLCache:
+    """
+    Bounded in-process cache with least-recently-used eviction and a per-entry time-to-live.
+
+    Expired entries are dropped lazily when they are read. Hit, miss, eviction and expiration counters are
+    kept for observability.
+    """
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._clock = clock
+        self._entries: "OrderedDict[Hashable, tuple]" = OrderedDict()  # key -> (value, expires_at)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.get(key, _MISSING)
+        if entry is _MISSING:
+            self.misses += 1
+            return default
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return default
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None):
+        """Stores a value; `ttl` overrides the cache-wide time-to-live for this entry."""
+        if self.max_size <= 0:
+            return
+        self._entries[key] = (value, self._clock() + (self.ttl if ttl is None else ttl))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def __contains__(self, key: Hashable) -> bool:
+        """Whether a live entry exists, without touching recency or the hit counters."""
+        entry = self._entries.get(key, _MISSING)
+        return entry is not _MISSING and entry[1] > self._clock()
+
+    def keys(self) -> List[Hashable]:
+        return list(self._entries)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._entries.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+class CacheBackend(ABC):
+    """
+    Async key-value store behind the shared caches. Keys are strings and values are bytes.
+
+    Backends are best-effort: a lookup that cannot be served is a miss, never an error for the caller.
+    """
+    name = "base"
+
+    @abstractmethod
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        ...
+
+    @abstractmethod
+    async def set_many(self, items: Dict[str, bytes], ttl: float):
+        ...
+
+    @abstractmethod
+    async def incr(self, key: str, ttl: float) -> int:
+        """Atomically increments an integer counter and (re)arms its time-to-live; returns the new value."""
+
+    @abstractmethod
+    async def delete(self, keys: Sequence[str]):
+        ...
+
+    @abstractmethod
+    async def clear(self, prefix: str):
+        """Deletes every key starting with `prefix`, leaving other users of a shared store alone."""
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name}
+
+class MemoryCacheBackend(CacheBackend):
+    """Per-process backend on a TTLCache. Fast, but each worker process holds its own copy."""
+    name = "memory"
+
+    def __init__(self, max_size: int, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self._cache = TTLCache(max_size=max_size, ttl=ttl, clock=clock)
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        return [self._cache.get(key) for key in keys]
+
+    async def set_many(self, items: Dict[str, bytes], ttl: float):
+        for key, value in items.items():
+            self._cache.set(key, value, ttl)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        value = int(self._cache.get(key) or 0) + 1
+        self._cache.set(key, b"%d" % value, ttl)
+        return value
+
+    async def delete(self, keys: Sequence[str]):
+        for key in keys:
+            self._cache.pop(key)
+
+    async def clear(self, prefix: str):
+        for key in self._cache.keys():
+            if key.startswith(prefix):
+                self._cache.pop(key)
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        return {"backend": self.name, "size": stats["size"], "max_size": stats["max_size"],
+                "evictions": stats["evictions"], "expirations": stats["expirations"]}
+
+class RedisCacheBackend(CacheBackend):
+    """
+    Backend on a server speaking the Redis protocol, shared by every worker process.
+
+    Multi-key reads and writes are pipelined into one round trip. Connection failures and timeouts are logged
+    and counted, and reads then behave as misses so requests fall through to the database.
+    """
+    name = "redis"
+    _FAILURES = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError)
+    SCAN_COUNT = 1000
+
+    def __init__(self, client: RespClient):
+        self.client = client
+        self.errors = 0
+
+    def _failed(self, operation: str, error: Exception):
+        self.errors += 1
+        logger.warning(f"Cache {operation} failed: {error!r}")
+
+    async def get_many(self, keys: Sequence[str]) -> List[Optional[bytes]]:
+        if not keys:
+            return []
+        try:
+            replies = await self.client.pipeline([("GET", key) for key in keys])
+        except self._FAILURES as e:
+            self._failed("read", e)
+            return [None] * len(keys)
+        return [reply if isinstance(reply, bytes) else None for reply in replies]
+
+    async def set_many(self, items: Dict[str, bytes], ttl: float):
+        milliseconds = max(int(ttl * 1000), 1)
+        try:
+            await self.client.pipeline([("SET", key, value, "PX", milliseconds) for key, value in items.items()])
+        except self._FAILURES as e:
+            self._failed("write", e)
+
+    async def incr(self, key: str, ttl: float) -> int:
+        try:
+            value, _ = await self.client.pipeline([("INCR", key), ("PEXPIRE", key, max(int(ttl * 1000), 1))])
+            if isinstance(value, RespError):
+                raise value
+            return value
+        except self._FAILURES as e:
+            self._failed("increment", e)
+            return 0
+
+    async def delete(self, keys: Sequence[str]):
+        if not keys:
+            return
+        try:
+            await self.client.execute("DEL", *keys)
+        except self._FAILURES as e:
+            self._failed("delete", e)
+
+    async def clear(self, prefix: str):
+        # SCAN walks the keyspace in batches without blocking the server the way KEYS would
+        pattern = "".join("\\" + char if char in "*?[]\\" else char for char in prefix) + "*"
+        cursor = b"0"
+        while True:
+            cursor, keys = await self.client.execute("SCAN", cursor, "MATCH", pattern, "COUNT", self.SCAN_COUNT)
+            if keys:
+                await self.client.execute("DEL", *keys)
+            if cursor == b"0":
+                break
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "errors": self.errors}
+
+CACHE_BACKENDS = ("memory", "redis")
+
+def create_cache_backend(kind: str, max_size: int, ttl: float, redis_url: Optional[str] = None,
+                         pool_size: int = 4, timeout: float = 1.0) -> CacheBackend:
+    """Builds the configured cache backend."""
+    if kind == "memory":
+        return MemoryCacheBackend(max_size=max_size, ttl=ttl)
+    if kind == "redis":
+        return RedisCacheBackend(RespClient.from_url(redis_url, pool_size=pool_size, timeout=timeout))
+    raise ValueError(f"Unknown cache backend '{kind}'. Use one of {CACHE_BACKENDS}.")
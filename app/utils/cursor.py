@@ -0,0 +1,36 @@
+from builtins import ValueError, str
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+from uuid import UUID
+
+# Cursor directions: "next" pages forward from the key, "prev" pages backward from it.
+NEXT = "next"
+PREV = "prev"
+
+def encode_cursor(created_at: datetime, user_id: UUID, direction: str = NEXT) -> str:
+    """
+    Encode a keyset position into an opaque, URL-safe cursor token.
+
+    The token carries the (created_at, id) sort key of the boundary row and the paging direction.
+    """
+    payload = json.dumps({"k": [created_at.isoformat(), str(user_id)], "d": direction}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(token: str) -> Tuple[datetime, UUID, str]:
+    """
+    Decode a cursor token produced by `encode_cursor`.
+
+    :raises ValueError: If the token is malformed.
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        created_at, user_id = payload["k"]
+        direction = payload["d"]
+        if direction not in (NEXT, PREV):
+            raise ValueError(f"Unknown cursor direction: {direction}")
+        return datetime.fromisoformat(created_at), UUID(user_id), direction
+    except (KeyError, TypeError, UnicodeError, json.JSONDecodeError, ValueError) as e:
+        raise ValueError("Invalid pagination cursor") from e
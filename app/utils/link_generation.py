@@ -1,5 +1,5 @@
 from builtins import dict, int, max, str
-from typing import List, Callable
+from typing import List, Callable, Optional
 from urllib.parse import urlencode
 from uuid import UUID
 
@@ -16,6 +16,12 @@ def create_pagination_link(rel: str, base_url: str, params: dict) -> PaginationL
     query_string = f"skip={params['skip']}&limit={params['limit']}"
     return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
 
+def create_cursor_pagination_link(rel: str, base_url: str, limit: int, cursor: Optional[str] = None) -> PaginationLink:
+    query_string = f"paging=cursor&limit={limit}"
+    if cursor:
+        query_string += f"&cursor={cursor}"
+    return PaginationLink(rel=rel, href=f"{base_url}?{query_string}")
+
 def create_user_links(user_id: UUID, request: Request) -> List[Link]:
     """
     Generate navigation links for user actions.
@@ -46,3 +52,19 @@ def generate_pagination_links(request: Request, skip: int, limit: int, total_ite
         links.append(create_pagination_link("prev", base_url, {'skip': max(skip - limit, 0), 'limit': limit}))
 
     return links
+
+def generate_cursor_pagination_links(request: Request, limit: int, cursor: Optional[str],
+                                     next_cursor: Optional[str], prev_cursor: Optional[str]) -> List[PaginationLink]:
+    base_url = str(request.url).split("?", 1)[0]
+    links = [
+        create_cursor_pagination_link("self", base_url, limit, cursor),
+        create_cursor_pagination_link("first", base_url, limit),
+    ]
+
+    if next_cursor:
+        links.append(create_cursor_pagination_link("next", base_url, limit, next_cursor))
+
+    if prev_cursor:
+        links.append(create_cursor_pagination_link("prev", base_url, limit, prev_cursor))
+
+    return links
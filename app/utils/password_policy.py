@@ -0,0 +1,107 @@
+from builtins import RuntimeError, ValueError, bool, dict, float, int, min, max, range, str
+import logging
+import time
+import bcrypt
+
+try:
+    from argon2 import PasswordHasher, Type as Argon2Type
+    from argon2.exceptions import InvalidHashError, VerificationError, VerifyMismatchError
+except ImportError:  # argon2-cffi is only needed for the argon2id scheme
+    PasswordHasher = None
+
+logger = logging.getLogger(__name__)
+
+PASSWORD_SCHEMES = ("bcrypt", "argon2id")
+# Calibration never goes below these, however slow the host
+BCRYPT_MIN_ROUNDS = 10
+BCRYPT_MAX_ROUNDS = 16
+ARGON2_MIN_TIME_COST = 2
+ARGON2_MAX_TIME_COST = 20
+
+def _argon2_hasher(time_cost: int = 3, memory_kib: int = 65536, parallelism: int = 1):
+    if PasswordHasher is None:
+        raise RuntimeError("The argon2id password scheme requires the argon2-cffi package")
+    return PasswordHasher(time_cost=time_cost, memory_cost=memory_kib, parallelism=parallelism, type=Argon2Type.ID)
+
+class PasswordPolicy:
+    """
+    The scheme and cost new password hashes are made with.
+
+    Verification accepts hashes of either scheme at any cost, since those parameters are stored in the hash
+    itself; `needs_rehash` tells whether a stored hash was made under a different policy.
+    """
+
+    def __init__(self, scheme: str = "bcrypt", bcrypt_rounds: int = 12, argon2_time_cost: int = 3,
+                 argon2_memory_kib: int = 65536, argon2_parallelism: int = 1):
+        if scheme not in PASSWORD_SCHEMES:
+            raise ValueError(f"Unknown password hash scheme {scheme!r}; expected one of {PASSWORD_SCHEMES}")
+        self.scheme = scheme
+        self.bcrypt_rounds = bcrypt_rounds
+        self.argon2_time_cost = argon2_time_cost
+        self.argon2_memory_kib = argon2_memory_kib
+        self.argon2_parallelism = argon2_parallelism
+        self._argon2 = _argon2_hasher(argon2_time_cost, argon2_memory_kib, argon2_parallelism) if scheme == "argon2id" else None
+
+    def hash(self, password: str) -> str:
+        if self._argon2 is not None:
+            return self._argon2.hash(password)
+        return bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt(rounds=self.bcrypt_rounds)).decode('utf-8')
+
+    def verify(self, password: str, hashed: str) -> bool:
+        """Checks a password against a hash of either scheme; raises ValueError for a malformed hash."""
+        if hashed.startswith("$argon2"):
+            hasher = self._argon2 or _argon2_hasher()
+            try:
+                return hasher.verify(hashed, password)
+            except VerifyMismatchError:
+                return False
+            except (InvalidHashError, VerificationError) as e:
+                raise ValueError("Invalid argon2 hash") from e
+        if hashed.startswith("$2"):
+            return bcrypt.checkpw(password.encode('utf-8'), hashed.encode('utf-8'))
+        raise ValueError("Unrecognized password hash format")
+
+    def needs_rehash(self, hashed: str) -> bool:
+        if self._argon2 is not None:
+            return not hashed.startswith("$argon2id$") or self._argon2.check_needs_rehash(hashed)
+        # bcrypt hashes look like $2b$<rounds>$<salt and digest>
+        return not hashed.startswith("$2") or hashed[4:6] != f"{self.bcrypt_rounds:02d}"
+
+    def describe(self) -> dict:
+        if self.scheme == "argon2id":
+            return {"scheme": self.scheme, "time_cost": self.argon2_time_cost, "memory_kib": self.argon2_memory_kib,
+                    "parallelism": self.argon2_parallelism}
+        return {"scheme": self.scheme, "rounds": self.bcrypt_rounds}
+
+    @classmethod
+    def calibrate(cls, scheme: str, target_ms: float, argon2_memory_kib: int = 65536, argon2_parallelism: int = 1) -> "PasswordPolicy":
+        """
+        Builds the most expensive policy whose hash still takes no longer than `target_ms` on this host.
+
+        Hash time grows by 2x per bcrypt round and linearly with argon2 time cost, so one timed hash at a low
+        cost is enough to extrapolate. Costs are clamped to floors that stay safe on slow hosts.
+        """
+        target = target_ms / 1000
+        if scheme == "argon2id":
+            sample = cls(scheme, argon2_time_cost=1, argon2_memory_kib=argon2_memory_kib, argon2_parallelism=argon2_parallelism)
+            per_pass = _fastest_hash_seconds(sample)
+            time_cost = min(max(int(target / per_pass), ARGON2_MIN_TIME_COST), ARGON2_MAX_TIME_COST)
+            policy = cls(scheme, argon2_time_cost=time_cost, argon2_memory_kib=argon2_memory_kib, argon2_parallelism=argon2_parallelism)
+        else:
+            base_rounds = 8
+            base = _fastest_hash_seconds(cls(scheme, bcrypt_rounds=base_rounds))
+            rounds = BCRYPT_MIN_ROUNDS
+            while rounds < BCRYPT_MAX_ROUNDS and base * 2 ** (rounds + 1 - base_rounds) <= target:
+                rounds += 1
+            policy = cls(scheme, bcrypt_rounds=rounds)
+        logger.info(f"Calibrated password hashing to {policy.describe()} for a {target_ms:.0f} ms target")
+        return policy
+
+def _fastest_hash_seconds(policy: PasswordPolicy, samples: int = 3) -> float:
+    # The fastest of a few runs is the least disturbed by other load on the host
+    best = float("inf")
+    for _ in range(samples):
+        started = time.perf_counter()
+        policy.hash("calibration")
+        best = min(best, time.perf_counter() - started)
+    return best
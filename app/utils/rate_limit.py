@@ -0,0 +1,231 @@
+from builtins import KeyError, ValueError, bytes, dict, float, int, isinstance, len, max, str
+import asyncio
+from collections import OrderedDict
+import json
+import logging
+import math
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional
+from app.utils.resp_client import RespClient, RespError
+from settings.config import settings
+
+logger = logging.getLogger(__name__)
+
+RATE_LIMIT_BACKENDS = ("memory", "redis")
+_UNITS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+class RateLimit(NamedTuple):
+    requests: int
+    window: float
+
+    @classmethod
+    def parse(cls, text: str) -> "RateLimit":
+        """Parses limits such as "10/minute" or "100/30" (requests per window in seconds)."""
+        count, _, per = text.partition("/")
+        per = per.strip().lower()
+        try:
+            window = float(per) if per[:1].isdigit() else _UNITS[per.rstrip("s")]
+            return cls(int(count), float(window))
+        except (KeyError, ValueError):
+            raise ValueError(f"Invalid rate limit {text!r}; expected '<requests>/<second|minute|hour|day|seconds>'") from None
+
+def _estimate(previous: int, current: int, now: float, window: float) -> float:
+    # Sliding window approximated from two fixed windows: the previous window's count is weighted by how much
+    # of it still overlaps the trailing window ending now
+    elapsed = now % window / window
+    return previous * (1 - elapsed) + current
+
+class MemoryRateLimitStore:
+    """
+    Per-process counters: one small list per key holding [window index, previous count, current count, expiry].
+
+    Each hit updates its entry in O(1). Entries expire two windows after their last hit and are swept every
+    `sweep_interval` seconds; past `max_keys` the least recently hit keys are dropped so a spray of new clients
+    cannot grow it unbounded, nor push out the counters of clients that are still active.
+    """
+    name = "memory"
+
+    def __init__(self, max_keys: int = 100000, sweep_interval: float = 60.0, clock: Callable[[], float] = time.time):
+        self.max_keys = max_keys
+        self.sweep_interval = sweep_interval
+        self.clock = clock
+        self._counters: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._next_sweep = clock() + sweep_interval
+        self.swept = 0
+        self.evicted = 0
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = self.clock()
+        if now >= self._next_sweep:
+            self.sweep()
+        index = int(now // limit.window)
+        entry = self._counters.get(key)
+        if entry is None:
+            if len(self._counters) >= self.max_keys:
+                self._counters.popitem(last=False)
+                self.evicted += 1
+            entry = self._counters[key] = [index, 0, 0, 0.0]
+        else:
+            self._counters.move_to_end(key)
+        if entry[0] != index:
+            # Roll forward; a gap of more than one window leaves nothing to carry over
+            entry[1] = entry[2] if entry[0] == index - 1 else 0
+            entry[0], entry[2] = index, 0
+        entry[2] += 1
+        entry[3] = (index + 2) * limit.window
+        return _estimate(entry[1], entry[2], now, limit.window)
+
+    def sweep(self):
+        now = self.clock()
+        expired = [key for key, entry in self._counters.items() if entry[3] <= now]
+        for key in expired:
+            del self._counters[key]
+        self.swept += len(expired)
+        self._next_sweep = now + self.sweep_interval
+
+    async def clear(self):
+        self._counters.clear()
+
+    async def close(self):
+        pass
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "keys": len(self._counters), "swept": self.swept, "evicted": self.evicted}
+
+class RedisRateLimitStore:
+    """
+    Counters on a server speaking the Redis protocol, so every worker enforces the same limits.
+
+    One pipelined round trip increments the current window's key and reads the previous one; keys expire on
+    the server. If the server is unreachable, requests are let through rather than failing the API.
+    """
+    name = "redis"
+    _FAILURES = (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, RespError)
+
+    def __init__(self, client: RespClient, clock: Callable[[], float] = time.time):
+        self.client = client
+        self.clock = clock
+        self.errors = 0
+
+    async def hit(self, key: str, limit: RateLimit) -> float:
+        now = self.clock()
+        index = int(now // limit.window)
+        current_key = f"ratelimit:{key}:{index}"
+        try:
+            current, _, previous = await self.client.pipeline([
+                ("INCR", current_key),
+                ("PEXPIRE", current_key, int(limit.window * 2000)),
+                ("GET", f"ratelimit:{key}:{index - 1}"),
+            ])
+            if isinstance(current, RespError):
+                raise current
+        except self._FAILURES as e:
+            self.errors += 1
+            logger.warning(f"Rate limit check failed: {e!r}")
+            return 0.0
+        return _estimate(int(previous) if isinstance(previous, bytes) else 0, current, now, limit.window)
+
+    async def clear(self):
+        pass
+
+    async def close(self):
+        await self.client.close()
+
+    def stats(self) -> dict:
+        return {"backend": self.name, "errors": self.errors}
+
+def create_rate_limit_store(kind: str, redis_url: Optional[str] = None, pool_size: int = 4, timeout: float = 1.0,
+                            max_keys: int = 100000, sweep_interval: float = 60.0):
+    """Builds the configured counter store."""
+    if kind == "memory":
+        return MemoryRateLimitStore(max_keys=max_keys, sweep_interval=sweep_interval)
+    if kind == "redis":
+        return RedisRateLimitStore(RespClient.from_url(redis_url, pool_size=pool_size, timeout=timeout))
+    raise ValueError(f"Unknown rate limit backend '{kind}'. Use one of {RATE_LIMIT_BACKENDS}.")
+
+class RateLimiter:
+    """
+    Sliding-window request limits keyed by client address per route, plus any other key callers check
+    explicitly (such as the account a login is for). Every attempt counts, rejected ones included, so a client
+    that keeps retrying while limited stays limited.
+    """
+
+    def __init__(self, store, route_limits: Dict[str, RateLimit], enabled: bool = True):
+        self.store = store
+        self.route_limits = route_limits
+        self.enabled = enabled
+        self.allowed = 0
+        self.rejected = 0
+
+    def limit_for(self, method: str, path: str) -> Optional[RateLimit]:
+        return self.route_limits.get(f"{method} {path}")
+
+    async def check(self, key: str, limit: RateLimit) -> Optional[int]:
+        """Counts a hit on `key`; returns None if it is within `limit`, else the seconds to wait before retrying."""
+        if not self.enabled:
+            return None
+        if await self.store.hit(key, limit) <= limit.requests:
+            self.allowed += 1
+            return None
+        self.rejected += 1
+        return max(1, math.ceil(limit.window - self.store.clock() % limit.window))
+
+    async def clear(self):
+        await self.store.clear()
+
+    async def close(self):
+        await self.store.close()
+
+    def stats(self) -> dict:
+        return {"enabled": self.enabled, "allowed": self.allowed, "rejected": self.rejected, **self.store.stats()}
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware applying the limiter's per-route limits to each client address.
+
+    The address is the connection's peer; behind a proxy, run the server with proxy headers enabled so it
+    reflects the real client.
+    """
+
+    def __init__(self, app, limiter: RateLimiter):
+        self.app = app
+        self.limiter = limiter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http":
+            limit = self.limiter.limit_for(scope["method"], scope["path"])
+            if limit is not None:
+                client = scope.get("client")
+                address = client[0] if client else "unknown"
+                retry_after = await self.limiter.check(f"ip:{address}:{scope['method']} {scope['path']}", limit)
+                if retry_after is not None:
+                    await _send_too_many_requests(send, retry_after)
+                    return
+        await self.app(scope, receive, send)
+
+async def _send_too_many_requests(send, retry_after: int):
+    body = json.dumps({"detail": "Too many requests, please retry later."}).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode("ascii")),
+            (b"retry-after", str(retry_after).encode("ascii")),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+rate_limiter = RateLimiter(
+    create_rate_limit_store(
+        settings.rate_limit_backend,
+        redis_url=settings.cache_redis_url,
+        pool_size=settings.cache_redis_pool_size,
+        timeout=settings.cache_redis_timeout_seconds,
+        max_keys=settings.rate_limit_max_keys,
+        sweep_interval=settings.rate_limit_sweep_interval_seconds,
+    ),
+    {route: RateLimit.parse(limit) for route, limit in settings.rate_limit_routes.items()},
+    enabled=settings.rate_limit_enabled,
+)
+account_login_limit = RateLimit.parse(settings.rate_limit_login_account)
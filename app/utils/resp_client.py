@@ -0,0 +1,128 @@
+from builtins import BaseException, Exception, bytes, int, isinstance, len, list, range, str
+import asyncio
+from typing import List, Optional, Sequence, Union
+from urllib.parse import urlparse
+
+RespValue = Union[None, int, bytes, List["RespValue"]]
+
+class RespError(Exception):
+    """Error reply returned by a server speaking the Redis protocol."""
+
+def _encode_command(args: Sequence) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        elif isinstance(arg, str):
+            data = arg.encode("utf-8")
+        else:
+            data = str(arg).encode("ascii")
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+async def _read_reply(reader: asyncio.StreamReader) -> RespValue:
+    line = await reader.readuntil(b"\r\n")
+    kind, payload = line[:1], line[1:-2]
+    if kind == b"+":
+        return payload
+    if kind == b"-":
+        return RespError(payload.decode("utf-8", "replace"))
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await _read_reply(reader) for _ in range(count)]
+    raise RespError(f"Unexpected reply type {kind!r}")
+
+class RespClient:
+    """
+    Minimal asyncio client for the Redis serialization protocol (RESP2).
+
+    Keeps a small pool of connections and sends batches of commands as a single pipelined write, reading all
+    replies in one round trip. Broken connections are discarded and reopened on the next use.
+    """
+
+    def __init__(self, host: str = "localhost", port: int = 6379, db: int = 0, password: Optional[str] = None,
+                 pool_size: int = 4, timeout: float = 1.0):
+        self.host = host
+        self.port = port
+        self.db = db
+        self.password = password
+        self.timeout = timeout
+        self._idle: asyncio.LifoQueue = None
+        self._slots: asyncio.Semaphore = None
+        self._pool_size = pool_size
+
+    @classmethod
+    def from_url(cls, url: str, **kwargs) -> "RespClient":
+        """Builds a client from a redis://[:password@]host[:port][/db] URL."""
+        parsed = urlparse(url)
+        db = int(parsed.path.lstrip("/") or 0)
+        return cls(host=parsed.hostname or "localhost", port=parsed.port or 6379, db=db, password=parsed.password, **kwargs)
+
+    async def _connect(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        handshake = []
+        if self.password:
+            handshake.append(("AUTH", self.password))
+        if self.db:
+            handshake.append(("SELECT", self.db))
+        if handshake:
+            # Any failure or timeout (cancellation) during the handshake closes the socket rather than leaking it
+            try:
+                for reply in await self._round_trip(reader, writer, handshake):
+                    if isinstance(reply, RespError):
+                        raise reply
+            except BaseException:
+                writer.close()
+                raise
+        return reader, writer
+
+    @staticmethod
+    async def _round_trip(reader, writer, commands: Sequence[Sequence]) -> List[RespValue]:
+        writer.write(b"".join(_encode_command(command) for command in commands))
+        await writer.drain()
+        return [await _read_reply(reader) for _ in commands]
+
+    async def pipeline(self, commands: Sequence[Sequence]) -> List[RespValue]:
+        """
+        Sends all commands in one write and returns their replies in order.
+
+        Error replies are returned in place as RespError instances rather than raised, so one failing command
+        does not hide the others' results.
+        """
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._pool_size)
+            self._idle = asyncio.LifoQueue()
+        async with self._slots:
+            connection = self._idle.get_nowait() if not self._idle.empty() else None
+            try:
+                if connection is None:
+                    connection = await asyncio.wait_for(self._connect(), self.timeout)
+                replies = await asyncio.wait_for(self._round_trip(*connection, commands), self.timeout)
+            except BaseException:
+                if connection is not None:
+                    connection[1].close()
+                raise
+            self._idle.put_nowait(connection)
+            return replies
+
+    async def execute(self, *args) -> RespValue:
+        """Runs one command, raising RespError for an error reply."""
+        reply = (await self.pipeline([args]))[0]
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    async def close(self):
+        while self._idle is not None and not self._idle.empty():
+            _, writer = self._idle.get_nowait()
+            writer.close()
@@ -1,13 +1,32 @@
 # app/security.py
-from builtins import Exception, ValueError, bool, int, str
+from builtins import Exception, ValueError, bool, dict, int, isinstance, max, str
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 import secrets
+import time
 import bcrypt
 from logging import getLogger
 from datetime import datetime, timedelta
+from app.utils.password_policy import PasswordPolicy
+from settings.config import settings
 
 # Set up logging
 logger = getLogger(__name__)
 
+# bcrypt releases the GIL while hashing, so a small thread pool keeps hashes off the event loop without
+# serializing them. Created on first use so the size follows settings.
+_hash_executor = None
+# Scheme and cost for new hashes; replaced by calibrate_password_policy when a target latency is configured
+_policy = PasswordPolicy(
+    scheme=settings.password_hash_scheme,
+    bcrypt_rounds=settings.bcrypt_rounds,
+    argon2_time_cost=settings.argon2_time_cost,
+    argon2_memory_kib=settings.argon2_memory_kib,
+    argon2_parallelism=settings.argon2_parallelism,
+)
+# Counters are only updated on the event loop thread
+_hashing = {"in_flight": 0, "completed": 0, "wait_seconds": 0.0, "max_wait_seconds": 0.0, "hash_seconds": 0.0, "max_hash_seconds": 0.0}
+
 def hash_password(password: str, rounds: int = 12) -> str:
 
     try:
@@ -21,11 +40,96 @@ def hash_password(password: str, rounds: int = 12) -> str:
 def verify_password(plain_password: str, hashed_password: str) -> bool:
 
     try:
-        return bcrypt.checkpw(plain_password.encode('utf-8'), hashed_password.encode('utf-8'))
+        return _policy.verify(plain_password, hashed_password)
     except Exception as e:
         logger.error("Error verifying password: %s", e)
         raise ValueError("Authentication process encountered an unexpected error") from e
 
+def get_password_policy() -> PasswordPolicy:
+    return _policy
+
+def set_password_policy(policy: PasswordPolicy):
+    global _policy
+    _policy = policy
+
+def calibrate_password_policy(target_ms: float) -> PasswordPolicy:
+    """Replaces the policy with the costliest one of the configured scheme that hashes within `target_ms` here."""
+    set_password_policy(PasswordPolicy.calibrate(
+        settings.password_hash_scheme, target_ms,
+        argon2_memory_kib=settings.argon2_memory_kib, argon2_parallelism=settings.argon2_parallelism,
+    ))
+    return _policy
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """Whether a stored hash was made with a different scheme or cost than the current policy."""
+    return _policy.needs_rehash(hashed_password)
+
+def _hash_with_policy(password: str) -> str:
+    try:
+        return _policy.hash(password)
+    except Exception as e:
+        logger.error("Failed to hash password: %s", e)
+        raise ValueError("Failed to hash password") from e
+
+def _get_hash_executor() -> ThreadPoolExecutor:
+    global _hash_executor
+    if _hash_executor is None:
+        _hash_executor = ThreadPoolExecutor(max_workers=settings.password_hash_workers, thread_name_prefix="password-hash")
+    return _hash_executor
+
+def _timed(function, *args):
+    started = time.perf_counter()
+    try:
+        return function(*args), started, time.perf_counter()
+    except Exception as e:
+        return e, started, time.perf_counter()
+
+async def _run_off_loop(function, *args):
+    """Runs a hashing function on the hashing pool, recording how long it queued and how long it ran."""
+    _hashing["in_flight"] += 1
+    submitted = time.perf_counter()
+    try:
+        result, started, finished = await asyncio.get_running_loop().run_in_executor(_get_hash_executor(), _timed, function, *args)
+    finally:
+        _hashing["in_flight"] -= 1
+    waited, ran = started - submitted, finished - started
+    _hashing["completed"] += 1
+    _hashing["wait_seconds"] += waited
+    _hashing["max_wait_seconds"] = max(_hashing["max_wait_seconds"], waited)
+    _hashing["hash_seconds"] += ran
+    _hashing["max_hash_seconds"] = max(_hashing["max_hash_seconds"], ran)
+    if isinstance(result, Exception):
+        raise result
+    return result
+
+async def hash_password_async(password: str) -> str:
+    """Hashes under the current policy on the hashing pool, so the event loop keeps serving other requests meanwhile."""
+    return await _run_off_loop(_hash_with_policy, password)
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """verify_password run on the hashing pool, so the event loop keeps serving other requests meanwhile."""
+    return await _run_off_loop(verify_password, plain_password, hashed_password)
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False)
+        _hash_executor = None
+
+def hashing_stats() -> dict:
+    """Hashing pool load: in-flight hashes plus average and worst queue wait and hash time."""
+    completed = _hashing["completed"]
+    return {
+        "policy": _policy.describe(),
+        "workers": settings.password_hash_workers,
+        "in_flight": _hashing["in_flight"],
+        "completed": completed,
+        "avg_wait_ms": _hashing["wait_seconds"] / completed * 1000 if completed else 0.0,
+        "max_wait_ms": _hashing["max_wait_seconds"] * 1000,
+        "avg_hash_ms": _hashing["hash_seconds"] / completed * 1000 if completed else 0.0,
+        "max_hash_ms": _hashing["max_hash_seconds"] * 1000,
+    }
+
 def generate_verification_token():
     """
     Generates a token for email verification or other purposes like profile upgrade.
@@ -1,19 +1,209 @@
 # smtp_client.py
-from builtins import Exception, int, str
-import smtplib
+from builtins import BaseException, Exception, bool, bytes, dict, float, int, isinstance, len, str
+import asyncio
+import base64
+import email.policy
+import logging
+import re
+import ssl
+import time
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
-from settings.config import settings
-import logging
+from typing import List, Optional, Tuple
+
+class SMTPError(Exception):
+    """Unexpected reply from the SMTP server."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+        self.message = message
+
+async def upgrade_to_tls(writer: asyncio.StreamWriter, context: ssl.SSLContext, server_hostname: Optional[str] = None,
+                         server_side: bool = False) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """
+    Upgrades an open stream connection to TLS in place and returns a new reader and writer for it.
+
+    Built on loop.start_tls rather than StreamWriter.start_tls, which only exists from Python 3.11. The caller
+    must keep the original writer referenced: newer Pythons close a writer's transport, which the TLS transport
+    runs over, when the writer is garbage collected.
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(loop=loop)
+    protocol = asyncio.StreamReaderProtocol(reader, loop=loop)
+    transport = await loop.start_tls(writer.transport, protocol, context, server_side=server_side, server_hostname=server_hostname)
+    protocol.connection_made(transport)
+    return reader, asyncio.StreamWriter(transport, protocol, reader, loop)
+
+class _Connection:
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.auth_mechanisms: List[str] = []
+        # The plain-text writer a TLS upgrade runs over; kept referenced for as long as the connection lives
+        self.plain_writer: Optional[asyncio.StreamWriter] = None
+        self.last_used = time.monotonic()
+
+    async def reply(self) -> Tuple[int, str]:
+        lines = []
+        while True:
+            line = (await self.reader.readuntil(b"\r\n")).decode("utf-8", "replace")
+            lines.append(line[4:].rstrip("\r\n"))
+            # "250-..." continues a multi-line reply, "250 ..." ends it
+            if line[3:4] != "-":
+                return int(line[:3]), "\n".join(lines)
+
+    async def command(self, line: str, expect: int) -> str:
+        self.writer.write(line.encode("utf-8") + b"\r\n")
+        await self.writer.drain()
+        code, message = await self.reply()
+        if code != expect:
+            raise SMTPError(code, message)
+        return message
+
+    async def ehlo(self):
+        message = await self.command("EHLO localhost", 250)
+        for line in message.split("\n")[1:]:
+            if line.upper().startswith("AUTH"):
+                self.auth_mechanisms = line.upper().split()[1:]
+
+    def close(self):
+        self.writer.close()
+        if self.plain_writer is not None:
+            self.plain_writer.close()
 
 class SMTPClient:
-    def __init__(self, server: str, port: int, username: str, password: str):
+    """
+    Asyncio SMTP client keeping a small pool of connected, authenticated sessions.
+
+    Each send reuses an idle session when one is available, so the handshake (greeting, STARTTLS, login) is paid
+    once per connection rather than once per email. Every send, including any wait for a free session, is bounded
+    by `timeout`. A session that fails is discarded; if it was a reused one, which the server may have closed while
+    idle, the send is retried once on a fresh connection.
+    """
+
+    def __init__(self, server: str, port: int, username: str, password: str, pool_size: int = 2,
+                 timeout: float = 10.0, idle_timeout: float = 60.0, starttls: bool = True,
+                 ssl_context: Optional[ssl.SSLContext] = None):
         self.server = server
         self.port = port
         self.username = username
         self.password = password
+        self.timeout = timeout
+        self.idle_timeout = idle_timeout
+        self.starttls = starttls
+        self.ssl_context = ssl_context
+        self._pool_size = pool_size
+        self._idle: List[_Connection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.connections_opened = 0
+        self.sent = 0
+        self.failures = 0
 
-    def send_email(self, subject: str, html_content: str, recipient: str):
+    async def _connect(self) -> _Connection:
+        reader, writer = await asyncio.open_connection(self.server, self.port)
+        connection = _Connection(reader, writer)
+        # Any failure or timeout (cancellation) during the handshake closes the socket rather than leaking it
+        try:
+            code, message = await connection.reply()
+            if code != 220:
+                raise SMTPError(code, message)
+            await connection.ehlo()
+            if self.starttls:
+                await connection.command("STARTTLS", 220)
+                context = self.ssl_context or ssl.create_default_context()
+                connection.plain_writer = writer
+                connection.reader, connection.writer = await upgrade_to_tls(writer, context, server_hostname=self.server)
+                await connection.ehlo()  # capabilities may change once encrypted
+            if self.username:
+                await self._login(connection)
+        except BaseException:
+            connection.close()
+            raise
+        self.connections_opened += 1
+        return connection
+
+    async def _login(self, connection: _Connection):
+        if "PLAIN" in connection.auth_mechanisms or not connection.auth_mechanisms:
+            credentials = base64.b64encode(f"\0{self.username}\0{self.password}".encode("utf-8")).decode("ascii")
+            await connection.command(f"AUTH PLAIN {credentials}", 235)
+        else:
+            await connection.command("AUTH LOGIN", 334)
+            await connection.command(base64.b64encode(self.username.encode("utf-8")).decode("ascii"), 334)
+            await connection.command(base64.b64encode(self.password.encode("utf-8")).decode("ascii"), 235)
+
+    def _checkout(self) -> Optional[_Connection]:
+        now = time.monotonic()
+        while self._idle:
+            connection = self._idle.pop()
+            # Servers drop idle sessions; one idle past the limit is not worth a failed attempt
+            if now - connection.last_used < self.idle_timeout:
+                return connection
+            connection.close()
+        return None
+
+    async def _transaction(self, connection: _Connection, sender: str, recipient: str, data: bytes):
+        await connection.command(f"MAIL FROM:<{sender}>", 250)
+        await connection.command(f"RCPT TO:<{recipient}>", 250)
+        await connection.command("DATA", 354)
+        # Dot-stuffing: a line starting with "." gets another so it cannot end the message early
+        connection.writer.write(re.sub(rb"(?m)^\.", b"..", data) + b"\r\n.\r\n")
+        await connection.writer.drain()
+        code, message = await connection.reply()
+        if code != 250:
+            raise SMTPError(code, message)
+
+    async def _reset(self, connection: _Connection) -> bool:
+        """Aborts the current transaction and returns the session to the pool; False if that failed."""
+        try:
+            await asyncio.wait_for(connection.command("RSET", 250), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, SMTPError):
+            return False
+        connection.last_used = time.monotonic()
+        self._idle.append(connection)
+        return True
+
+    async def send_message(self, sender: str, recipient: str, data: bytes):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self._pool_size)
+        # One deadline covers waiting for a free session as well as the exchange itself
+        try:
+            await asyncio.wait_for(self._send(sender, recipient, data), self.timeout)
+        except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, SMTPError):
+            self.failures += 1
+            raise
+
+    async def _send(self, sender: str, recipient: str, data: bytes):
+        async with self._slots:
+            connection = self._checkout()
+            reused = connection is not None
+            try:
+                while True:
+                    try:
+                        if connection is None:
+                            connection = await self._connect()
+                        await self._transaction(connection, sender, recipient, data)
+                        break
+                    except (OSError, asyncio.IncompleteReadError, SMTPError) as e:
+                        # A rejected message (5xx) would be rejected again, but leaves the session usable
+                        rejected = isinstance(e, SMTPError) and e.code >= 500
+                        if connection is not None and not (rejected and await self._reset(connection)):
+                            connection.close()
+                        connection = None
+                        # A stale reused session is worth one retry on a fresh connection
+                        if not reused or rejected:
+                            raise
+                        reused = False
+                connection.last_used = time.monotonic()
+                self._idle.append(connection)
+                connection = None
+                self.sent += 1
+            finally:
+                # Timed out or cancelled mid-exchange, the session is in an unknown state and is not reused
+                if connection is not None:
+                    connection.close()
+
+    async def send_email(self, subject: str, html_content: str, recipient: str):
         try:
             message = MIMEMultipart('alternative')
             message['Subject'] = subject
@@ -21,11 +211,21 @@ class SMTPClient:
             message['To'] = recipient
             message.attach(MIMEText(html_content, 'html'))
 
-            with smtplib.SMTP(self.server, self.port) as server:
-                server.starttls()  # Use TLS
-                server.login(self.username, self.password)
-                server.sendmail(self.username, recipient, message.as_string())
+            await self.send_message(self.username, recipient, message.as_bytes(policy=email.policy.SMTP))
             logging.info(f"Email sent to {recipient}")
         except Exception as e:
             logging.error(f"Failed to send email: {str(e)}")
             raise
+
+    async def close(self):
+        while self._idle:
+            connection = self._idle.pop()
+            try:
+                await asyncio.wait_for(connection.command("QUIT", 221), self.timeout)
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, SMTPError):
+                pass
+            connection.close()
+
+    def stats(self) -> dict:
+        return {"idle_connections": len(self._idle), "connections_opened": self.connections_opened,
+                "sent": self.sent, "failures": self.failures}
@@ -0,0 +1,89 @@
+"""
+Throughput comparison of authorization modes for GET /users/{user_id}:
+
+- stateful:                  role and lock state read from the database on every request
+- stateful + principal cache: database read once per token, then served from the principal cache
+- stateless:                 signed token claims trusted, no database access for authorization
+
+Drives the application in-process through an ASGI client (no network hop), so the numbers isolate the
+server-side cost. Seeds one admin user into the configured database and removes it afterwards.
+
+Usage:
+    python -m benchmarks.bench_auth_modes --requests 5000 --concurrency 32
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from httpx import AsyncClient
+from sqlalchemy import delete
+from app.database import Base, Database
+from app.main import app
+from app.models.user_model import User, UserRole
+from app.services.jwt_service import create_access_token
+from app.services.principal_cache import principal_cache
+from app.services.user_service import UserService
+from settings.config import settings
+
+MODES = (
+    ("stateful", "stateful", False),
+    ("stateful + principal cache", "stateful", True),
+    ("stateless", "stateless", True),
+)
+
+async def seed_admin(session_factory) -> User:
+    suffix = uuid.uuid4().hex[:8]
+    admin = User(nickname=f"bench_admin_{suffix}", email=f"bench_admin_{suffix}@example.com", role=UserRole.ADMIN,
+                 email_verified=True, hashed_password="x")
+    async with session_factory() as session:
+        session.add(admin)
+        await session.commit()
+    return admin
+
+async def run_mode(client: AsyncClient, path: str, headers: dict, requests: int, concurrency: int) -> float:
+    remaining = iter(range(requests))
+
+    async def worker():
+        for _ in remaining:
+            response = await client.get(path, headers=headers)
+            response.raise_for_status()
+
+    for _ in range(min(concurrency, 50)):  # warm up
+        await client.get(path, headers=headers)
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return requests / (time.perf_counter() - start)
+
+async def main(requests: int, concurrency: int):
+    Database.initialize(settings.database_url, pool_size=concurrency, max_overflow=0)
+    async with Database._engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = Database.get_session_factory()
+    admin = await seed_admin(session_factory)
+    token = create_access_token(data={"sub": str(admin.id), "role": admin.role.name})
+    headers = {"Authorization": f"Bearer {token}"}
+    original = (settings.auth_mode, principal_cache.enabled)
+    try:
+        print(f"GET /users/{{id}}: {requests} requests, concurrency={concurrency}")
+        async with AsyncClient(app=app, base_url="http://testserver") as client:
+            for label, auth_mode, cache_principals in MODES:
+                settings.auth_mode = auth_mode
+                principal_cache.enabled = cache_principals
+                principal_cache.clear()
+                rps = await run_mode(client, f"/users/{admin.id}", headers, requests, concurrency)
+                print(f"{label:<28} {rps:10.1f} req/s")
+    finally:
+        settings.auth_mode, principal_cache.enabled = original
+        async with session_factory() as session:
+            await session.execute(delete(User).where(User.id == admin.id))
+            await session.commit()
+        await UserService.close_cache()
+        await Database._engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent in-flight requests")
+    args = parser.parse_args()
+    asyncio.run(main(args.requests, args.concurrency))
@@ -0,0 +1,99 @@
+"""
+Latency comparison for the GET /users/ data access paths:
+
+- two queries: UserService.count followed by UserService.list_users
+- one query:   UserService.list_users_with_total (page plus total in one statement)
+
+Seeds throw-away users into the configured database (tables are created if missing), times both paths
+for a few page depths with the runs interleaved so drift affects both equally, and removes the seeded rows
+afterwards.
+
+Usage:
+    python -m benchmarks.bench_list_users --users 20000 --iterations 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from sqlalchemy import delete, insert, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from app.database import Base
+from app.models.user_model import User, UserRole
+from app.services.user_service import UserService
+from settings.config import settings
+
+NICKNAME_PREFIX = "bench_"
+
+async def seed(session_factory, count: int):
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "nickname": f"{NICKNAME_PREFIX}{i}_{uuid.uuid4().hex[:8]}",
+            "email": f"{NICKNAME_PREFIX}{i}_{uuid.uuid4().hex[:8]}@example.com",
+            "role": UserRole.AUTHENTICATED,
+            "email_verified": True,
+            "hashed_password": "x",
+        }
+        for i in range(count)
+    ]
+    async with session_factory() as session:
+        for start in range(0, count, 5000):
+            await session.execute(insert(User), rows[start:start + 5000])
+        await session.commit()
+        await session.execute(text("ANALYZE users"))
+
+async def cleanup(session_factory):
+    async with session_factory() as session:
+        await session.execute(delete(User).where(User.nickname.startswith(NICKNAME_PREFIX)))
+        await session.commit()
+
+def summarize(timings):
+    timings = sorted(timings)
+    return statistics.mean(timings), timings[len(timings) // 2], timings[int(len(timings) * 0.95) - 1]
+
+async def time_paths(session_factory, paths, iterations: int):
+    timings = {label: [] for label, _ in paths}
+    async with session_factory() as session:
+        for label, fetch in paths:  # warm up
+            await fetch(session)
+        for _ in range(iterations):
+            for label, fetch in paths:
+                start = time.perf_counter()
+                await fetch(session)
+                timings[label].append((time.perf_counter() - start) * 1000)
+                session.expunge_all()
+    return {label: summarize(values) for label, values in timings.items()}
+
+async def main(users: int, iterations: int, limit: int):
+    engine = create_async_engine(settings.database_url)
+    session_factory = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    await seed(session_factory, users)
+    try:
+        print(f"{users} users, limit={limit}, {iterations} iterations (ms: mean / p50 / p95)")
+        for skip in (0, users // 2, max(users - limit, 0)):
+            async def two_queries(session):
+                await UserService.count(session)
+                await UserService.list_users(session, skip, limit)
+
+            async def one_query(session):
+                await UserService.list_users_with_total(session, skip, limit)
+
+            results = await time_paths(session_factory, (("count + list", two_queries), ("single query", one_query)), iterations)
+            for label, (mean, p50, p95) in results.items():
+                print(f"skip={skip:<8} {label:<14} {mean:8.2f} / {p50:8.2f} / {p95:8.2f}")
+    finally:
+        await cleanup(session_factory)
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20000, help="Number of users to seed")
+    parser.add_argument("--iterations", type=int, default=200, help="Timed runs per path and page depth")
+    parser.add_argument("--limit", type=int, default=10, help="Page size")
+    args = parser.parse_args()
+    asyncio.run(main(args.users, args.iterations, args.limit))
@@ -11,10 +11,17 @@ Fixtures:
 - `token`: Generates an authentication token for testing secured endpoints.
 - `initialize_database`: Prepares the database at the session start.
 - `setup_database`: Sets up and tears down the database before and after each test.
+- `resp_server`: Runs a local stand-in for a Redis-protocol cache server.
+- `app_engine`: The application's primary engine, disposed after tests that open sessions from `Database`.
+- `capture_statements`: Records the SQL statements the test session sends inside a `with` block.
 """
 
 # Standard library imports
-from builtins import Exception, range, str
+from builtins import Exception, dict, int, len, list, range, str
+import asyncio
+from contextlib import contextmanager
+import fnmatch
+import time
 from datetime import timedelta
 from unittest.mock import AsyncMock, patch
 from uuid import uuid4
@@ -23,6 +30,7 @@ from uuid import uuid4
 import pytest
 from fastapi.testclient import TestClient
 from httpx import AsyncClient
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, scoped_session
 from faker import Faker
@@ -31,11 +39,13 @@ from faker import Faker
 from app.main import app
 from app.database import Base, Database
 from app.models.user_model import User, UserRole
-from app.dependencies import get_db, get_settings
+from app.dependencies import get_db, get_read_only_db, get_settings, unit_of_work
+from app.utils.rate_limit import rate_limiter
 from app.utils.security import hash_password
 from app.utils.template_manager import TemplateManager
 from app.services.email_service import EmailService
 from app.services.jwt_service import create_access_token
+from app.services.user_service import UserService
 
 fake = Faker()
 
@@ -54,11 +64,91 @@ def email_service():
     return email_service
 
 
+class RespStandIn:
+    """In-process server speaking enough of the Redis protocol for the cache backend: GET, SET PX, INCR, PEXPIRE, DEL, SCAN."""
+
+    def __init__(self):
+        self.data = {}  # key -> (value, monotonic expiry or None)
+        self.commands = []
+        self.server = None
+        self.port = None
+
+    async def start(self):
+        self.server = await asyncio.start_server(self._serve, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self.server.close()
+        await self.server.wait_closed()
+
+    def _get(self, key):
+        value, expires_at = self.data.get(key, (None, None))
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self.data[key]
+            return None
+        return value
+
+    def _handle(self, name, args):
+        if name == b"GET":
+            value = self._get(args[0])
+            return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == b"SET":
+            expires_at = time.monotonic() + int(args[3]) / 1000 if len(args) > 3 else None
+            self.data[args[0]] = (args[1], expires_at)
+            return b"+OK\r\n"
+        if name == b"INCR":
+            value = int(self._get(args[0]) or 0) + 1
+            self.data[args[0]] = (b"%d" % value, self.data.get(args[0], (None, None))[1])
+            return b":%d\r\n" % value
+        if name == b"PEXPIRE":
+            if self._get(args[0]) is None:
+                return b":0\r\n"
+            self.data[args[0]] = (self.data[args[0]][0], time.monotonic() + int(args[1]) / 1000)
+            return b":1\r\n"
+        if name == b"DEL":
+            removed = [self.data.pop(key, None) for key in args]
+            return b":%d\r\n" % len([entry for entry in removed if entry is not None])
+        if name == b"SCAN":
+            # SCAN cursor MATCH pattern COUNT n, with the cursor an offset into the sorted keys
+            start, pattern, count = int(args[0]), args[2], int(args[4])
+            keys = sorted(key for key in list(self.data) if self._get(key) is not None)
+            page = [key for key in keys[start:start + count] if fnmatch.fnmatchcase(key, pattern)]
+            cursor = b"%d" % (start + count) if start + count < len(keys) else b"0"
+            return b"*2\r\n$%d\r\n%s\r\n*%d\r\n%s" % (
+                len(cursor), cursor, len(page), b"".join(b"$%d\r\n%s\r\n" % (len(key), key) for key in page))
+        return b"-ERR unknown command\r\n"
+
+    async def _serve(self, reader, writer):
+        try:
+            while True:
+                count = int((await reader.readuntil(b"\r\n"))[1:-2])
+                args = []
+                for _ in range(count):
+                    length = int((await reader.readuntil(b"\r\n"))[1:-2])
+                    args.append((await reader.readexactly(length + 2))[:-2])
+                self.commands.append(args)
+                writer.write(self._handle(args[0].upper(), args[1:]))
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+
+@pytest.fixture
+async def resp_server():
+    server = RespStandIn()
+    await server.start()
+    yield server
+    await server.stop()
+
 # this is what creates the http client for your api tests
 @pytest.fixture(scope="function")
 async def async_client(db_session):
     async with AsyncClient(app=app, base_url="http://testserver") as client:
-        app.dependency_overrides[get_db] = lambda: db_session
+        async def get_test_db():
+            # Requests commit the shared test session as get_db would, running the same post-commit side effects
+            async with unit_of_work(db_session):
+                yield db_session
+        app.dependency_overrides[get_db] = get_test_db
+        app.dependency_overrides[get_read_only_db] = lambda: db_session
         try:
             yield client
         finally:
@@ -74,6 +164,9 @@ def initialize_database():
 # this function setup and tears down (drops tales) for each test function, so you have a clean database for each test.
 @pytest.fixture(scope="function", autouse=True)
 async def setup_database():
+    # Tables are recreated per test, so cached rows from a previous test must not survive
+    await UserService.clear_cache()
+    await rate_limiter.clear()
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
     yield
@@ -90,6 +183,27 @@ async def db_session(setup_database):
         finally:
             await session.close()
 
+@pytest.fixture
+async def app_engine():
+    yield Database._engine
+    # Pooled connections are bound to this test's event loop
+    await Database._engine.dispose()
+
+@pytest.fixture
+def capture_statements(db_session):
+    """`with capture_statements() as statements:` collects the SQL sent to the database inside the block."""
+    @contextmanager
+    def capture():
+        statements = []
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+        event.listen(db_session.bind.sync_engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(db_session.bind.sync_engine, "before_cursor_execute", record)
+    return capture
+
 @pytest.fixture(scope="function")
 async def locked_user(db_session):
     unique_email = fake.email()
@@ -163,12 +277,12 @@ async def unverified_user(db_session):
 @pytest.fixture(scope="function")
 async def users_with_same_role_50_users(db_session):
     users = []
-    for _ in range(50):
+    for index in range(50):
         user_data = {
-            "nickname": fake.user_name(),
+            "nickname": f"{fake.user_name()}_{index}",
             "first_name": fake.first_name(),
             "last_name": fake.last_name(),
-            "email": fake.email(),
+            "email": f"{index}_{fake.email()}",
             "hashed_password": fake.password(),
             "role": UserRole.AUTHENTICATED,
             "email_verified": False,
@@ -0,0 +1,73 @@
+from builtins import range
+import asyncio
+import pytest
+from app.utils.admission import AdmissionController, AdmissionRejected
+
+async def hold(controller, release: asyncio.Event):
+    async with controller.admit():
+        await release.wait()
+
+async def test_admits_up_to_limit_then_queues_in_order():
+    controller = AdmissionController(max_concurrent=1, max_queue=2, queue_timeout=1.0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    order = []
+
+    async def queued(name):
+        async with controller.admit():
+            order.append(name)
+
+    waiters = [asyncio.create_task(queued(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    assert controller.stats()["queue_depth"] == 2
+    release.set()
+    await asyncio.gather(holder, *waiters)
+    assert order == ["first", "second"]
+    stats = controller.stats()
+    assert stats["active"] == 0 and stats["admitted"] == 3 and stats["max_queue_depth"] == 2
+
+async def test_rejects_when_queue_full():
+    controller = AdmissionController(max_concurrent=1, max_queue=0, queue_timeout=1.0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected) as rejected:
+        async with controller.admit():
+            pass
+    assert rejected.value.retry_after >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+    release.set()
+    await holder
+
+async def test_rejects_after_queue_deadline():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=0.05)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    with pytest.raises(AdmissionRejected):
+        async with controller.admit():
+            pass
+    stats = controller.stats()
+    assert stats["rejected_timeout"] == 1 and stats["queue_depth"] == 0
+    release.set()
+    await holder
+    # The expired waiter left no slot behind
+    assert controller.stats()["active"] == 0
+
+async def test_cancelled_waiter_frees_its_place():
+    controller = AdmissionController(max_concurrent=1, max_queue=5, queue_timeout=1.0)
+    release = asyncio.Event()
+    holder = asyncio.create_task(hold(controller, release))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(hold(controller, asyncio.Event()))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    release.set()
+    await holder
+    assert controller.stats()["active"] == 0
+    for _ in range(3):
+        async with controller.admit():
+            pass
@@ -0,0 +1,118 @@
+from builtins import int, range, str
+from datetime import datetime, timedelta, timezone
+import pytest
+from sqlalchemy import event, update
+from app.models.token_model import RefreshToken
+from app.models.user_model import User
+from app.services.jwt_service import decode_token
+from app.services.user_service import UserService
+from app.utils.admission import AdmissionController
+from app.utils.rate_limit import RateLimit, rate_limiter
+
+async def login(async_client, user):
+    form_data = {"username": user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=form_data)
+    assert response.status_code == 200
+    return response.json()
+
+@pytest.mark.asyncio
+async def test_login_issues_refresh_token(async_client, verified_user):
+    tokens = await login(async_client, verified_user)
+    assert tokens["refresh_token"]
+    assert decode_token(tokens["access_token"])["sub"] == str(verified_user.id)
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_tokens(async_client, verified_user):
+    tokens = await login(async_client, verified_user)
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    renewed = response.json()
+    assert renewed["refresh_token"] != tokens["refresh_token"]
+    assert decode_token(renewed["access_token"])["role"] == verified_user.role.name
+    # Each refresh token is single-use
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+    response = await async_client.post("/token/refresh", json={"refresh_token": renewed["refresh_token"]})
+    assert response.status_code == 200
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_unknown_token(async_client):
+    response = await async_client.post("/token/refresh", json={"refresh_token": "not-a-refresh-token"})
+    assert response.status_code == 401
+    response = await async_client.post("/token/refresh", json={"refresh_token": "jeton-réutilisé-✓"})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_expired_token(async_client, db_session, verified_user):
+    tokens = await login(async_client, verified_user)
+    await db_session.execute(update(RefreshToken).values(expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    await db_session.commit()
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_refresh_rejects_locked_account(async_client, db_session, verified_user):
+    tokens = await login(async_client, verified_user)
+    await db_session.execute(update(User).where(User.id == verified_user.id).values(is_locked=True))
+    await db_session.commit()
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_refresh_rejected_after_password_reset(async_client, db_session, verified_user):
+    tokens = await login(async_client, verified_user)
+    assert await UserService.reset_password(db_session, verified_user.id, "MyNewPassword$1234") is True
+    await db_session.commit()
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_refresh_rejected_after_logout(async_client, verified_user):
+    tokens = await login(async_client, verified_user)
+    headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+    assert (await async_client.post("/logout/", headers=headers)).status_code == 204
+    response = await async_client.post("/token/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 401
+
+@pytest.mark.asyncio
+async def test_login_rejected_when_admission_saturated(async_client, verified_user, monkeypatch):
+    controller = AdmissionController(max_concurrent=0, max_queue=0, queue_timeout=1.0)
+    monkeypatch.setattr("app.routers.user_routes.login_admission", controller)
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    response = await async_client.post("/login/", data=form_data)
+    assert response.status_code == 503
+    assert int(response.headers["Retry-After"]) >= 1
+    assert controller.stats()["rejected_queue_full"] == 1
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_address(async_client, verified_user, monkeypatch):
+    monkeypatch.setattr(rate_limiter, "route_limits", {"POST /login/": RateLimit(2, 60)})
+    form_data = {"username": verified_user.email, "password": "wrong"}
+    for _ in range(2):
+        assert (await async_client.post("/login/", data=form_data)).status_code == 401
+    response = await async_client.post("/login/", data=form_data, headers={"Origin": "https://app.example.com"})
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+    # CORS wraps the limiter, so browsers can read the 429
+    assert response.headers["access-control-allow-origin"]
+
+@pytest.mark.asyncio
+async def test_login_rate_limited_per_account(async_client, verified_user, monkeypatch):
+    monkeypatch.setattr("app.routers.user_routes.account_login_limit", RateLimit(1, 60))
+    form_data = {"username": verified_user.email, "password": "MySuperPassword$1234"}
+    assert (await async_client.post("/login/", data=form_data)).status_code == 200
+    response = await async_client.post("/login/", data=form_data)
+    assert response.status_code == 429
+    assert "Retry-After" in response.headers
+
+@pytest.mark.asyncio
+async def test_login_commits_once(async_client, db_session, verified_user):
+    commits = []
+    def record(conn):
+        commits.append(conn)
+    event.listen(db_session.bind.sync_engine, "commit", record)
+    try:
+        await login(async_client, verified_user)
+    finally:
+        event.remove(db_session.bind.sync_engine, "commit", record)
+    assert len(commits) == 1
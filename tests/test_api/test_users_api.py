@@ -18,6 +18,21 @@ async def test_create_user_access_denied(async_client, user_token, email_service
     response = await async_client.post("/users/", json=user_data, headers=headers)
     assert response.status_code == 403
 
+@pytest.mark.asyncio
+async def test_register_reports_which_field_is_taken(async_client, verified_user, email_service):
+    # The failed INSERT rolls the shared test session back, expiring the fixture user
+    nickname, email = verified_user.nickname, verified_user.email
+    user_data = {"nickname": nickname, "email": "fresh@example.com", "password": "sS#fdasrongPassword123!",
+                 "role": UserRole.AUTHENTICATED.name}
+    response = await async_client.post("/register/", json=user_data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Nickname already exists"
+    user_data = {"nickname": generate_nickname(), "email": email, "password": "sS#fdasrongPassword123!",
+                 "role": UserRole.AUTHENTICATED.name}
+    response = await async_client.post("/register/", json=user_data)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Email already exists"
+
 @pytest.mark.asyncio
 async def test_retrieve_user_access_denied(async_client, verified_user, user_token):
     headers = {"Authorization": f"Bearer {user_token}"}
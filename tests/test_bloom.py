@@ -0,0 +1,15 @@
+from builtins import range, str
+from app.utils.bloom import BloomFilter
+
+def test_added_items_are_always_found():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"item-{i}")
+    assert all(f"item-{i}" in bloom for i in range(1000))
+
+def test_false_positive_rate_stays_near_target():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(f"item-{i}")
+    false_positives = sum(f"other-{i}" in bloom for i in range(10000))
+    assert false_positives < 300
@@ -0,0 +1,108 @@
+import asyncio
+import pytest
+from app.utils.cache import MemoryCacheBackend, RedisCacheBackend, TTLCache
+from app.utils.resp_client import RespClient
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+def test_get_and_set():
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.get("missing") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+def test_least_recently_used_entry_is_evicted():
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats()["evictions"] == 1
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl=30)
+    clock.now = 10
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.stats()["expirations"] == 1
+    assert len(cache) == 1
+
+def test_pop_and_clear():
+    cache = TTLCache(max_size=2, ttl=10)
+    cache.set("a", 1)
+    assert cache.pop("a") == 1
+    assert cache.pop("a") is None
+    cache.set("b", 2)
+    cache.clear()
+    assert len(cache) == 0
+
+async def test_memory_backend():
+    backend = MemoryCacheBackend(max_size=10, ttl=10)
+    await backend.set_many({"a": b"1", "b": b"2"}, ttl=10)
+    assert await backend.get_many(["a", "missing", "b"]) == [b"1", None, b"2"]
+    assert await backend.incr("counter", ttl=10) == 1
+    assert await backend.incr("counter", ttl=10) == 2
+    await backend.delete(["a"])
+    assert await backend.get_many(["a"]) == [None]
+
+async def test_redis_backend_pipelines_multi_get(resp_server):
+    backend = RedisCacheBackend(RespClient(port=resp_server.port))
+    await backend.set_many({"a": b"\x00binary\r\n", "b": b"2"}, ttl=10)
+    assert await backend.get_many(["a", "missing", "b"]) == [b"\x00binary\r\n", None, b"2"]
+    assert resp_server.commands[-3:] == [[b"GET", b"a"], [b"GET", b"missing"], [b"GET", b"b"]]
+    assert await backend.incr("counter", ttl=10) == 1
+    assert await backend.incr("counter", ttl=10) == 2
+    await backend.delete(["a", "b"])
+    assert await backend.get_many(["a", "b"]) == [None, None]
+    await backend.close()
+
+async def test_redis_backend_entries_expire(resp_server):
+    backend = RedisCacheBackend(RespClient(port=resp_server.port))
+    await backend.set_many({"a": b"1"}, ttl=0.001)
+    await asyncio.sleep(0.01)
+    assert await backend.get_many(["a"]) == [None]
+    await backend.close()
+
+async def test_redis_backend_unreachable_server_is_a_miss(resp_server):
+    port = resp_server.port
+    await resp_server.stop()
+    backend = RedisCacheBackend(RespClient(port=port, timeout=0.5))
+    assert await backend.get_many(["a"]) == [None]
+    await backend.set_many({"a": b"1"}, ttl=10)
+    assert backend.stats() == {"backend": "redis", "errors": 2}
+
+async def test_resp_client_closes_socket_when_handshake_times_out():
+    closed = asyncio.Event()
+
+    async def silent(reader, writer):
+        await reader.read()  # never answers AUTH; returns once the client closes its end
+        closed.set()
+        writer.close()
+
+    server = await asyncio.start_server(silent, "127.0.0.1", 0)
+    client = RespClient(port=server.sockets[0].getsockname()[1], password="secret", timeout=0.1)
+    with pytest.raises(asyncio.TimeoutError):
+        await client.execute("GET", "a")
+    await asyncio.wait_for(closed.wait(), 1)
+    server.close()
+
+def test_contains_ignores_expired_entries():
+    clock = FakeClock()
+    cache = TTLCache(max_size=2, ttl=10, clock=clock)
+    cache.set("a", 1)
+    assert "a" in cache
+    clock.now = 10
+    assert "a" not in cache
+    assert cache.stats()["hits"] == 0
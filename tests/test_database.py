@@ -0,0 +1,124 @@
+import itertools
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import select, text, update
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import READ_PRIMARY, Database, RoutingSession, TimedQueuePool
+from app.dependencies import get_settings, unit_of_work
+from app.models.user_model import User
+
+settings = get_settings()
+
+async def test_pool_settings_applied():
+    engine = create_async_engine(settings.database_url, poolclass=TimedQueuePool, pool_size=3, max_overflow=2)
+    stats = engine.pool.stats()
+    assert stats["pool_size"] == 3
+    assert stats["max_overflow"] == 2
+    assert stats["checked_out"] == 0
+    await engine.dispose()
+
+async def test_pool_stats_track_checkouts():
+    engine = create_async_engine(settings.database_url, poolclass=TimedQueuePool, pool_size=1, max_overflow=1)
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+        async with engine.connect() as second:
+            await second.execute(text("SELECT 1"))
+            stats = engine.pool.stats()
+            assert stats["checked_out"] == 2
+            assert stats["overflow"] == 1
+    stats = engine.pool.stats()
+    assert stats["checked_out"] == 0
+    assert stats["checkouts"] == 2
+    assert stats["max_wait_ms"] >= 0
+    await engine.dispose()
+
+def test_database_pool_stats_keys():
+    stats = Database.pool_stats()
+    assert stats["replicas"] == []
+    for key in ("checked_out", "idle", "overflow", "avg_wait_ms", "max_wait_ms"):
+        assert key in stats["primary"]
+
+@pytest.fixture
+def replica_engines(monkeypatch):
+    replicas = [create_async_engine(settings.database_url, poolclass=TimedQueuePool) for _ in range(2)]
+    monkeypatch.setattr(Database, "_replica_engines", replicas)
+    monkeypatch.setattr(Database, "_replica_cycle", itertools.cycle(replicas))
+    return replicas
+
+def test_routing_session_reads_from_replicas_round_robin(replica_engines):
+    sessions = [RoutingSession() for _ in range(4)]
+    # Replicas rotate between sessions; each session keeps the one it started reading from
+    binds = [session.get_bind(clause=select(User)) for session in sessions]
+    assert binds == [engine.sync_engine for engine in replica_engines] * 2
+    assert [session.get_bind(clause=select(User)) for session in sessions] == binds
+
+def test_routing_session_sticks_to_primary_after_write(replica_engines):
+    session = RoutingSession()
+    primary = Database._engine.sync_engine
+    assert session.get_bind(clause=select(User)) is not primary
+    assert session.get_bind(clause=update(User).values(nickname="x")) is primary
+    assert session.get_bind(clause=select(User)) is primary
+
+def test_routing_session_textual_reads_do_not_stick_to_primary(replica_engines):
+    session = RoutingSession()
+    primary = Database._engine.sync_engine
+    assert session.get_bind(clause=text("SELECT reltuples FROM pg_class")) is primary
+    assert session.get_bind(clause=select(User)) is not primary
+
+def test_routing_session_locking_reads_use_primary(replica_engines):
+    session = RoutingSession()
+    assert session.get_bind(clause=select(User).with_for_update()) is Database._engine.sync_engine
+
+def test_routing_session_primary_reads_do_not_stick(replica_engines):
+    session = RoutingSession()
+    primary = Database._engine.sync_engine
+    assert session.get_bind(clause=select(User).execution_options(**{READ_PRIMARY: True})) is primary
+    assert session.get_bind(clause=select(User)) is not primary
+
+def test_least_busy_policy_picks_idle_replica(replica_engines, monkeypatch):
+    monkeypatch.setattr(Database, "_replica_policy", "least_busy")
+    monkeypatch.setattr(replica_engines[0].pool, "checkedout", lambda: 4)
+    monkeypatch.setattr(replica_engines[1].pool, "checkedout", lambda: 1)
+    assert Database.get_replica_engine() is replica_engines[1]
+
+async def test_read_only_session_uses_read_only_transaction(app_engine):
+    async with Database.get_session_factory(read_only=True)() as session:
+        result = await session.execute(text("SHOW transaction_read_only"))
+        assert result.scalar() == "on"
+
+async def test_default_session_is_writable(app_engine):
+    async with Database.get_session_factory()() as session:
+        result = await session.execute(text("SHOW transaction_read_only"))
+        assert result.scalar() == "off"
+
+async def test_unit_of_work_commits_once_then_runs_callbacks(app_engine):
+    calls = []
+    async def callback():
+        calls.append(session.in_transaction())
+    async with Database.get_session_factory()() as session:
+        async with unit_of_work(session):
+            await session.execute(update(User).where(User.nickname == "nobody").values(first_name="x"))
+            Database.after_commit(session, callback)
+            assert calls == []
+        assert calls == [False]
+
+async def test_unit_of_work_commits_behind_http_errors_only(app_engine):
+    calls = []
+    async def callback():
+        calls.append(True)
+    async with Database.get_session_factory()() as session:
+        # A deliberate error response, such as a 401 for a wrong password, keeps what led to it
+        with pytest.raises(HTTPException) as raised:
+            async with unit_of_work(session):
+                await session.execute(update(User).where(User.nickname == "nobody").values(first_name="x"))
+                Database.after_commit(session, callback)
+                raise HTTPException(status_code=401)
+        assert raised.value.status_code == 401 and calls == [True]
+        # Anything else is a failure: nothing is committed
+        with pytest.raises(HTTPException) as raised:
+            async with unit_of_work(session):
+                await session.execute(update(User).where(User.nickname == "nobody").values(first_name="x"))
+                Database.after_commit(session, callback)
+                raise RuntimeError("boom")
+        assert raised.value.status_code == 500 and calls == [True]
+        assert session.in_transaction()
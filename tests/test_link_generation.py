@@ -1,4 +1,5 @@
 from builtins import len, max, sorted, str
+from datetime import datetime, timezone
 from unittest.mock import MagicMock
 from urllib.parse import parse_qs, urlparse, parse_qsl, urlunparse, urlencode
 from uuid import uuid4
@@ -6,7 +7,8 @@ from uuid import uuid4
 import pytest
 from fastapi import Request
 
-from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_pagination_links
+from app.utils.cursor import decode_cursor, encode_cursor
+from app.utils.link_generation import create_link, create_pagination_link, create_user_links, generate_cursor_pagination_links, generate_pagination_links
 
 from urllib.parse import urlparse, parse_qs, urlunparse, urlencode
 
@@ -49,3 +51,20 @@ def test_generate_pagination_links(mock_request):
     assert len(links) >= 4
     expected_self_url = "http://testserver/users?limit=5&skip=10"
     assert normalize_url(str(links[0].href)) == normalize_url(expected_self_url), "Self link should match expected URL"
+
+def test_generate_cursor_pagination_links(mock_request):
+    links = generate_cursor_pagination_links(mock_request, 5, "abc", "def", None)
+    rels = {link.rel: normalize_url(str(link.href)) for link in links}
+    assert rels["self"] == normalize_url("http://testserver/users?paging=cursor&limit=5&cursor=abc")
+    assert rels["next"] == normalize_url("http://testserver/users?paging=cursor&limit=5&cursor=def")
+    assert "prev" not in rels
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 4, 21, 9, 51, 44, 977108, tzinfo=timezone.utc)
+    user_id = uuid4()
+    token = encode_cursor(created_at, user_id, "prev")
+    assert decode_cursor(token) == (created_at, user_id, "prev")
+
+def test_decode_cursor_rejects_garbage():
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor")
@@ -0,0 +1,51 @@
+from builtins import ValueError, dict
+import bcrypt
+import pytest
+from app.utils.password_policy import BCRYPT_MIN_ROUNDS, PasswordPolicy
+
+# Cheap argon2id parameters keep the tests fast
+FAST_ARGON2 = dict(argon2_time_cost=2, argon2_memory_kib=8192)
+
+def test_bcrypt_policy_round_trip():
+    policy = PasswordPolicy("bcrypt", bcrypt_rounds=4)
+    hashed = policy.hash("secure_password")
+    assert hashed.startswith("$2b$04$")
+    assert policy.verify("secure_password", hashed) is True
+    assert policy.verify("wrong_password", hashed) is False
+
+def test_argon2id_policy_round_trip():
+    policy = PasswordPolicy("argon2id", **FAST_ARGON2)
+    hashed = policy.hash("secure_password")
+    assert hashed.startswith("$argon2id$")
+    assert policy.verify("secure_password", hashed) is True
+    assert policy.verify("wrong_password", hashed) is False
+
+def test_verifies_hashes_of_the_other_scheme():
+    bcrypt_hash = PasswordPolicy("bcrypt", bcrypt_rounds=4).hash("secure_password")
+    argon2_hash = PasswordPolicy("argon2id", **FAST_ARGON2).hash("secure_password")
+    assert PasswordPolicy("argon2id", **FAST_ARGON2).verify("secure_password", bcrypt_hash) is True
+    assert PasswordPolicy("bcrypt", bcrypt_rounds=4).verify("secure_password", argon2_hash) is True
+
+def test_needs_rehash():
+    policy = PasswordPolicy("bcrypt", bcrypt_rounds=5)
+    assert policy.needs_rehash(policy.hash("pw")) is False
+    assert policy.needs_rehash(bcrypt.hashpw(b"pw", bcrypt.gensalt(rounds=4)).decode()) is True
+    assert policy.needs_rehash(PasswordPolicy("argon2id", **FAST_ARGON2).hash("pw")) is True
+    stronger = PasswordPolicy("argon2id", argon2_time_cost=3, argon2_memory_kib=8192)
+    assert stronger.needs_rehash(PasswordPolicy("argon2id", **FAST_ARGON2).hash("pw")) is True
+
+def test_unknown_hash_format_and_scheme():
+    with pytest.raises(ValueError):
+        PasswordPolicy().verify("pw", "invalid_hash_format")
+    with pytest.raises(ValueError):
+        PasswordPolicy("md5")
+
+def test_calibration_respects_floor():
+    # A 1 ms target is unreachable, so the floor applies
+    assert PasswordPolicy.calibrate("bcrypt", 1).bcrypt_rounds == BCRYPT_MIN_ROUNDS
+    assert PasswordPolicy.calibrate("argon2id", 1, argon2_memory_kib=8192).argon2_time_cost == 2
+
+def test_calibration_scales_with_target():
+    fast = PasswordPolicy.calibrate("bcrypt", 1)
+    slow = PasswordPolicy.calibrate("bcrypt", 2000)
+    assert slow.bcrypt_rounds > fast.bcrypt_rounds
@@ -0,0 +1,72 @@
+from app.database import Database
+from app.dependencies import get_settings
+from app.models.user_model import User, UserRole
+from app.schemas.token_schema import TokenPrincipal
+from app.services.jwt_service import create_access_token
+from app.services.principal_cache import PrincipalCache, principal_key
+from app.services.user_service import UserService
+from app.utils.security import hash_password
+from settings import config
+
+settings = get_settings()
+
+def test_principal_key_prefers_token_id():
+    assert principal_key({"jti": "abc", "sub": "u", "iat": 1}) == ("jti", "abc")
+    assert principal_key({"sub": "u", "iat": 1}) == ("sub", "u", 1)
+    assert principal_key({"sub": "u"}) is None
+
+def test_invalidate_user_drops_all_of_their_tokens():
+    cache = PrincipalCache(max_size=10, ttl=60)
+    principal = TokenPrincipal(user_id="3fa85f64-5717-4562-b3fc-2c963f66afa6", role="ADMIN")
+    cache.set(("jti", "a"), principal)
+    cache.set(("jti", "b"), principal)
+    cache.invalidate_user(principal.user_id)
+    assert cache.get(("jti", "a")) is None
+    assert cache.get(("jti", "b")) is None
+
+async def test_authorization_is_served_from_principal_cache(async_client, db_session, admin_user, admin_token, capture_statements):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 200
+    with capture_statements() as statements:
+        response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    assert response.status_code == 200
+    assert statements == []
+
+async def test_role_change_invalidates_cached_principal(async_client, admin_user, admin_token, db_session):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 200
+    await UserService.update(db_session, admin_user.id, {"role": UserRole.AUTHENTICATED.name})
+    await Database.commit(db_session)
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 401
+
+async def test_lock_invalidates_cached_principal(async_client, db_session):
+    admin = User(nickname="lockable_admin", email="lockable_admin@example.com", role=UserRole.ADMIN,
+                 hashed_password=hash_password("MySuperPassword$1234"), email_verified=True, is_locked=False)
+    db_session.add(admin)
+    await db_session.commit()
+    headers = {"Authorization": f"Bearer {create_access_token(data={'sub': str(admin.id), 'role': 'ADMIN'})}"}
+    assert (await async_client.get(f"/users/{admin.id}", headers=headers)).status_code == 200
+    for _ in range(settings.max_login_attempts):
+        await UserService.authenticate(db_session, admin.email, "WrongPassword!")
+        await Database.commit(db_session)
+    assert (await async_client.get(f"/users/{admin.id}", headers=headers)).status_code == 403
+
+async def test_stateless_mode_authorizes_without_database(async_client, db_session, admin_user, admin_token, monkeypatch, capture_statements):
+    monkeypatch.setattr(config.settings, "auth_mode", "stateless")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    await UserService.get_by_id(db_session, admin_user.id)
+    with capture_statements() as statements:
+        response = await async_client.get(f"/users/{admin_user.id}", headers=headers)
+    assert response.status_code == 200
+    assert statements == []
+
+async def test_stateless_mode_rejects_revoked_tokens(async_client, db_session, admin_user, admin_token, monkeypatch):
+    monkeypatch.setattr(config.settings, "auth_mode", "stateless")
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 200
+    await UserService.update(db_session, admin_user.id, {"role": UserRole.MANAGER.name})
+    await Database.commit(db_session)
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 401
+    fresh_token = create_access_token(data={"sub": str(admin_user.id), "role": "MANAGER"})
+    response = await async_client.get(f"/users/{admin_user.id}", headers={"Authorization": f"Bearer {fresh_token}"})
+    assert response.status_code == 200
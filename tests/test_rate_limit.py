@@ -0,0 +1,87 @@
+from builtins import ValueError, range
+import pytest
+from app.utils.rate_limit import MemoryRateLimitStore, RateLimit, RateLimiter, RedisRateLimitStore
+from app.utils.resp_client import RespClient
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_parse_rate_limits():
+    assert RateLimit.parse("10/minute") == RateLimit(10, 60.0)
+    assert RateLimit.parse("5/hours") == RateLimit(5, 3600.0)
+    assert RateLimit.parse("100/30") == RateLimit(100, 30.0)
+    with pytest.raises(ValueError):
+        RateLimit.parse("ten/minute")
+    with pytest.raises(ValueError):
+        RateLimit.parse("10/fortnight")
+
+async def test_limits_within_window():
+    clock = FakeClock(1200.0)  # start of a 60 second window
+    limiter = RateLimiter(MemoryRateLimitStore(clock=clock), {})
+    limit = RateLimit(3, 60)
+    for _ in range(3):
+        assert await limiter.check("client", limit) is None
+    assert await limiter.check("client", limit) == 60
+    assert await limiter.check("other", limit) is None
+    assert limiter.stats()["rejected"] == 1
+
+async def test_previous_window_decays():
+    clock = FakeClock(1200.0)
+    limiter = RateLimiter(MemoryRateLimitStore(clock=clock), {})
+    limit = RateLimit(4, 60)
+    for _ in range(4):
+        await limiter.check("client", limit)
+    # A quarter into the next window three quarters of the previous count still applies: 3 + 1 <= 4
+    clock.now = 1275.0
+    assert await limiter.check("client", limit) is None
+    assert await limiter.check("client", limit) is not None
+    # Two windows later nothing carries over
+    clock.now = 1400.0
+    assert await limiter.check("client", limit) is None
+
+async def test_sweep_and_eviction():
+    clock = FakeClock(1200.0)
+    store = MemoryRateLimitStore(max_keys=2, sweep_interval=30, clock=clock)
+    limit = RateLimit(10, 60)
+    for key in ("a", "b", "c"):
+        await store.hit(key, limit)
+    assert store.stats()["keys"] == 2 and store.evicted == 1
+    clock.now = 1400.0
+    store.sweep()
+    assert store.stats()["keys"] == 0 and store.swept == 2
+
+async def test_eviction_spares_recently_hit_keys():
+    store = MemoryRateLimitStore(max_keys=2, clock=FakeClock(1200.0))
+    limit = RateLimit(10, 60)
+    for key in ("a", "b", "a", "c"):
+        await store.hit(key, limit)
+    # "a" was hit after "b", so "b" is the one dropped and "a" keeps its count
+    assert await store.hit("a", limit) == 3
+    assert await store.hit("b", limit) == 1
+
+async def test_disabled_limiter_allows_everything():
+    limiter = RateLimiter(MemoryRateLimitStore(), {}, enabled=False)
+    for _ in range(5):
+        assert await limiter.check("client", RateLimit(1, 60)) is None
+
+async def test_shared_store_on_redis_protocol(resp_server):
+    clock = FakeClock(1200.0)
+    client = RespClient(port=resp_server.port)
+    # Two limiters on the same server behave like two workers sharing counters
+    first = RateLimiter(RedisRateLimitStore(client, clock=clock), {})
+    second = RateLimiter(RedisRateLimitStore(client, clock=clock), {})
+    limit = RateLimit(2, 60)
+    assert await first.check("client", limit) is None
+    assert await second.check("client", limit) is None
+    assert await first.check("client", limit) is not None
+    await client.close()
+
+async def test_unreachable_shared_store_allows_requests():
+    store = RedisRateLimitStore(RespClient(port=1, timeout=0.2))
+    limiter = RateLimiter(store, {})
+    assert await limiter.check("client", RateLimit(1, 60)) is None
+    assert store.stats()["errors"] == 1
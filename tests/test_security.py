@@ -1,7 +1,10 @@
 # test_security.py
-from builtins import RuntimeError, ValueError, isinstance, str
+from builtins import RuntimeError, ValueError, isinstance, range, str
+import asyncio
 import pytest
-from app.utils.security import hash_password, verify_password
+from app.utils import security
+from app.utils.password_policy import PasswordPolicy
+from app.utils.security import hash_password, hash_password_async, hashing_stats, verify_password, verify_password_async
 
 def test_hash_password():
     """Test that hashing password returns a bcrypt hashed string."""
@@ -65,3 +68,36 @@ def test_hash_password_internal_error(monkeypatch):
     with pytest.raises(ValueError):
         hash_password("test")
 
+
+async def test_async_hash_round_trip(monkeypatch):
+    """Hashing off the event loop produces ordinary bcrypt hashes and records pool timings."""
+    monkeypatch.setattr(security, "_policy", PasswordPolicy("bcrypt", bcrypt_rounds=4))
+    completed = hashing_stats()["completed"]
+    hashed = await hash_password_async("secure_password")
+    assert hashed.startswith('$2b$')
+    assert await verify_password_async("secure_password", hashed) is True
+    assert await verify_password_async("wrong_password", hashed) is False
+    stats = hashing_stats()
+    assert stats["completed"] == completed + 3
+    assert stats["in_flight"] == 0
+    assert stats["avg_hash_ms"] > 0
+
+async def test_async_hash_keeps_event_loop_free():
+    """The loop keeps running other work while hashes are in progress."""
+    ticks = 0
+
+    async def ticker():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0)
+
+    task = asyncio.create_task(ticker())
+    await asyncio.gather(*(hash_password_async("secure_password") for _ in range(4)))
+    task.cancel()
+    assert ticks > 10
+
+async def test_async_verify_invalid_hash():
+    """Errors raised in the pool reach the caller unchanged."""
+    with pytest.raises(ValueError):
+        await verify_password_async("secure_password", "invalid_hash_format")
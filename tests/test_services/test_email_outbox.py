@@ -0,0 +1,101 @@
+from builtins import RuntimeError, len, range, str
+from datetime import datetime, timezone
+import asyncio
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from app.models.email_outbox_model import EmailOutbox
+from app.models.user_model import UserRole
+from app.services.email_outbox import claim_batch, deliver_batch, enqueue_email, notify_outbox, retry_delay, run_outbox_worker
+from app.services.user_service import DuplicateUserError, UserService
+from app.utils.nickname_gen import generate_nickname
+from settings.config import settings
+
+def session_factory(db_session):
+    # Workers open their own sessions; these share the test engine
+    return async_sessionmaker(db_session.bind, expire_on_commit=False)
+
+async def outbox_rows(db_session):
+    db_session.expire_all()
+    return (await db_session.execute(select(EmailOutbox))).scalars().all()
+
+async def enqueue(db_session, count: int = 1):
+    for index in range(count):
+        enqueue_email(db_session, 'email_verification', f"user{index}@example.com",
+                      {"name": "Test", "verification_url": "http://example.com/verify", "email": f"user{index}@example.com"})
+    await db_session.commit()
+
+# Test registration writes the verification email to the outbox instead of sending it
+async def test_create_user_enqueues_verification_email(db_session, email_service):
+    user_data = {"nickname": generate_nickname(), "email": "outbox@example.com", "password": "ValidPassword123!", "role": UserRole.ADMIN.name}
+    user = await UserService.create(db_session, user_data, email_service)
+    assert user is not None
+    user_id, email = user.id, user.email
+    email_service.send_verification_email.assert_not_called()
+    (row,) = await outbox_rows(db_session)
+    assert row.email_type == 'email_verification' and row.recipient == email
+    assert str(user_id) in row.context["verification_url"]
+
+# Test an outbox row is only written when the user is
+async def test_duplicate_user_enqueues_nothing(db_session, email_service, user):
+    user_data = {"nickname": generate_nickname(), "email": user.email, "password": "ValidPassword123!", "role": UserRole.ADMIN.name}
+    with pytest.raises(DuplicateUserError):
+        await UserService.create(db_session, user_data, email_service)
+    assert await outbox_rows(db_session) == []
+
+async def test_delivered_emails_are_deleted(db_session, email_service):
+    await enqueue(db_session, 3)
+    assert await deliver_batch(session_factory(db_session), email_service, batch_size=10) == 3
+    assert email_service.send_user_email.await_count == 3
+    assert await outbox_rows(db_session) == []
+
+async def test_failed_email_is_retried_with_backoff(db_session, email_service, monkeypatch):
+    await enqueue(db_session)
+    email_service.send_user_email.side_effect = RuntimeError("smtp down")
+    assert await deliver_batch(session_factory(db_session), email_service, batch_size=10) == 1
+    (row,) = await outbox_rows(db_session)
+    assert row.attempts == 1 and row.last_error == "smtp down"
+    delay = (row.next_attempt_at - datetime.now(timezone.utc)).total_seconds()
+    assert retry_delay(1) - 5 < delay <= retry_delay(1)
+    # Not due yet, so the next pass leaves it alone
+    assert await deliver_batch(session_factory(db_session), email_service, batch_size=10) == 0
+
+async def test_email_parked_after_max_attempts(db_session, email_service, monkeypatch):
+    monkeypatch.setattr(settings, "email_outbox_max_attempts", 2)
+    await enqueue(db_session)
+    email_service.send_user_email.side_effect = RuntimeError("mailbox unavailable")
+    for _ in range(2):
+        await db_session.execute(update(EmailOutbox).values(next_attempt_at=datetime.now(timezone.utc)))
+        await db_session.commit()
+        await deliver_batch(session_factory(db_session), email_service, batch_size=10)
+    (row,) = await outbox_rows(db_session)
+    assert row.attempts == 2 and row.next_attempt_at is None
+
+def test_retry_delay_doubles_up_to_maximum():
+    assert retry_delay(2) == 2 * retry_delay(1)
+    assert retry_delay(50) == settings.email_outbox_retry_max_seconds
+
+# Test rows locked by another worker's claim are skipped, not waited on
+async def test_claim_skips_locked_rows(db_session):
+    await enqueue(db_session, 3)
+    factory = session_factory(db_session)
+    async with factory() as other_worker:
+        locked = (await other_worker.execute(select(EmailOutbox.id).limit(2).with_for_update())).all()
+        async with factory() as worker:
+            claimed = await claim_batch(worker, batch_size=10, lease_seconds=60)
+        assert len(locked) == 2 and len(claimed) == 1
+        assert claimed[0].id not in {row.id for row in locked}
+        await other_worker.rollback()
+
+# Test a notification wakes the idle worker instead of waiting for the next poll
+async def test_worker_wakes_on_notify(db_session, email_service):
+    worker = asyncio.create_task(run_outbox_worker(session_factory(db_session), email_service, interval=60, batch_size=10))
+    await asyncio.sleep(0.1)  # first, empty pass
+    await enqueue(db_session)
+    notify_outbox()
+    for _ in range(50):
+        if email_service.send_user_email.await_count:
+            break
+        await asyncio.sleep(0.02)
+    worker.cancel()
+    assert email_service.send_user_email.await_count == 1
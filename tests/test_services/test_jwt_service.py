@@ -0,0 +1,33 @@
+from datetime import timedelta
+from app.services import jwt_service
+from app.services.jwt_service import create_access_token, decode_cache_stats, decode_token
+
+def test_reused_token_is_verified_once():
+    token = create_access_token(data={"sub": "user-id", "role": "admin"})
+    before = decode_cache_stats()
+    first = decode_token(token)
+    second = decode_token(token)
+    after = decode_cache_stats()
+    assert first == second
+    assert first["role"] == "ADMIN"
+    assert after["verifications"] == before["verifications"] + 1
+    assert after["hits"] == before["hits"] + 1
+
+def test_cached_claims_are_not_shared():
+    token = create_access_token(data={"sub": "user-id", "role": "admin"})
+    decode_token(token)["role"] = "tampered"
+    assert decode_token(token)["role"] == "ADMIN"
+
+def test_expired_token_is_not_served_from_cache(monkeypatch):
+    token = create_access_token(data={"sub": "user-id", "role": "admin"}, expires_delta=timedelta(minutes=5))
+    claims = decode_token(token)
+    verifications = decode_cache_stats()["verifications"]
+    real_time = jwt_service.time.time
+    monkeypatch.setattr(jwt_service.time, "time", lambda: claims["exp"] + 1)
+    decode_token(token)
+    monkeypatch.setattr(jwt_service.time, "time", real_time)
+    assert decode_cache_stats()["verifications"] == verifications + 1
+
+def test_invalid_token_is_not_cached():
+    assert decode_token("not-a-token") is None
+    assert decode_token("not-a-token") is None
@@ -0,0 +1,109 @@
+import asyncio
+import os
+import threading
+import time
+import jwt
+import pytest
+from app.services import jwt_service
+from app.services.jwt_service import create_access_token, decode_token
+from app.services.key_ring import KeyRing
+from settings import config
+
+@pytest.fixture
+def asymmetric_signing(monkeypatch, tmp_path):
+    monkeypatch.setattr(config.settings, "jwt_algorithm", "EdDSA")
+    monkeypatch.setattr(config.settings, "jwt_keys_dir", str(tmp_path))
+    monkeypatch.setattr(jwt_service, "_key_ring", None)
+    return tmp_path
+
+def test_tokens_are_signed_with_a_kid_tagged_key(asymmetric_signing):
+    token = create_access_token(data={"sub": "user-id", "role": "admin"})
+    header = jwt.get_unverified_header(token)
+    assert header["alg"] == "EdDSA"
+    assert os.path.exists(asymmetric_signing / f"{header['kid']}.pem")
+    assert decode_token(token)["sub"] == "user-id"
+
+def test_tokens_verify_with_the_published_jwks(asymmetric_signing):
+    token = create_access_token(data={"sub": "user-id", "role": "admin"})
+    jwks = jwt.PyJWKSet.from_dict(jwt_service.public_jwks())
+    key = jwks[jwt.get_unverified_header(token)["kid"]]
+    assert jwt.decode(token, key.key, algorithms=["EdDSA"])["sub"] == "user-id"
+
+def test_rotated_key_signs_after_it_has_been_published(tmp_path):
+    ring = KeyRing(str(tmp_path), "RS256", publish_ahead=60)
+    ring.load()
+    first = ring.signing_key()
+    second = ring.rotate()
+    assert ring.signing_key() is first
+    assert [key["kid"] for key in ring.jwks()["keys"]] == [first.kid, second.kid]
+    second.created_at = time.time() - 61
+    assert ring.signing_key() is second
+
+def test_prune_retires_keys_once_their_tokens_have_expired(tmp_path):
+    ring = KeyRing(str(tmp_path), "EdDSA", publish_ahead=0, retain=60)
+    ring.load()
+    first = ring.signing_key()
+    second = ring.rotate()
+    ring.prune()
+    assert ring.public_key(first.kid) is not None
+    first.created_at = time.time() - 120
+    second.created_at = time.time() - 61
+    ring.prune()
+    assert len(ring) == 1
+    assert not os.path.exists(tmp_path / f"{first.kid}.pem")
+
+def test_unknown_kid_reloads_keys_written_by_another_worker(tmp_path):
+    ring = KeyRing(str(tmp_path), "EdDSA")
+    ring.load()
+    other_worker = KeyRing(str(tmp_path), "EdDSA")
+    other_worker.load()
+    new_key = other_worker.rotate()
+    ring._last_reload = 0.0
+    assert ring.public_key(new_key.kid) is not None
+
+def test_workers_sharing_a_directory_rotate_once(tmp_path):
+    first, second = KeyRing(str(tmp_path), "EdDSA", retain=600), KeyRing(str(tmp_path), "EdDSA", retain=600)
+    first.load()
+    second.load()
+    assert len(first) == len(second) == 1
+    # Both workers see the same key come due for rotation
+    first.signing_key().created_at = second.signing_key().created_at = time.time() - 120
+    assert first.maintain(rotate_after=60) is True
+    # The second worker re-reads the directory under the lock, sees the fresh key and leaves it be
+    assert second.maintain(rotate_after=60) is True
+    assert len([name for name in os.listdir(tmp_path) if name.endswith(".pem")]) == 2
+
+def test_maintenance_skips_while_another_worker_holds_the_lock(tmp_path):
+    first, second = KeyRing(str(tmp_path), "EdDSA"), KeyRing(str(tmp_path), "EdDSA")
+    first.load()
+    second.load()
+    with first._lock():
+        assert second.maintain(rotate_after=0) is False
+    assert second.maintain(rotate_after=0) is True
+
+def test_jwks_and_signing_pick_up_keys_from_other_workers(tmp_path):
+    ring = KeyRing(str(tmp_path), "EdDSA", reload_interval=0)
+    ring.load()
+    other_worker = KeyRing(str(tmp_path), "EdDSA")
+    other_worker.load()
+    new_key = other_worker.rotate()
+    assert new_key.kid in [key["kid"] for key in ring.jwks()["keys"]]
+    assert ring.signing_key().kid == new_key.kid
+
+async def test_jwks_endpoint_sends_cache_headers(async_client, asymmetric_signing):
+    response = await async_client.get("/.well-known/jwks.json")
+    assert response.status_code == 200
+    assert response.json()["keys"][0]["kty"] == "OKP"
+    assert response.headers["cache-control"] == f"public, max-age={config.settings.jwks_max_age_seconds}"
+    cached = await async_client.get("/.well-known/jwks.json", headers={"If-None-Match": response.headers["etag"]})
+    assert cached.status_code == 304
+
+async def test_maintenance_runs_off_the_event_loop(asymmetric_signing, monkeypatch):
+    key_ring = jwt_service.get_key_ring()
+    threads = []
+    monkeypatch.setattr(key_ring, "maintain", lambda rotate_after: threads.append(threading.get_ident()))
+    task = asyncio.create_task(jwt_service.run_key_maintenance(0))
+    while not threads:
+        await asyncio.sleep(0.01)
+    task.cancel()
+    assert threads[0] != threading.get_ident()
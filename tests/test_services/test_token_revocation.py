@@ -0,0 +1,90 @@
+from builtins import range
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+from sqlalchemy import func, select
+from app.database import PRIMARY_STICKY, Database
+from app.models.token_model import RevokedToken, UserTokenRevocation
+from app.services.jwt_service import create_access_token, decode_token
+from app.services.token_revocation import RevocationList, revocation_list
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_revocation_list_expires_entries():
+    clock = FakeClock()
+    revocations = RevocationList(capacity=100, clock=clock)
+    revocations.add("a", expires_at=1010.0)
+    assert revocations.is_revoked("a")
+    assert not revocations.is_revoked("b")
+    clock.now = 1011.0
+    revocations.purge()
+    assert not revocations.is_revoked("a")
+    assert revocations.stats()["revoked"] == 0
+
+def test_revocation_list_rebuilds_filter_past_capacity():
+    revocations = RevocationList(capacity=10)
+    for i in range(50):
+        revocations.add(f"jti-{i}", expires_at=datetime.now(timezone.utc).timestamp() + 60)
+    assert all(revocations.is_revoked(f"jti-{i}") for i in range(50))
+    assert revocations.stats()["filter_bits"] > RevocationList(capacity=10).stats()["filter_bits"]
+
+async def test_revoked_token_is_rejected_by_decode_token(db_session):
+    token = create_access_token(data={"sub": str(uuid4()), "role": "admin"})
+    claims = decode_token(token)
+    await revocation_list.revoke(db_session, claims["jti"], datetime.fromtimestamp(claims["exp"], timezone.utc))
+    assert decode_token(token) is None
+    assert decode_token(create_access_token(data={"sub": str(uuid4()), "role": "admin"})) is not None
+
+async def test_sync_loads_revocations_and_purges_expired_rows(db_session):
+    writer = RevocationList(capacity=100)
+    await writer.revoke(db_session, "live", datetime.now(timezone.utc) + timedelta(minutes=5))
+    db_session.add(RevokedToken(jti="expired", expires_at=datetime.now(timezone.utc) - timedelta(minutes=1)))
+    await db_session.commit()
+    reader = RevocationList(capacity=100)
+    await reader.sync(db_session)
+    assert reader.is_revoked("live")
+    assert not reader.is_revoked("expired")
+    assert (await db_session.execute(select(func.count()).select_from(RevokedToken))).scalar() == 1
+
+def test_user_revocations_are_kept_until_expiry():
+    clock = FakeClock()
+    revocations = RevocationList(capacity=10, clock=clock)
+    # Far more users than the filter capacity: none of them may be dropped early
+    for i in range(100):
+        revocations.add_user(f"user-{i}", revoked_before=1000.0, expires_at=1600.0)
+    assert all(revocations.is_user_revoked(f"user-{i}", issued_at=999.0) for i in range(100))
+    assert not revocations.is_user_revoked("user-0", issued_at=1000.0)
+    clock.now = 1600.0
+    revocations.purge()
+    assert revocations.stats()["revoked_users"] == 0
+
+async def test_sync_loads_user_revocations_from_other_workers(db_session):
+    user_id = uuid4()
+    writer = RevocationList(capacity=100)
+    await writer.revoke_user(db_session, user_id)
+    await writer.revoke_user(db_session, user_id)
+    db_session.add(UserTokenRevocation(user_id=uuid4(), revoked_before=datetime.now(timezone.utc) - timedelta(hours=2),
+                                       expires_at=datetime.now(timezone.utc) - timedelta(hours=1)))
+    await db_session.commit()
+    reader = RevocationList(capacity=100)
+    await reader.sync(db_session)
+    issued_before = datetime.now(timezone.utc).timestamp() - 60
+    assert reader.is_user_revoked(str(user_id), issued_before)
+    assert not reader.is_user_revoked(str(user_id), datetime.now(timezone.utc).timestamp() + 1)
+    assert (await db_session.execute(select(func.count()).select_from(UserTokenRevocation))).scalar() == 1
+
+async def test_sync_reads_from_the_primary(app_engine):
+    # Replica lag could hide revocations committed on the primary from the sync window
+    async with Database.get_session_factory()() as session:
+        await RevocationList(capacity=100).sync(session)
+        assert session.info.get(PRIMARY_STICKY)
+
+async def test_logout_revokes_the_token(async_client, admin_user, admin_token):
+    headers = {"Authorization": f"Bearer {admin_token}"}
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 200
+    assert (await async_client.post("/logout/", headers=headers)).status_code == 204
+    assert (await async_client.get(f"/users/{admin_user.id}", headers=headers)).status_code == 401
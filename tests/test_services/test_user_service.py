@@ -1,9 +1,17 @@
 from builtins import range
+import asyncio
 import pytest
-from sqlalchemy import select
+from uuid import uuid4
+from sqlalchemy import inspect, select, text
+from app.database import Database
 from app.dependencies import get_settings
 from app.models.user_model import User, UserRole
-from app.services.user_service import UserService
+from app.services.user_cache import CACHED_COLUMNS, UserCache, decode_user_row, encode_user_row
+from app.services.user_service import DuplicateUserError, UserService
+from app.utils.cache import MemoryCacheBackend, RedisCacheBackend
+from app.utils.password_policy import PasswordPolicy
+from app.utils.resp_client import RespClient
+from app.utils import security
 from app.utils.nickname_gen import generate_nickname
 
 pytestmark = pytest.mark.asyncio
@@ -161,3 +169,232 @@ async def test_unlock_user_account(db_session, locked_user):
     assert unlocked, "The account should be unlocked"
     refreshed_user = await UserService.get_by_id(db_session, locked_user.id)
     assert not refreshed_user.is_locked, "The user should no longer be locked"
+
+# Test keyset pagination walks every user exactly once in both directions
+async def test_list_users_by_cursor(db_session, users_with_same_role_50_users):
+    page_1, has_more = await UserService.list_users_by_cursor(db_session, limit=20)
+    assert len(page_1) == 20 and has_more
+    last = page_1[-1]
+    page_2, has_more = await UserService.list_users_by_cursor(db_session, limit=20, after=(last.created_at, last.id))
+    last = page_2[-1]
+    page_3, has_more = await UserService.list_users_by_cursor(db_session, limit=20, after=(last.created_at, last.id))
+    assert len(page_3) == 10 and not has_more
+    seen = [user.id for user in page_1 + page_2 + page_3]
+    assert len(set(seen)) == 50
+
+    first = page_3[0]
+    previous, has_more = await UserService.list_users_by_cursor(db_session, limit=20, after=(first.created_at, first.id), direction="prev")
+    assert [user.id for user in previous] == [user.id for user in page_2]
+    assert has_more
+
+# Test the cached count strategy reuses an exact count until a write invalidates it
+async def test_count_with_cached_strategy(db_session, users_with_same_role_50_users, email_service):
+    UserService._count_cache = None
+    assert await UserService.count_with_strategy(db_session, "cached") == (50, "exact")
+    assert await UserService.count_with_strategy(db_session, "cached") == (50, "cached")
+    await UserService.delete(db_session, users_with_same_role_50_users[0].id)
+    assert await UserService.count_with_strategy(db_session, "cached") == (49, "exact")
+
+# Test the planner estimate strategy reads pg_class once the table has statistics
+async def test_count_with_estimate_strategy(db_session, users_with_same_role_50_users):
+    await db_session.execute(text("ANALYZE users"))
+    total, mode = await UserService.count_with_strategy(db_session, "estimate")
+    assert mode == "estimate"
+    assert total == 50
+
+# Test the single-statement listing returns the same page as list_users plus the exact total
+async def test_list_users_with_total(db_session, users_with_same_role_50_users):
+    users, total = await UserService.list_users_with_total(db_session, skip=10, limit=10)
+    assert total == 50
+    assert [user.id for user in users] == [user.id for user in await UserService.list_users(db_session, skip=10, limit=10)]
+    users, total = await UserService.list_users_with_total(db_session, skip=100, limit=10)
+    assert users == [] and total == 50
+
+# Test listings load only the columns UserResponse needs
+async def test_list_users_loads_response_columns_only(db_session, users_with_same_role_50_users):
+    db_session.expunge_all()
+    users = await UserService.list_users(db_session, skip=0, limit=5)
+    unloaded = inspect(users[0]).unloaded
+    assert {"hashed_password", "verification_token", "location", "last_login_at"} <= unloaded
+    assert "email" not in unloaded and "bio" not in unloaded
+
+# Test credential columns stay deferred on lookups but login still verifies the password
+async def test_credentials_deferred_until_login(db_session, verified_user):
+    db_session.expunge_all()
+    fetched = await UserService.get_by_id(db_session, verified_user.id)
+    assert "hashed_password" in inspect(fetched).unloaded
+    logged_in_user = await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234")
+    assert logged_in_user is not None
+
+# Test update issues a single UPDATE ... RETURNING and hydrates the result
+async def test_update_user_single_statement(db_session, user, capture_statements):
+    previous_updated_at = user.updated_at
+    with capture_statements() as statements:
+        updated_user = await UserService.update(db_session, user.id, {"first_name": "Returning"})
+    assert updated_user.first_name == "Returning"
+    assert updated_user.updated_at > previous_updated_at
+    assert len(statements) == 1
+    assert statements[0].startswith("UPDATE users") and "RETURNING" in statements[0]
+
+# Test updating a user who does not exist
+async def test_update_user_does_not_exist(db_session):
+    assert await UserService.update(db_session, uuid4(), {"first_name": "Nobody"}) is None
+
+# Test delete is a single DELETE ... RETURNING, plus the durable revocation of the user's tokens
+async def test_delete_user_single_statement(db_session, user, capture_statements):
+    with capture_statements() as statements:
+        assert await UserService.delete(db_session, user.id) is True
+    assert len(statements) == 3
+    assert statements[0].startswith("DELETE FROM users") and "RETURNING" in statements[0]
+    assert statements[1].startswith("INSERT INTO user_token_revocations")
+    assert statements[2].startswith("DELETE FROM refresh_tokens")
+    assert await UserService.get_by_id(db_session, user.id) is None
+    assert await UserService.delete(db_session, user.id) is False
+
+# Test authenticate reports locked accounts without checking the password
+async def test_authenticate_locked_user(db_session, locked_user):
+    user, locked = await UserService.authenticate(db_session, locked_user.email, "MySuperPassword$1234")
+    assert user is None
+    assert locked is True
+
+# Test failed attempts are counted in the database, not just on the loaded object
+async def test_failed_login_increments_atomically(db_session, verified_user):
+    await UserService.login_user(db_session, verified_user.email, "wrongpassword")
+    result = await db_session.execute(select(User.failed_login_attempts).where(User.id == verified_user.id))
+    assert result.scalar() == 1
+    assert verified_user.failed_login_attempts == 1
+    logged_in = await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234")
+    assert logged_in is not None
+    result = await db_session.execute(select(User.failed_login_attempts, User.last_login_at).where(User.id == verified_user.id))
+    attempts, last_login_at = result.one()
+    assert attempts == 0 and last_login_at is not None
+    # The returned user reflects what was written, without a refresh
+    assert logged_in.failed_login_attempts == 0 and logged_in.last_login_at == last_login_at
+
+# Test a correct password checked while parallel failures lock the account does not log in or unlock it
+async def test_concurrent_logins_respect_lockout(db_session, verified_user, monkeypatch, app_engine):
+    async def slow_success(password, hashed_password):
+        valid = await security.verify_password_async(password, hashed_password)
+        if valid:
+            # The failures in flight commit while this attempt is still checking the password
+            await asyncio.sleep(0.5)
+        return valid
+    monkeypatch.setattr("app.services.user_service.verify_password_async", slow_success)
+
+    async def attempt(password):
+        async with Database.get_session_factory()() as session:
+            outcome = await UserService.authenticate(session, verified_user.email, password)
+            await session.commit()
+            return outcome
+
+    wrong = get_settings().max_login_attempts + 2
+    outcomes = await asyncio.gather(attempt("MySuperPassword$1234"), *(attempt("wrongpassword") for _ in range(wrong)))
+    assert outcomes[0] == (None, True)
+    result = await db_session.execute(select(User.is_locked, User.failed_login_attempts).where(User.id == verified_user.id))
+    assert tuple(result.one()) == (True, wrong)
+
+# Test a successful login upgrades a hash made under an older policy, and leaves current hashes alone
+async def test_login_rehashes_outdated_hash(db_session, verified_user, monkeypatch):
+    monkeypatch.setattr(security, "_policy", PasswordPolicy("argon2id", argon2_time_cost=2, argon2_memory_kib=8192))
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    stored = (await db_session.execute(select(User.hashed_password).where(User.id == verified_user.id))).scalar()
+    assert stored.startswith("$argon2id$")
+    assert await UserService.login_user(db_session, verified_user.email, "MySuperPassword$1234") is not None
+    assert (await db_session.execute(select(User.hashed_password).where(User.id == verified_user.id))).scalar() == stored
+
+# Test creating a user whose email is taken is reported as such from a single INSERT
+async def test_create_user_duplicate_email(db_session, email_service, user, capture_statements):
+    user_data = {
+        "nickname": generate_nickname(),
+        "email": user.email,
+        "password": "ValidPassword123!",
+        "role": UserRole.AUTHENTICATED.name
+    }
+    with capture_statements() as statements:
+        with pytest.raises(DuplicateUserError) as raised:
+            await UserService.create(db_session, user_data, email_service)
+    assert raised.value.field == "email"
+    assert len(statements) == 1
+    assert "ON CONFLICT (email) DO NOTHING" in statements[0]
+
+# Test creating a user whose nickname is taken is reported separately from a taken email
+async def test_create_user_duplicate_nickname(db_session, email_service, user):
+    user_data = {
+        "nickname": user.nickname,
+        "email": "fresh_email@example.com",
+        "password": "ValidPassword123!",
+        "role": UserRole.AUTHENTICATED.name
+    }
+    with pytest.raises(DuplicateUserError) as raised:
+        await UserService.create(db_session, user_data, email_service)
+    assert raised.value.field == "nickname"
+
+# Test repeated lookups are served from the user cache without a database round trip
+async def test_get_by_id_served_from_cache(db_session, user, capture_statements):
+    await UserService.get_by_id(db_session, user.id)
+    db_session.expunge_all()
+    with capture_statements() as statements:
+        cached = await UserService.get_by_id(db_session, user.id)
+        by_email = await UserService.get_by_email(db_session, user.email)
+    assert statements == []
+    assert cached.email == user.email
+    assert by_email is cached
+
+# Test writes invalidate the cached user once they are committed
+async def test_update_invalidates_cached_user(db_session, user):
+    await UserService.get_by_id(db_session, user.id)
+    await UserService.update(db_session, user.id, {"first_name": "Invalidated"})
+    # Until then other requests cannot see the new row, so the cached one stays
+    assert (await UserService._user_cache.get(user.id))[0] is not None
+    await Database.commit(db_session)
+    assert (await UserService._user_cache.get(user.id))[0] is None
+    db_session.expunge_all()
+    fetched = await UserService.get_by_id(db_session, user.id)
+    assert fetched.first_name == "Invalidated"
+
+# Test cached rows round-trip through the binary encoding
+async def test_user_row_encoding_round_trip(db_session, user):
+    await db_session.refresh(user)
+    values = {key: getattr(user, key) for key in CACHED_COLUMNS}
+    encoded = encode_user_row(values, generation=7)
+    assert decode_user_row(encoded) == (values, 7)
+    assert "email" not in encoded.decode("latin-1")
+
+# Test a row read before a concurrent write cannot be cached after it
+async def test_stale_row_cannot_outlive_invalidation(db_session, user):
+    await db_session.refresh(user)
+    cache = UserCache(MemoryCacheBackend(max_size=10, ttl=60), ttl=60)
+    _, generation = await cache.get(user.id)
+    await cache.invalidate(user.id)
+    await cache.store(user, generation)
+    assert (await cache.get(user.id))[0] is None
+    _, generation = await cache.get(user.id)
+    await cache.store(user, generation)
+    assert (await cache.get(user.id))[0]["email"] == user.email
+
+# Test user lookups through the shared Redis-protocol backend
+async def test_user_cache_on_redis_backend(db_session, user, resp_server, monkeypatch):
+    cache = UserCache(RedisCacheBackend(RespClient(port=resp_server.port)), ttl=60)
+    monkeypatch.setattr(UserService, "_user_cache", cache)
+    await UserService.get_by_id(db_session, user.id)
+    db_session.expunge_all()
+    cached = await UserService.get_by_id(db_session, user.id)
+    assert cached.email == user.email
+    assert cache.stats()["hits"] == 1
+    await UserService.update(db_session, user.id, {"first_name": "Shared"})
+    await Database.commit(db_session)
+    db_session.expunge_all()
+    assert (await UserService.get_by_id(db_session, user.id)).first_name == "Shared"
+    await cache.close()
+
+# Test clearing the user cache leaves other keys in a shared server alone
+async def test_user_cache_clear_keeps_other_keys(db_session, user, resp_server):
+    backend = RedisCacheBackend(RespClient(port=resp_server.port))
+    backend.SCAN_COUNT = 2
+    cache = UserCache(backend, ttl=60)
+    await cache.store(user, 0)
+    await backend.set_many({"ratelimit:login:1": b"3", "other:key": b"1"}, 60)
+    await cache.clear()
+    assert await backend.get_many(["ratelimit:login:1", "other:key"]) == [b"3", b"1"]
+    assert (await cache.get(user.id))[0] is None and await cache.get_user_id(user.email) is None
+    await cache.close()
@@ -0,0 +1,226 @@
+from builtins import ConnectionError, int, len, range, str
+import asyncio
+import base64
+from datetime import datetime, timedelta, timezone
+import ipaddress
+import ssl
+from cryptography import x509
+from cryptography.hazmat.primitives import hashes, serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+from cryptography.x509.oid import NameOID
+import pytest
+from app.utils.smtp_connection import SMTPClient, SMTPError, upgrade_to_tls
+
+class SMTPStandIn:
+    """In-process server speaking enough SMTP for the client: EHLO, AUTH PLAIN, MAIL, RCPT, DATA, RSET, QUIT."""
+
+    def __init__(self, tls_context=None):
+        self.tls_context = tls_context
+        self.tls_sessions = 0
+        self.messages = []
+        self.connections = 0
+        self.disconnects = 0
+        self.reject_recipient = None
+        self._writers = []
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    def drop_connections(self):
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+
+    async def stop(self):
+        self.drop_connections()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.append(writer)
+
+        def reply(line: str):
+            writer.write(line.encode() + b"\r\n")
+
+        reply("220 stand-in ready")
+        try:
+            while True:
+                line = (await reader.readuntil(b"\r\n")).decode().rstrip("\r\n")
+                verb = line.split(" ", 1)[0].upper()
+                if verb == "EHLO":
+                    reply("250-stand-in")
+                    if self.tls_context is not None:
+                        reply("250-STARTTLS")
+                    reply("250 AUTH PLAIN LOGIN")
+                elif verb == "STARTTLS":
+                    reply("220 ready for TLS")
+                    await writer.drain()
+                    # The plain writer stays in _writers, keeping the transport under the TLS one alive
+                    reader, writer = await upgrade_to_tls(writer, self.tls_context, server_side=True)
+                    self._writers.append(writer)
+                    self.tls_sessions += 1
+                    continue
+                elif verb == "AUTH":
+                    user = base64.b64decode(line.split()[2]).split(b"\0")[1]
+                    reply("235 ok" if user == b"sender@example.com" else "535 bad credentials")
+                elif verb == "RCPT" and self.reject_recipient and self.reject_recipient in line:
+                    reply("550 no such user")
+                elif verb in ("MAIL", "RCPT", "RSET", "NOOP"):
+                    reply("250 ok")
+                elif verb == "DATA":
+                    reply("354 go ahead")
+                    data = await reader.readuntil(b"\r\n.\r\n")
+                    self.messages.append(data)
+                    reply("250 queued")
+                elif verb == "QUIT":
+                    reply("221 bye")
+                    await writer.drain()
+                    break
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            self.disconnects += 1
+        writer.close()
+
+@pytest.fixture
+async def smtp_server():
+    server = SMTPStandIn()
+    await server.start()
+    yield server
+    await server.stop()
+
+def make_client(server, **kwargs) -> SMTPClient:
+    return SMTPClient("127.0.0.1", server.port, "sender@example.com", "secret", starttls=False, **kwargs)
+
+async def test_sends_reuse_one_connection(smtp_server):
+    client = make_client(smtp_server)
+    for index in range(3):
+        await client.send_email(f"Subject {index}", "<p>Hello</p>", "to@example.com")
+    assert len(smtp_server.messages) == 3
+    assert smtp_server.connections == 1
+    assert client.stats()["sent"] == 3
+    await client.close()
+
+async def test_reconnects_after_server_drops_connection(smtp_server):
+    client = make_client(smtp_server)
+    await client.send_email("First", "<p>Hello</p>", "to@example.com")
+    smtp_server.drop_connections()
+    await asyncio.sleep(0)
+    await client.send_email("Second", "<p>Hello</p>", "to@example.com")
+    assert len(smtp_server.messages) == 2
+    assert smtp_server.connections == 2
+    await client.close()
+
+async def test_rejected_recipient_keeps_session(smtp_server):
+    client = make_client(smtp_server)
+    smtp_server.reject_recipient = "nobody@example.com"
+    with pytest.raises(SMTPError) as rejected:
+        await client.send_email("Subject", "<p>Hello</p>", "nobody@example.com")
+    assert rejected.value.code == 550
+    await client.send_email("Subject", "<p>Hello</p>", "to@example.com")
+    assert smtp_server.connections == 1
+    assert client.stats()["failures"] == 1
+    await client.close()
+
+async def test_login_failure_raises(smtp_server):
+    client = SMTPClient("127.0.0.1", smtp_server.port, "intruder@example.com", "secret", starttls=False)
+    with pytest.raises(SMTPError):
+        await client.send_email("Subject", "<p>Hello</p>", "to@example.com")
+    # The failed session's socket is closed, not leaked
+    await asyncio.sleep(0.05)
+    assert smtp_server.disconnects == 1
+
+async def test_send_times_out():
+    closed = asyncio.Event()
+
+    async def silent(reader, writer):
+        await reader.read()  # returns once the client closes its end
+        closed.set()
+        writer.close()
+
+    server = await asyncio.start_server(silent, "127.0.0.1", 0)
+    client = SMTPClient("127.0.0.1", server.sockets[0].getsockname()[1], "sender@example.com", "secret", timeout=0.1, starttls=False)
+    with pytest.raises(asyncio.TimeoutError):
+        await client.send_email("Subject", "<p>Hello</p>", "to@example.com")
+    await asyncio.wait_for(closed.wait(), 1)
+    server.close()
+
+async def test_send_times_out_waiting_for_a_free_session(smtp_server):
+    client = make_client(smtp_server, pool_size=1, timeout=0.1)
+    await client.send_email("First", "<p>Hello</p>", "to@example.com")
+    await client._slots.acquire()  # every session busy
+    with pytest.raises(asyncio.TimeoutError):
+        await client.send_email("Second", "<p>Hello</p>", "to@example.com")
+    client._slots.release()
+    await client.send_email("Third", "<p>Hello</p>", "to@example.com")
+    assert client.stats()["failures"] == 1 and len(smtp_server.messages) == 2
+    await client.close()
+
+async def test_cancelled_send_closes_its_session(smtp_server):
+    client = make_client(smtp_server)
+    await client.send_email("First", "<p>Hello</p>", "to@example.com")
+    send = asyncio.create_task(client.send_email("Second", "<p>Hello</p>", "to@example.com"))
+    await asyncio.sleep(0)  # the reused session is checked out and the exchange has begun
+    send.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await send
+    # The half-used session is neither returned to the pool nor left open
+    assert client.stats()["idle_connections"] == 0
+    await asyncio.sleep(0.05)
+    assert smtp_server.disconnects == 1
+    await client.send_email("Third", "<p>Hello</p>", "to@example.com")
+    assert smtp_server.connections == 2
+    await client.close()
+
+async def test_message_lines_are_dot_stuffed(smtp_server):
+    client = make_client(smtp_server)
+    await client.send_message("sender@example.com", "to@example.com", b"Subject: x\r\n\r\n.hidden\r\nend")
+    assert b"\r\n..hidden\r\n" in smtp_server.messages[0]
+    await client.close()
+
+@pytest.fixture(scope="module")
+def tls_certificate(tmp_path_factory):
+    """Self-signed certificate for 127.0.0.1, written as PEM files."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, "127.0.0.1")])
+    now = datetime.now(timezone.utc)
+    certificate = (
+        x509.CertificateBuilder().subject_name(name).issuer_name(name).public_key(key.public_key())
+        .serial_number(x509.random_serial_number()).not_valid_before(now - timedelta(minutes=1))
+        .not_valid_after(now + timedelta(days=1))
+        .add_extension(x509.SubjectAlternativeName([x509.IPAddress(ipaddress.ip_address("127.0.0.1"))]), critical=False)
+        .add_extension(x509.BasicConstraints(ca=True, path_length=None), critical=True)
+        .sign(key, hashes.SHA256())
+    )
+    directory = tmp_path_factory.mktemp("tls")
+    cert_file, key_file = directory / "cert.pem", directory / "key.pem"
+    cert_file.write_bytes(certificate.public_bytes(serialization.Encoding.PEM))
+    key_file.write_bytes(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()))
+    return str(cert_file), str(key_file)
+
+async def test_starttls_handshake(tls_certificate):
+    cert_file, key_file = tls_certificate
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert_file, key_file)
+    server = SMTPStandIn(tls_context=server_context)
+    await server.start()
+    client = SMTPClient("127.0.0.1", server.port, "sender@example.com", "secret",
+                        ssl_context=ssl.create_default_context(cafile=cert_file))
+    for _ in range(2):
+        await client.send_email("Subject", "<p>Hello</p>", "to@example.com")
+    assert server.tls_sessions == 1 and len(server.messages) == 2
+    await client.close()
+    await server.stop()
+
+async def test_starttls_rejects_untrusted_certificate(tls_certificate):
+    cert_file, key_file = tls_certificate
+    server_context = ssl.create_default_context(ssl.Purpose.CLIENT_AUTH)
+    server_context.load_cert_chain(cert_file, key_file)
+    server = SMTPStandIn(tls_context=server_context)
+    await server.start()
+    client = SMTPClient("127.0.0.1", server.port, "sender@example.com", "secret")
+    with pytest.raises(ssl.SSLError):
+        await client.send_email("Subject", "<p>Hello</p>", "to@example.com")
+    assert server.messages == []
+    await server.stop()